@@ -0,0 +1,79 @@
+"""Benchmark the content filter on transcripts and streamed LLM chunks.
+
+Compares the previous filter (four regexes tried one after another)
+against the current one (one combined regex per language).
+
+Usage: python scripts/benchmark_content_filter.py [--repeat N]
+"""
+
+import argparse
+import re
+import timeit
+
+from totoyai.services.content_filter import find_inappropriate_content, get_content_filter
+
+LEGACY_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"\b(kill|murder|death|die|blood|weapon|gun|knife)\b",
+        r"\b(hate|stupid|idiot|dumb)\b",
+        r"\b(sex|porn|nude)\b",
+        r"\b(drug|alcohol|beer|wine)\b",
+    )
+]
+
+TRANSCRIPTS = [
+    "Kan du berätta en saga om en snäll drake som bor i skogen?",
+    "Varför är himlen blå och vad händer när solen går ner?",
+    "Tell me a story about a dinosaur who loves to dance!",
+    "Jag har sex gosedjur och en av dem heter Gun.",
+]
+
+RESPONSE = (
+    "Det var en gång en liten drake som hette Sigge. Han bodde i en grotta "
+    "vid havet och älskade att titta på stjärnorna. En natt såg han en "
+    "stjärnfall och önskade sig en vän att leka med. "
+) * 3
+
+
+def legacy_contains(text: str) -> bool:
+    return any(pattern.search(text) for pattern in LEGACY_PATTERNS)
+
+
+def llm_chunks(text: str, size: int = 12) -> list[str]:
+    """Split text the way token streaming delivers it."""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def bench(label: str, func, repeat: int) -> float:
+    seconds = min(timeit.repeat(func, number=repeat, repeat=5)) / repeat
+    print(f"{label:44}{seconds * 1e6:>9.2f} µs")
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    sv = get_content_filter("sv")
+    chunks = llm_chunks(RESPONSE)
+    print(f"{len(TRANSCRIPTS)} transcripts; response of {len(RESPONSE)} chars "
+          f"in {len(chunks)} chunks")
+    print(f"{'':44}{'per call':>12}")
+
+    bench("transcripts, legacy (bool)",
+          lambda: [legacy_contains(t) for t in TRANSCRIPTS], args.repeat)
+    bench("transcripts, combined (bool)",
+          lambda: [sv.search(t) for t in TRANSCRIPTS], args.repeat)
+    bench("transcripts, combined (all spans)",
+          lambda: [find_inappropriate_content(t, "sv") for t in TRANSCRIPTS],
+          args.repeat)
+    bench("LLM chunks, legacy (bool)",
+          lambda: [legacy_contains(c) for c in chunks], args.repeat)
+    per_chunk = bench("LLM chunks, combined (bool)",
+                      lambda: [sv.search(c) for c in chunks], args.repeat) / len(chunks)
+    print(f"combined filter per streamed chunk: {per_chunk * 1e6:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
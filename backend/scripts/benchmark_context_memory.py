@@ -0,0 +1,113 @@
+"""Benchmark memory used per conversation context.
+
+Compares the previous representation (dataclass turns with a datetime
+each, list history re-sliced when trimmed) against the current one
+(slotted turns with float timestamps, bounded deque history).
+
+Usage: python scripts/benchmark_context_memory.py [--sessions N] [--turns N]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from totoyai.services.conversation_context import ConversationContext
+
+
+@dataclass
+class LegacyTurn:
+    """ConversationTurn as it was before slots."""
+
+    role: str
+    content: str
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    intent: Optional[str] = None
+
+
+@dataclass
+class LegacyContext:
+    """ConversationContext as it was before deques."""
+
+    session_id: str
+    device_id: str
+    history: list[LegacyTurn] = field(default_factory=list)
+    max_turns: int = 10
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    last_activity: datetime = field(default_factory=datetime.utcnow)
+    child_name: Optional[str] = None
+    child_age: Optional[int] = None
+    preferred_language: str = "sv"
+    current_story: Optional[str] = None
+    current_topic: Optional[str] = None
+
+    def add_turn(self, role: str, content: str, intent: Optional[str] = None) -> None:
+        # Roles arrive as fresh strings (e.g. decoded JSON), not literals
+        role = "".join(role)
+        self.history.append(LegacyTurn(
+            role=role, content=content, timestamp=datetime.utcnow(), intent=intent))
+        self.last_activity = datetime.utcnow()
+        if len(self.history) > self.max_turns * 2:
+            self.history = self.history[-self.max_turns * 2:]
+
+
+def _fill(context, turns: int) -> None:
+    for i in range(turns):
+        context.add_turn("user", f"Berätta en saga om draken {i}!", "".join("story"))
+        context.add_turn("assistant", f"Det var en gång en snäll drake som hette {i}.")
+
+
+def _build(factory, sessions: int, turns: int) -> list:
+    contexts = [factory(f"session-{n}") for n in range(sessions)]
+    for context in contexts:
+        _fill(context, turns)
+    return contexts
+
+
+def measure(factory, sessions: int, turns: int) -> tuple[float, float]:
+    """Return (bytes per session, seconds) to build the contexts."""
+    # Time without tracing, which would slow the build down several times
+    gc.collect()
+    start = time.perf_counter()
+    contexts = _build(factory, sessions, turns)
+    elapsed = time.perf_counter() - start
+    del contexts
+
+    gc.collect()
+    tracemalloc.start()
+    contexts = _build(factory, sessions, turns)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del contexts
+    return used / sessions, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=30,
+                        help="User/assistant pairs added per session")
+    args = parser.parse_args()
+
+    results = {
+        "before": measure(
+            lambda sid: LegacyContext(session_id=sid, device_id="toy"),
+            args.sessions, args.turns),
+        "after": measure(
+            lambda sid: ConversationContext(session_id=sid, device_id="toy"),
+            args.sessions, args.turns),
+    }
+
+    print(f"{args.sessions} sessions, {args.turns} turn pairs each (10 kept)")
+    print(f"{'':8}{'bytes/session':>15}{'build time':>12}")
+    for name, (per_session, elapsed) in results.items():
+        print(f"{name:8}{per_session:>15,.0f}{elapsed:>11.2f}s")
+    before, after = results["before"][0], results["after"][0]
+    print(f"saved   {before - after:>15,.0f} ({(1 - after / before) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Register a toy device and print its credentials.
+
+The secret is shown once; only its bcrypt hash is stored in Redis.
+Flash the printed device_id and secret onto the toy.
+
+Usage: python scripts/register_device.py [--device-id ID] [--firmware VERSION]
+"""
+
+import argparse
+import asyncio
+import secrets
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from totoyai.services.device_registry import device_registry  # noqa: E402
+
+
+async def register(
+    device_id: str,
+    firmware_version: Optional[str],
+    owner_email: Optional[str],
+) -> None:
+    device_secret = secrets.token_urlsafe(32)
+    try:
+        await device_registry.register(
+            device_id, device_secret,
+            firmware_version=firmware_version,
+            owner_email=owner_email,
+        )
+    finally:
+        await device_registry.aclose()
+
+    print(f"device_id:     {device_id}")
+    print(f"device_secret: {device_secret}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--device-id", default=None,
+                        help="Device identifier (default: new UUID)")
+    parser.add_argument("--firmware", default=None, help="Firmware version")
+    parser.add_argument("--owner-email", default=None, help="Owner email (GDPR)")
+    args = parser.parse_args()
+
+    asyncio.run(register(
+        args.device_id or str(uuid.uuid4()), args.firmware, args.owner_email))
+
+
+if __name__ == "__main__":
+    main()
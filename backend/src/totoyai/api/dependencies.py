@@ -1,6 +1,6 @@
 """API dependencies for authentication and common services."""
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, WebSocketException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from totoyai.services.auth import TokenData, verify_token
@@ -20,3 +20,21 @@ async def get_current_device(
             headers={"WWW-Authenticate": "Bearer"},
         )
     return token_data
+
+
+async def get_websocket_device(
+    token: str = Query(..., description="Device access token"),
+) -> TokenData:
+    """Validate JWT token passed as a WebSocket query parameter.
+
+    Browsers and most embedded WebSocket clients cannot set an
+    Authorization header on the upgrade request, so the token is sent
+    as ``?token=...`` instead.
+    """
+    token_data = verify_token(token)
+    if token_data is None:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="Invalid or expired token",
+        )
+    return token_data
@@ -1,8 +1,24 @@
 """API route definitions."""
 
-from fastapi import APIRouter, Depends
+import json
+import logging
+from typing import Optional
+from urllib.parse import quote
 
-from totoyai.api.dependencies import get_current_device
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    WebSocketException,
+    status,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from totoyai.api.dependencies import get_current_device, get_websocket_device
+from totoyai.api.errors import ErrorResponse
 from totoyai.models import (
     ConversationRequest,
     ConversationResponse,
@@ -11,10 +27,37 @@ from totoyai.models import (
     Intent,
     WeatherData,
 )
-from totoyai.services.auth import TokenData, create_access_token, create_refresh_token
+from totoyai.services.audio_format import (
+    AUDIO_PROFILES,
+    EDGE_AUDIO,
+    AudioFormatError,
+    get_audio_profile,
+)
+from totoyai.services.auth import (
+    TokenData,
+    create_access_token,
+    create_refresh_token,
+    token_cache,
+)
+from totoyai.services.context_store import context_store
+from totoyai.services.conversation_context import conversation_manager
+from totoyai.services.conversation_pipeline import (
+    PipelineEventType,
+    conversation_pipeline,
+)
+from totoyai.services.device_registry import DeviceRegistryBusy, device_registry
+from totoyai.services.stt import stt_service
+from totoyai.services.tts import tts_service
+from totoyai.services.tts_cache import tts_cache
+from totoyai.services.warmup import warmup_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1")
 
+# Longest utterance accepted over the streaming endpoint (60s of 16kHz PCM16)
+MAX_UTTERANCE_BYTES = 60 * 16000 * 2
+
 
 @router.get("/health")
 async def health_check() -> dict:
@@ -22,11 +65,51 @@ async def health_check() -> dict:
     return {"status": "healthy"}
 
 
+@router.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """Readiness check: 200 once startup warm-up has finished, else 503."""
+    return JSONResponse(
+        status_code=(
+            status.HTTP_200_OK
+            if warmup_service.ready
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        content=warmup_service.get_status(),
+    )
+
+
+@router.get("/metrics")
+async def metrics() -> dict:
+    """Runtime metrics for the worker's services."""
+    return {
+        "stt": stt_service.get_metrics(),
+        "tts_cache": tts_cache.get_metrics(),
+        "piper": tts_service.piper_pool.get_metrics(),
+        "context_store": context_store.get_metrics(),
+        "contexts": conversation_manager.get_metrics(),
+        "auth": token_cache.get_metrics(),
+        "devices": device_registry.get_metrics(),
+        "safety": conversation_pipeline.get_metrics(),
+    }
+
+
 @router.post("/auth/device", response_model=DeviceTokens)
 async def authenticate_device(auth: DeviceAuth) -> DeviceTokens:
     """Authenticate a device and return tokens."""
-    # TODO: Validate device credentials against database
-    # For now, accept any device_id/secret combination
+    try:
+        valid = await device_registry.authenticate(auth.device_id, auth.device_secret)
+    except DeviceRegistryBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication busy, retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid device credentials",
+        )
+
     access_token = create_access_token(auth.device_id)
     refresh_token = create_refresh_token(auth.device_id)
     return DeviceTokens(
@@ -51,6 +134,208 @@ async def conversation(
     )
 
 
+async def _read_pcm_body(request: Request) -> memoryview:
+    """Read a raw PCM request body without intermediate copies.
+
+    With a Content-Length header the body is streamed into one
+    preallocated buffer; otherwise chunks are appended as they arrive.
+    A trailing odd byte (half a sample) is dropped.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        if not content_length.isascii() or not content_length.isdigit():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid Content-Length",
+            )
+        content_length = int(content_length)
+        if content_length > MAX_UTTERANCE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Audio too long",
+            )
+
+    if content_length is not None:
+        buffer = bytearray(content_length)
+        view = memoryview(buffer)
+        size = 0
+        async for chunk in request.stream():
+            if size + len(chunk) > len(buffer):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Body longer than Content-Length",
+                )
+            view[size:size + len(chunk)] = chunk
+            size += len(chunk)
+    else:
+        buffer = bytearray()
+        async for chunk in request.stream():
+            buffer.extend(chunk)
+            if len(buffer) > MAX_UTTERANCE_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Audio too long",
+                )
+        view = memoryview(buffer)
+        size = len(buffer)
+
+    return view[:size - size % 2]
+
+
+@router.post(
+    "/conversation/audio",
+    response_class=StreamingResponse,
+    responses={200: {"content": {
+        media_type: {} for media_type in sorted(
+            {profile.media_type for profile in AUDIO_PROFILES.values()})
+    }}},
+)
+async def conversation_audio(
+    request: Request,
+    session_id: str,
+    language: str = "sv",
+    sample_rate: int = 16000,
+    audio_profile: Optional[str] = None,
+    device: TokenData = Depends(get_current_device),
+) -> StreamingResponse:
+    """Process a raw PCM upload and stream back the spoken response.
+
+    The body is ``application/octet-stream`` 16-bit mono PCM, avoiding the
+    base64 overhead of ``/conversation``. The transcript is returned in the
+    percent-encoded ``X-Transcript`` header. ``audio_profile`` selects the
+    response format (e.g. ``mp3-16k``, ``pcm-16k``, ``opus-16k``).
+    """
+    try:
+        profile = get_audio_profile(audio_profile)
+    except AudioFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    audio = await _read_pcm_body(request)
+
+    events = conversation_pipeline.run(
+        audio,
+        session_id=session_id,
+        device_id=device.device_id,
+        sample_rate=sample_rate,
+        language=language,
+        audio_profile=profile,
+    )
+    transcript = await events.__anext__()
+
+    async def audio_stream():
+        async for event in events:
+            if event.type == PipelineEventType.AUDIO:
+                yield event.audio
+
+    return StreamingResponse(
+        audio_stream(),
+        media_type=(profile or EDGE_AUDIO).media_type,
+        headers={
+            "X-Session-Id": session_id,
+            "X-Transcript": quote(transcript.text or ""),
+        },
+    )
+
+
+@router.websocket("/conversation/stream")
+async def conversation_stream(
+    websocket: WebSocket,
+    session_id: str,
+    language: str = "sv",
+    sample_rate: int = 16000,
+    audio_profile: Optional[str] = None,
+    device: TokenData = Depends(get_websocket_device),
+) -> None:
+    """Full-duplex conversation: PCM audio in, TTS audio out.
+
+    Protocol (one or more turns per connection):
+    - Client sends binary frames of 16-bit mono PCM while the child speaks
+    - Client sends ``{"type": "end"}`` when the utterance is finished
+    - Server replies with ``{"type": "transcript", ...}``, then binary
+      audio frames as soon as the first sentence is synthesized, then
+      ``{"type": "response", ...}`` once the turn is complete
+    - If a turn fails the server sends ``{"type": "error", ...}`` instead
+      and the connection stays open for the next turn
+
+    Audio frames use the ``audio_profile`` format (default Edge's MP3).
+    """
+    try:
+        profile = get_audio_profile(audio_profile)
+    except AudioFormatError as e:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+
+    await websocket.accept()
+    audio = bytearray()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            if message.get("bytes") is not None:
+                audio.extend(message["bytes"])
+                if len(audio) > MAX_UTTERANCE_BYTES:
+                    await websocket.send_json({
+                        "type": "error",
+                        **ErrorResponse(
+                            error_code="AUDIO_TOO_LONG",
+                            error_message="That was a long one! Can you say it shorter?",
+                        ).model_dump(),
+                    })
+                    audio = bytearray()
+                continue
+
+            try:
+                control = json.loads(message.get("text") or "{}")
+            except json.JSONDecodeError:
+                control = {}
+            if control.get("type") != "end":
+                continue
+
+            try:
+                async for event in conversation_pipeline.run(
+                    memoryview(audio),
+                    session_id=session_id,
+                    device_id=device.device_id,
+                    sample_rate=sample_rate,
+                    language=language,
+                    audio_profile=profile,
+                ):
+                    if event.type == PipelineEventType.AUDIO:
+                        await websocket.send_bytes(event.audio)
+                    elif event.type == PipelineEventType.TRANSCRIPT:
+                        await websocket.send_json(
+                            {"type": "transcript", "text": event.text})
+                    else:
+                        await websocket.send_json({
+                            "type": "response",
+                            "text": event.text,
+                            "intent": event.intent.value,
+                        })
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                # A failed turn ends that turn only; the toy can try again
+                logger.error(
+                    f"Conversation turn failed for session {session_id}: {e}",
+                    exc_info=True,
+                )
+                await websocket.send_json({
+                    "type": "error",
+                    **ErrorResponse(
+                        error_code="TURN_FAILED",
+                        error_message="Oops! Something went wrong. Can you say that again?",
+                    ).model_dump(),
+                })
+            finally:
+                audio = bytearray()
+
+    except WebSocketDisconnect:
+        logger.info(f"Conversation stream closed for session {session_id}")
+
+
 @router.get("/weather", response_model=WeatherData)
 async def get_weather(
     location: str = "Stockholm",
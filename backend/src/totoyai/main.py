@@ -1,11 +1,21 @@
 """FastAPI application entry point."""
 
+import asyncio
 import logging
+import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from totoyai.api.errors import setup_error_handlers
 from totoyai.api.routes import router
+from totoyai.services.context_store import context_store
+from totoyai.services.conversation_context import conversation_manager
+from totoyai.services.device_registry import device_registry
+from totoyai.services.groq_service import groq_service
+from totoyai.services.stt import stt_service
+from totoyai.services.tts import tts_service
+from totoyai.services.warmup import warmup_service
 
 # Configure logging
 logging.basicConfig(
@@ -13,10 +23,38 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up services in the background and clean up on shutdown.
+
+    Warm-up runs as a task so /api/v1/health answers immediately while
+    /api/v1/ready reports 503 until the first request would be fast.
+    """
+    conversation_manager.start()
+    warmup_task = None
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        warmup_task = asyncio.create_task(warmup_service.run())
+    else:
+        warmup_service.mark_ready()
+
+    yield
+
+    if warmup_task is not None:
+        warmup_task.cancel()
+    stt_service.shutdown()
+    await groq_service.aclose()
+    await tts_service.aclose()
+    await context_store.aclose()
+    await device_registry.aclose()
+    await conversation_manager.stop()
+
+
 app = FastAPI(
     title="ToToyAI",
     description="AI-powered plush toy backend services",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(router)
@@ -1,5 +1,6 @@
 """Pydantic data models."""
 
+from totoyai.models.audio import AudioCodec, AudioProfile
 from totoyai.models.conversation import (
     ConversationRequest,
     ConversationResponse,
@@ -11,6 +12,8 @@ from totoyai.models.device import Device, DeviceAuth, DeviceTokens
 from totoyai.models.weather import WeatherData
 
 __all__ = [
+    "AudioCodec",
+    "AudioProfile",
     "ConversationRequest",
     "ConversationResponse",
     "Intent",
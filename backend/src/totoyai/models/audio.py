@@ -0,0 +1,44 @@
+"""Audio output format models."""
+
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class AudioCodec(str, Enum):
+    """Audio encodings a toy can play back."""
+
+    MP3 = "mp3"
+    PCM = "pcm"  # Raw 16-bit little-endian mono
+    OPUS = "opus"  # Ogg Opus
+
+
+MEDIA_TYPES = {
+    AudioCodec.MP3: "audio/mpeg",
+    AudioCodec.PCM: "application/octet-stream",
+    AudioCodec.OPUS: "audio/ogg",
+}
+
+
+class AudioProfile(BaseModel):
+    """Audio format a device wants its responses in."""
+
+    name: str = Field(..., description="Profile name, e.g. 'mp3-16k'")
+    codec: AudioCodec
+    sample_rate: int = Field(..., description="Output sample rate in Hz")
+    bitrate_kbps: Optional[int] = Field(
+        None, description="Target bitrate for compressed codecs")
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.codec]
+
+    def matches(self, other: "AudioProfile") -> bool:
+        """Check whether two profiles describe the same encoded audio."""
+        return (
+            self.codec == other.codec
+            and self.sample_rate == other.sample_rate
+            and (self.codec == AudioCodec.PCM
+                 or self.bitrate_kbps == other.bitrate_kbps)
+        )
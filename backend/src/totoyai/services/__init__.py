@@ -6,16 +6,27 @@ New features inspired by XiaoGPT:
 - Streaming TTS
 """
 
-from totoyai.services.session import SessionManager, session_manager
 from totoyai.services.conversation_context import (
     ConversationContext,
     ConversationContextManager,
     conversation_manager,
 )
+from totoyai.services.context_store import (
+    ContextStore,
+    InMemoryContextStore,
+    RedisContextStore,
+    context_store,
+)
+from totoyai.services.device_registry import (
+    DeviceRegistry,
+    DeviceRegistryBusy,
+    device_registry,
+)
 from totoyai.services.llm_fallback import (
     LLMFallbackService,
     LLMProvider,
     LLMResult,
+    LLMStreamResult,
     llm_fallback_service,
 )
 from totoyai.services.streaming_tts import (
@@ -23,6 +34,12 @@ from totoyai.services.streaming_tts import (
     AudioChunkBuffer,
     streaming_tts_service,
 )
+from totoyai.services.conversation_pipeline import (
+    ConversationPipeline,
+    PipelineEvent,
+    PipelineEventType,
+    conversation_pipeline,
+)
 from totoyai.services.groq_service import groq_service, GroqService
 from totoyai.services.gemini import gemini_service, GeminiService
 from totoyai.services.tts import tts_service, TTSService
@@ -35,22 +52,34 @@ from totoyai.services.story_library import (
 )
 
 __all__ = [
-    # Session management
-    "SessionManager",
-    "session_manager",
     # Conversation context (NEW)
     "ConversationContext",
     "ConversationContextManager",
     "conversation_manager",
+    # Context store
+    "ContextStore",
+    "InMemoryContextStore",
+    "RedisContextStore",
+    "context_store",
+    # Device registry
+    "DeviceRegistry",
+    "DeviceRegistryBusy",
+    "device_registry",
     # LLM fallback (NEW)
     "LLMFallbackService",
     "LLMProvider",
     "LLMResult",
+    "LLMStreamResult",
     "llm_fallback_service",
     # Streaming TTS (NEW)
     "StreamingTTSService",
     "AudioChunkBuffer",
     "streaming_tts_service",
+    # Conversation pipeline
+    "ConversationPipeline",
+    "PipelineEvent",
+    "PipelineEventType",
+    "conversation_pipeline",
     # LLM services
     "groq_service",
     "GroqService",
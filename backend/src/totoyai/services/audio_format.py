@@ -0,0 +1,231 @@
+"""Device audio profiles and transcoding of TTS output.
+
+Toys ask for the format they decode most cheaply (e.g. 16 kHz MP3 at a
+low bitrate, raw PCM or Opus). When the provider already produces that
+format the audio is passed through untouched; otherwise it is streamed
+through an ``ffmpeg`` subprocess while synthesis is still running.
+
+Each ``transcode`` call starts its own ffmpeg process and produces one
+complete stream. Joining the output of separate calls gives
+concatenated streams: harmless for PCM and MP3 (a sequence of frames),
+but chained Ogg streams for Opus, which many small decoders reject. A
+response should therefore be converted with a single call.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+from totoyai.models.audio import AudioCodec, AudioProfile
+
+logger = logging.getLogger(__name__)
+
+# What Edge TTS returns (it does not offer other output formats)
+EDGE_AUDIO = AudioProfile(
+    name="mp3-24k", codec=AudioCodec.MP3, sample_rate=24000, bitrate_kbps=48)
+
+# Profiles devices can request via the ``audio_profile`` parameter
+AUDIO_PROFILES: dict[str, AudioProfile] = {
+    profile.name: profile
+    for profile in [
+        EDGE_AUDIO,
+        AudioProfile(name="mp3-16k", codec=AudioCodec.MP3,
+                     sample_rate=16000, bitrate_kbps=32),
+        AudioProfile(name="mp3-16k-low", codec=AudioCodec.MP3,
+                     sample_rate=16000, bitrate_kbps=24),
+        AudioProfile(name="pcm-16k", codec=AudioCodec.PCM, sample_rate=16000),
+        AudioProfile(name="pcm-22k", codec=AudioCodec.PCM, sample_rate=22050),
+        AudioProfile(name="opus-16k", codec=AudioCodec.OPUS,
+                     sample_rate=16000, bitrate_kbps=24),
+    ]
+}
+
+CHUNK_SIZE = 4096
+
+
+# MP3 bitrates (kbps) by bitrate index, keyed by (is MPEG-1, layer)
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_MP3_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+ID3_HEADER_SIZE = 10
+MP3_HEADER_SIZE = 4
+
+
+def mp3_unit_length(data, pos: int) -> Optional[int]:
+    """Length of the MP3 frame or ID3v2 tag starting at ``pos``.
+
+    Args:
+        data: Buffer holding MP3 data
+        pos: Offset of a possible frame or tag header
+
+    Returns:
+        The unit's length in bytes, 0 if ``pos`` is not the start of a
+        frame or tag, or None if more data is needed to tell
+    """
+    available = len(data) - pos
+    if available < MP3_HEADER_SIZE:
+        return None
+
+    if data[pos] == 0x49 and data[pos + 1] == 0x44 and data[pos + 2] == 0x33:  # "ID3"
+        if available < ID3_HEADER_SIZE:
+            return None
+        size = 0
+        for i in range(pos + 6, pos + 10):  # Syncsafe 7 bits per byte
+            size = (size << 7) | (data[i] & 0x7F)
+        footer = ID3_HEADER_SIZE if data[pos + 5] & 0x10 else 0
+        return ID3_HEADER_SIZE + size + footer
+
+    b1, b2 = data[pos + 1], data[pos + 2]
+    if data[pos] != 0xFF or b1 & 0xE0 != 0xE0:
+        return 0
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)  # 1, 2 or 3 (4 = reserved)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x01
+
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+class AudioFormatError(Exception):
+    """Unknown audio profile or transcoding failure."""
+
+    pass
+
+
+def get_audio_profile(name: Optional[str]) -> Optional[AudioProfile]:
+    """Look up a profile by name (None means provider-native audio).
+
+    Raises:
+        AudioFormatError: If the profile does not exist
+    """
+    if name is None:
+        return None
+    try:
+        return AUDIO_PROFILES[name]
+    except KeyError:
+        raise AudioFormatError(
+            f"Unknown audio profile '{name}' "
+            f"(available: {', '.join(AUDIO_PROFILES)})"
+        )
+
+
+def pcm_profile(sample_rate: int) -> AudioProfile:
+    """Describe raw 16-bit mono PCM at a sample rate (e.g. Piper output)."""
+    return AudioProfile(
+        name=f"pcm-{sample_rate}", codec=AudioCodec.PCM, sample_rate=sample_rate)
+
+
+def _ffmpeg_args(source: AudioProfile, target: AudioProfile) -> list[str]:
+    """Build the ffmpeg command line for one conversion."""
+    args = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+
+    if source.codec == AudioCodec.PCM:
+        args += ["-f", "s16le", "-ar", str(source.sample_rate), "-ac", "1"]
+    elif source.codec == AudioCodec.MP3:
+        args += ["-f", "mp3"]
+    else:
+        args += ["-f", "ogg"]
+    args += ["-i", "pipe:0", "-ac", "1", "-ar", str(target.sample_rate)]
+
+    if target.codec == AudioCodec.PCM:
+        args += ["-f", "s16le", "-c:a", "pcm_s16le"]
+    elif target.codec == AudioCodec.MP3:
+        args += ["-f", "mp3", "-c:a", "libmp3lame", "-b:a", f"{target.bitrate_kbps}k"]
+    else:
+        args += [
+            "-f", "ogg", "-c:a", "libopus", "-b:a", f"{target.bitrate_kbps}k",
+            "-application", "voip",
+            # Short pages: input may pause between sentences of a response
+            "-page_duration", "100000",
+        ]
+    # Write packets as they are encoded rather than when the buffer fills
+    return args + ["-flush_packets", "1", "pipe:1"]
+
+
+async def transcode(
+    chunks: AsyncIterator[bytes],
+    source: AudioProfile,
+    target: Optional[AudioProfile],
+) -> AsyncIterator[bytes]:
+    """Convert an audio stream to the target profile.
+
+    Audio already in the target format (or with no target) is passed
+    through. Otherwise input is fed to ffmpeg as it arrives and output
+    is yielded as ffmpeg produces it.
+
+    Args:
+        chunks: Audio stream in the source format
+        source: Format of the incoming audio
+        target: Requested format (None = keep source format)
+
+    Yields:
+        Audio chunks in the target format
+
+    Raises:
+        AudioFormatError: If ffmpeg is missing or fails
+    """
+    if target is None or source.matches(target):
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *_ffmpeg_args(source, target),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise AudioFormatError("ffmpeg is not installed")
+
+    async def feed() -> None:
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            data = await process.stdout.read(CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+
+        # Surface synthesis errors from the input stream
+        await feeder
+        stderr = await process.stderr.read()
+        if await process.wait() != 0:
+            raise AudioFormatError(
+                f"ffmpeg failed: {stderr.decode(errors='replace').strip()}")
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
@@ -1,11 +1,13 @@
 """Authentication service for device JWT tokens."""
 
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 # Configuration - loaded from environment
 import os
@@ -14,6 +16,7 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 30
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -21,10 +24,133 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 class TokenData(BaseModel):
     """Decoded token data."""
 
+    # Shared between requests by the token cache
+    model_config = ConfigDict(frozen=True)
+
     device_id: str
     exp: datetime
 
 
+class TokenCache:
+    """Bounded cache of verified tokens.
+
+    A toy reuses its access token for every request until it expires,
+    so the signature check and claim parsing are done once per token.
+    Entries expire at the token's own ``exp``. Revoked tokens (and
+    tokens of revoked devices) are rejected until they would have
+    expired anyway.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        """Initialize cache.
+
+        Args:
+            max_size: Maximum cached tokens (least recently used evicted)
+        """
+        self.max_size = max_size
+        # token -> (claims, exp timestamp, issued-at timestamp or None)
+        self._entries: OrderedDict[str, tuple[TokenData, float, Optional[float]]] = (
+            OrderedDict())
+        # Denylist: token -> exp timestamp
+        self._revoked: dict[str, float] = {}
+        # device_id -> second before which its tokens are rejected
+        self._revoked_devices: dict[str, int] = {}
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._rejected = 0
+
+    def get(self, token: str) -> Optional[TokenData]:
+        """Return cached claims, or None if not cached or expired."""
+        entry = self._entries.get(token)
+        if entry is None:
+            self._misses += 1
+            return None
+        token_data, exp, _ = entry
+        if time.time() >= exp:
+            del self._entries[token]
+            self._misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self._hits += 1
+        return token_data
+
+    def put(
+        self,
+        token: str,
+        token_data: TokenData,
+        exp: float,
+        issued_at: Optional[float],
+    ) -> None:
+        """Cache verified claims until the token expires."""
+        if self.max_size <= 0:
+            return
+        self._entries[token] = (token_data, exp, issued_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def is_revoked(self, token: str, device_id: str, issued_at: Optional[float]) -> bool:
+        """Check the denylists for a verified token."""
+        revoked = token in self._revoked
+        revoked_before = self._revoked_devices.get(device_id)
+        if revoked_before is not None and (issued_at is None or issued_at < revoked_before):
+            revoked = True
+        if revoked:
+            self._rejected += 1
+        return revoked
+
+    def revoke(self, token: str) -> None:
+        """Reject a token from now until it expires."""
+        exp = time.time() + REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        try:
+            claims = jwt.get_unverified_claims(token)
+            exp = float(claims.get("exp", exp))
+        except JWTError:
+            pass
+        self._entries.pop(token, None)
+        self._revoked[token] = exp
+        self._purge_revoked()
+
+    def revoke_device(self, device_id: str) -> None:
+        """Reject every token issued to a device before the current second.
+
+        ``iat`` has whole-second resolution, so a token issued in the
+        same second as the revocation is still accepted: it may be the
+        device's fresh login.
+        """
+        self._revoked_devices[device_id] = int(time.time())
+        for token in [t for t, entry in self._entries.items()
+                      if entry[0].device_id == device_id]:
+            del self._entries[token]
+
+    def _purge_revoked(self) -> None:
+        """Forget denylist entries for tokens that have expired anyway."""
+        now = time.time()
+        for token in [t for t, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[token]
+        horizon = now - REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        for device_id in [d for d, at in self._revoked_devices.items() if at <= horizon]:
+            del self._revoked_devices[device_id]
+
+    def get_metrics(self) -> dict:
+        """Get cache metrics."""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / (lookups or 1), 3),
+            "rejected_revoked": self._rejected,
+            "revoked_tokens": len(self._revoked),
+            "revoked_devices": len(self._revoked_devices),
+        }
+
+
+token_cache = TokenCache()
+
+
 def hash_secret(secret: str) -> str:
     """Hash a device secret."""
     return pwd_context.hash(secret)
@@ -37,26 +163,41 @@ def verify_secret(plain_secret: str, hashed_secret: str) -> bool:
 
 def create_access_token(device_id: str) -> str:
     """Create a JWT access token for a device."""
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"device_id": device_id, "exp": expire, "type": "access"}
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode = {"device_id": device_id, "exp": expire, "iat": now, "type": "access"}
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
 def create_refresh_token(device_id: str) -> str:
     """Create a JWT refresh token for a device."""
-    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {"device_id": device_id, "exp": expire, "type": "refresh"}
+    now = datetime.utcnow()
+    expire = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = {"device_id": device_id, "exp": expire, "iat": now, "type": "refresh"}
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
 def verify_token(token: str) -> Optional[TokenData]:
-    """Verify and decode a JWT token."""
+    """Verify and decode a JWT token.
+
+    Verified tokens are cached (see TokenCache), so repeat requests with
+    the same token skip decoding and the signature check.
+    """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         device_id: str = payload.get("device_id")
         exp: int = payload.get("exp")
         if device_id is None:
             return None
-        return TokenData(device_id=device_id, exp=datetime.fromtimestamp(exp))
+        issued_at = payload.get("iat")
+        if token_cache.is_revoked(token, device_id, issued_at):
+            return None
+        token_data = TokenData(device_id=device_id, exp=datetime.fromtimestamp(exp))
+        token_cache.put(token, token_data, float(exp), issued_at)
+        return token_data
     except JWTError:
         return None
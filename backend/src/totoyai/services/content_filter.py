@@ -1,33 +1,247 @@
-"""Content filtering for child safety."""
+"""Content filtering for child safety.
+
+Blocked words are listed per language and category in LEXICON. Each
+language's words are compiled into a single prefix-tree regex, so one
+scan finds every match together with its category and position. It is cheap
+enough to run on every transcript and every streamed LLM chunk.
+
+StreamingContentFilter applies the same filter to text arriving in
+pieces (LLM deltas), releasing text as soon as it is known to be safe.
+
+Swedish children mix in English words, so the Swedish filter includes
+the English list too, except for words that are harmless in Swedish
+(``sex`` is "six", Gun is a name).
+"""
 
 import logging
 import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
 
 logger = logging.getLogger(__name__)
 
-INAPPROPRIATE_PATTERNS = [
-    r"\b(kill|murder|death|die|blood|weapon|gun|knife)\b",
-    r"\b(hate|stupid|idiot|dumb)\b",
-    r"\b(sex|porn|nude)\b",
-    r"\b(drug|alcohol|beer|wine)\b",
-]
+# language -> category -> blocked words (matched whole, case-insensitive)
+LEXICON: dict[str, dict[str, tuple[str, ...]]] = {
+    "en": {
+        "violence": (
+            "kill", "murder", "death", "die", "blood", "weapon", "gun", "knife",
+        ),
+        "insult": ("hate", "stupid", "idiot", "dumb"),
+        "sexual": ("sex", "porn", "nude"),
+        "substances": ("drug", "alcohol", "beer", "wine"),
+    },
+    "sv": {
+        "violence": (
+            "döda", "dödar", "dödade", "mörda", "mördar", "mördade", "mord",
+            "död", "döden", "dö", "blod", "vapen", "pistol", "gevär", "kniv",
+        ),
+        "insult": (
+            "hata", "hatar", "dum", "dumma", "dumt", "idiot", "korkad", "korkade",
+        ),
+        "sexual": ("porr", "naken", "nakna"),
+        "substances": (
+            "droger", "knark", "alkohol", "öl", "vin", "sprit",
+        ),
+    },
+}
+
+# Languages whose words are also blocked in another language's text
+BORROWED: dict[str, tuple[str, ...]] = {"sv": ("en",)}
+
+# Borrowed words that are harmless in the borrowing language
+ALLOWED: dict[str, frozenset[str]] = {"sv": frozenset({"sex", "gun"})}
+
+REDIRECT_PHRASES = {
+    "en": "Let's talk about something fun and happy instead!",
+    "sv": "Vi pratar om något roligt och glatt i stället!",
+}
+
+
+class ContentMatch(NamedTuple):
+    """A blocked word found in text."""
+
+    category: str
+    term: str
+    start: int
+    end: int
+
+
+def _trie_pattern(words: set[str]) -> str:
+    """Regex alternation of words, factored by shared prefixes.
+
+    A flat ``a|b|c`` alternation makes the regex engine try every word
+    at every position; a prefix tree branches on one character at a
+    time, so the cost barely grows with the size of the lexicon.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        ends_here = "" in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if ends_here:
+            # Shorter word ends here; try the longer ones first
+            return f"(?:{'|'.join(branches)})?"
+        if len(branches) == 1:
+            return branches[0]
+        return f"(?:{'|'.join(branches)})"
+
+    return build(trie)
+
+
+class ContentFilter:
+    """Finds blocked words from a category -> words lexicon in one scan."""
+
+    def __init__(self, lexicon: dict[str, set[str]]):
+        """Compile the lexicon into a single pattern.
+
+        Args:
+            lexicon: Category -> blocked words
+        """
+        self.categories = {
+            word.casefold(): category
+            for category, words in lexicon.items() for word in words
+        }
+        self.pattern = re.compile(
+            rf"\b{_trie_pattern(set(self.categories))}\b", re.IGNORECASE)
+        # Everything a blocked word can start with, for text in pieces
+        self.prefixes = {
+            word[:end] for word in self.categories for end in range(1, len(word))}
+
+    def _match(self, m: re.Match) -> ContentMatch:
+        term = m.group()
+        return ContentMatch(self.categories[term.casefold()], term, m.start(), m.end())
+
+    def find(self, text: str) -> list[ContentMatch]:
+        """Return every blocked word in text, in order."""
+        return [self._match(m) for m in self.pattern.finditer(text)]
 
-COMPILED_PATTERNS = [re.compile(pattern, re.IGNORECASE)
-                     for pattern in INAPPROPRIATE_PATTERNS]
+    def search(self, text: str) -> Optional[ContentMatch]:
+        """Return the first blocked word in text, if any."""
+        m = self.pattern.search(text)
+        return None if m is None else self._match(m)
 
 
-def contains_inappropriate_content(text: str) -> bool:
+# Trailing run of word characters (as matched by \\b in the filters)
+_TRAILING_WORD = re.compile(r"\w*\Z")
+
+
+class StreamingContentFilter:
+    """Checks text that arrives in pieces, e.g. LLM token deltas.
+
+    Text is released as soon as no later piece can turn it into a
+    blocked word. Only an unfinished trailing word that could still
+    become one is held back ("dö" might grow into "döda"; "dra" cannot
+    grow into anything blocked). After a match nothing more is
+    released and ``match`` holds what was found.
+    """
+
+    def __init__(self, language: Optional[str] = None):
+        """Initialize filter for a response language."""
+        self.filter = get_content_filter(language)
+        self.match: Optional[ContentMatch] = None
+        self._pending = ""
+        # Last released character, so word boundaries are seen correctly
+        self._context = ""
+        self._released = 0
+
+    def feed(self, delta: str) -> str:
+        """Add text; return the part that is now known to be safe."""
+        if self.match is not None:
+            return ""
+        text = self._pending + delta
+
+        # Words before the trailing one are complete and can be checked
+        tail_start = _TRAILING_WORD.search(text).start()
+        if self._check(text[:tail_start]):
+            return ""
+
+        tail = text[tail_start:]
+        continues_released_word = tail_start == 0 and (
+            self._context.isalnum() or self._context == "_")
+        if tail and not continues_released_word and (
+            tail.casefold() in self.filter.prefixes
+            or tail.casefold() in self.filter.categories
+        ):
+            return self._release(text, tail_start)
+        return self._release(text, len(text))
+
+    def flush(self) -> str:
+        """End of text: check and return whatever was held back."""
+        if self.match is not None or self._check(self._pending):
+            return ""
+        return self._release(self._pending, len(self._pending))
+
+    def _check(self, text: str) -> bool:
+        if not text:
+            return False
+        m = self.filter.pattern.search(self._context + text, len(self._context))
+        if m is None:
+            return False
+        offset = self._released - len(self._context)
+        self.match = ContentMatch(
+            self.filter.categories[m.group().casefold()],
+            m.group(), m.start() + offset, m.end() + offset)
+        self._pending = ""
+        logger.warning("Inappropriate content in stream: %s", self.match.category)
+        return True
+
+    def _release(self, text: str, end: int) -> str:
+        released, self._pending = text[:end], text[end:]
+        if released:
+            self._context = released[-1]
+            self._released += len(released)
+        return released
+
+
+@lru_cache(maxsize=None)
+def get_content_filter(language: Optional[str] = None) -> ContentFilter:
+    """Get the filter for a language (None: every language's words)."""
+    if language is None or language not in LEXICON:
+        languages = tuple(LEXICON)
+    else:
+        languages = (language,) + BORROWED.get(language, ())
+    allowed = ALLOWED.get(language, frozenset())
+
+    lexicon: dict[str, set[str]] = {}
+    for lang in languages:
+        for category, words in LEXICON[lang].items():
+            lexicon.setdefault(category, set()).update(
+                word for word in words if word not in allowed)
+    return ContentFilter(lexicon)
+
+
+def find_inappropriate_content(
+    text: str,
+    language: Optional[str] = None,
+) -> list[ContentMatch]:
+    """Find every word in text inappropriate for children."""
+    return get_content_filter(language).find(text)
+
+
+def contains_inappropriate_content(text: str, language: Optional[str] = None) -> bool:
     """Check if text contains inappropriate content for children."""
-    for pattern in COMPILED_PATTERNS:
-        if pattern.search(text):
-            logger.warning(
-                f"Inappropriate content detected: {pattern.pattern}")
-            return True
+    match = get_content_filter(language).search(text)
+    if match is not None:
+        logger.warning("Inappropriate content detected: %s", match.category)
+        return True
     return False
 
 
-def filter_content(text: str) -> str:
+def get_redirect_phrase(language: Optional[str] = None) -> str:
+    """Kind phrase steering the conversation somewhere else."""
+    return REDIRECT_PHRASES.get(language, REDIRECT_PHRASES["en"])
+
+
+def filter_content(text: str, language: Optional[str] = None) -> str:
     """Filter inappropriate content from text."""
-    if contains_inappropriate_content(text):
-        return "Let's talk about something fun and happy instead!"
+    if contains_inappropriate_content(text, language):
+        return get_redirect_phrase(language)
     return text
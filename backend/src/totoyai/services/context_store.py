@@ -0,0 +1,715 @@
+"""Pluggable storage for conversation contexts.
+
+The single store for session state. The pipeline loads a
+ConversationContext at the start of a turn and saves it at the end;
+the session API (get_context, create_session, update_context, ...)
+offers the same data as SessionContext models. Two backends implement
+the same interface:
+
+- ``memory``: ConversationContextManager, for development and tests
+- ``redis``: shared by all workers and surviving restarts, so uvicorn
+  can run with ``--workers`` > 1 without losing conversation memory
+
+Select with ``CONTEXT_STORE``. The Redis backend can batch writes
+(``CONTEXT_STORE_WRITE_BEHIND_MS``): saves are queued and sent for all
+sessions in one round trip. It also caches contexts in
+process, kept coherent across workers via pub/sub.
+"""
+
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import time
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+import redis.asyncio as redis
+
+from totoyai.models import Message, SessionContext
+from totoyai.services.conversation_context import (
+    ConversationContext,
+    ConversationContextManager,
+    ConversationTurn,
+    conversation_manager,
+)
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_EXPIRE_MINUTES = 30
+# Wait before retrying a failed write of queued saves
+FLUSH_RETRY_SECONDS = 1.0
+
+# In-process cache of contexts (Redis backend)
+CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", "1024"))
+# Upper bound on staleness should an invalidation ever be missed
+CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "60"))
+INVALIDATION_CHANNEL = "context:invalidate"
+
+# Scalar ConversationContext fields stored in the Redis hash
+_INT_FIELDS = ("max_turns", "child_age")
+_STR_FIELDS = (
+    "session_id", "device_id", "child_name", "preferred_language",
+    "current_story", "current_topic",
+)
+_DATETIME_FIELDS = ("created_at", "last_activity")
+
+
+def _session_view(context: ConversationContext) -> SessionContext:
+    """Context as the SessionContext model of the session API."""
+    return SessionContext(
+        session_id=context.session_id,
+        device_id=context.device_id,
+        messages=[
+            Message(role=turn.role, content=turn.content, timestamp=turn.timestamp)
+            for turn in context.history
+        ],
+        current_story=context.current_story,
+        created_at=context.created_at,
+        expires_at=context.last_activity + timedelta(minutes=CONTEXT_EXPIRE_MINUTES),
+    )
+
+
+class ContextStore(ABC):
+    """Loads and saves conversation contexts."""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[ConversationContext]:
+        """Get the session's context, or None if missing or expired."""
+
+    @abstractmethod
+    async def get_or_create(
+        self,
+        session_id: str,
+        device_id: str,
+        language: str = "sv",
+    ) -> ConversationContext:
+        """Get the session's context, or a new one if missing or expired."""
+
+    @abstractmethod
+    async def save(self, context: ConversationContext) -> None:
+        """Persist turns added and fields changed since the last save."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Delete a session's context."""
+
+    async def aclose(self) -> None:
+        """Flush pending writes and release connections."""
+
+    def get_metrics(self) -> dict:
+        """Get store metrics."""
+        return {}
+
+    # Session API: the same contexts as SessionContext models
+
+    async def get_context(self, session_id: str) -> Optional[SessionContext]:
+        """Get a session, or None if missing or expired."""
+        context = await self.get(session_id)
+        return None if context is None else _session_view(context)
+
+    async def create_session(self, session_id: str, device_id: str) -> SessionContext:
+        """Start a session, replacing any existing one."""
+        await self.delete(session_id)
+        context = await self.get_or_create(session_id, device_id)
+        await self.save(context)
+        return _session_view(context)
+
+    async def update_context(
+        self,
+        session_id: str,
+        user_input: str,
+        assistant_response: str,
+    ) -> bool:
+        """Add a user/assistant exchange to a session.
+
+        Returns:
+            False if the session does not exist (or has expired)
+        """
+        context = await self.get(session_id)
+        if context is None:
+            return False
+        context.add_user_message(user_input)
+        context.add_assistant_message(assistant_response)
+        await self.save(context)
+        return True
+
+    async def set_story_context(self, session_id: str, story_content: str) -> bool:
+        """Store current story in session for continuation.
+
+        Returns:
+            False if the session does not exist (or has expired)
+        """
+        context = await self.get(session_id)
+        if context is None:
+            return False
+        context.current_story = story_content
+        await self.save(context)
+        return True
+
+    async def clear_session(self, session_id: str) -> None:
+        """Delete a session."""
+        await self.delete(session_id)
+
+
+class InMemoryContextStore(ContextStore):
+    """Process-local store backed by ConversationContextManager."""
+
+    def __init__(self, manager: ConversationContextManager = conversation_manager):
+        """Initialize store with the context manager holding contexts."""
+        self.manager = manager
+
+    async def get(self, session_id: str) -> Optional[ConversationContext]:
+        context = self.manager.get(session_id)
+        if context is None or context.is_expired(self.manager.timeout_minutes):
+            return None
+        return context
+
+    async def get_or_create(
+        self,
+        session_id: str,
+        device_id: str,
+        language: str = "sv",
+    ) -> ConversationContext:
+        return self.manager.get_or_create(session_id, device_id, language)
+
+    async def save(self, context: ConversationContext) -> None:
+        # Contexts are live objects in the manager; nothing to write
+        pass
+
+    async def delete(self, session_id: str) -> None:
+        self.manager.delete(session_id)
+
+    def get_metrics(self) -> dict:
+        return {"backend": "memory"}
+
+
+def _encode_turn(turn: ConversationTurn) -> str:
+    return json.dumps({
+        "role": turn.role,
+        "content": turn.content,
+        "timestamp": turn.timestamp.isoformat(),
+        "intent": turn.intent,
+    }, ensure_ascii=False)
+
+
+def _decode_turn(data: str) -> ConversationTurn:
+    fields = json.loads(data)
+    return ConversationTurn(
+        role=fields["role"],
+        content=fields["content"],
+        timestamp=datetime.fromisoformat(fields["timestamp"]),
+        intent=fields.get("intent"),
+    )
+
+
+class _SaveState(NamedTuple):
+    """What the store has written for one context object."""
+
+    last_turn: Optional[ConversationTurn]  # Newest turn already saved
+    replace: bool  # Nothing stored yet: replace whatever is in Redis
+    version: int  # Stored version the context was loaded at
+
+
+class _PendingWrite(NamedTuple):
+    """A session's saves queued for the next flush."""
+
+    fields: dict
+    turns: list[str]
+    replace: bool
+    max_turns: int
+    # Stored version the write builds on; another value means it raced
+    base_version: int
+    # Copy of the context as saved, cached once written
+    snapshot: ConversationContext
+
+
+# Writes a batch of saves atomically. KEYS are each session's context
+# and turns keys; ARGV is the TTL, the invalidation channel, the
+# publisher prefix ("" = don't publish) and one JSON write per session.
+# Appending to a context that has expired or been deleted since it was
+# loaded would recreate a fragment of it, so such writes are skipped.
+# Returns each session's new version, or -1 if it was skipped.
+_WRITE_SCRIPT = """
+local ttl = tonumber(ARGV[1])
+local channel = ARGV[2]
+local publisher = ARGV[3]
+local versions = {}
+for i = 1, #KEYS / 2 do
+    local context_key = KEYS[2 * i - 1]
+    local turns_key = KEYS[2 * i]
+    local write = cjson.decode(ARGV[i + 3])
+    if write.replace then
+        redis.call('DEL', context_key, turns_key)
+    elseif redis.call('EXISTS', context_key) == 0 then
+        versions[i] = -1
+    end
+    if versions[i] == nil then
+        if #write.unset > 0 then
+            redis.call('HDEL', context_key, unpack(write.unset))
+        end
+        local fields = {}
+        for name, value in pairs(write.fields) do
+            fields[#fields + 1] = name
+            fields[#fields + 1] = value
+        end
+        redis.call('HSET', context_key, unpack(fields))
+        versions[i] = redis.call('HINCRBY', context_key, 'version', 1)
+        if #write.turns > 0 then
+            redis.call('RPUSH', turns_key, unpack(write.turns))
+            redis.call('LTRIM', turns_key, -write.keep, -1)
+        end
+        redis.call('EXPIRE', context_key, ttl)
+        redis.call('EXPIRE', turns_key, ttl)
+        if publisher ~= '' then
+            redis.call('PUBLISH', channel, publisher .. write.session_id)
+        end
+    end
+end
+return versions
+"""
+
+
+def _merge_writes(older: _PendingWrite, newer: _PendingWrite) -> _PendingWrite:
+    """Combine two queued writes of one session into one."""
+    if newer.replace:
+        return newer
+    # Older turns beyond max_turns would be trimmed right after the push
+    turns = (older.turns + newer.turns)[-newer.max_turns * 2:]
+    return newer._replace(
+        turns=turns, replace=older.replace, base_version=older.base_version)
+
+
+def _copy_context(context: ConversationContext) -> ConversationContext:
+    """Copy whose history can change without touching the original."""
+    return dataclasses.replace(context, history=deque(context.history))
+
+
+class RedisContextStore(ContextStore):
+    """Redis-backed store shared by all workers.
+
+    Each context is a hash of its scalar fields (``context:{id}``) plus
+    a list of turns (``context:{id}:turns``). Loading is one round trip
+    and saving appends only the new turns, trimmed to ``max_turns``.
+    Saves run as one Lua script (EVALSHA) per batch, so a batch is one
+    atomic round trip.
+
+    The store remembers, per context object, the newest turn it has
+    saved, so a save sends only the turns added since. Queued writes
+    that fail are kept and retried.
+
+    Contexts are also cached in process (L1). Every write publishes the
+    session id on an invalidation channel, and other workers drop their
+    cached copy when they receive it. While the subscription is down the
+    cache is bypassed, so a worker never serves a context it cannot
+    invalidate. Each write bumps a version in the hash; a context is
+    cached after a save only if no other write landed since it was
+    loaded, otherwise the entry is dropped and the next read reloads it.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379",
+        write_behind_ms: float = 0,
+        cache_size: int = CONTEXT_CACHE_SIZE,
+        cache_ttl_seconds: float = CONTEXT_CACHE_TTL_SECONDS,
+    ):
+        """Initialize store.
+
+        Args:
+            redis_url: Redis connection URL
+            write_behind_ms: Batch saves for this long (0 = write at once)
+            cache_size: Contexts cached in process (0 disables the cache)
+            cache_ttl_seconds: Maximum age of a cached context
+        """
+        self.redis_url = redis_url
+        self.write_behind_ms = write_behind_ms
+        self.cache_size = cache_size
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._redis: Optional[redis.Redis] = None
+        self._write_script = None
+
+        # id(context) -> _SaveState, dropped when the context is collected
+        self._saved: dict[int, _SaveState] = {}
+
+        # Write-behind: session_id -> queued write
+        self._pending: dict[str, _PendingWrite] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # Keeps flushes (and so each session's writes) in order
+        self._flush_lock = asyncio.Lock()
+
+        # L1 cache: session_id -> (context, version, cached_at), least
+        # recent first
+        self._cache: OrderedDict[str, tuple[ConversationContext, int, float]] = (
+            OrderedDict())
+        # Bumped on every invalidation, so a read that raced with one
+        # is not cached
+        self._generation = 0
+        self._instance_id = uuid.uuid4().hex
+        self._subscribed = False
+        self._listener: Optional[asyncio.Task] = None
+
+        # Metrics
+        self._flushes = 0
+        self._flush_failures = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._write_races = 0
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(self.redis_url, decode_responses=True)
+        if self.cache_size > 0 and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        return self._redis
+
+    def _context_key(self, session_id: str) -> str:
+        return f"context:{session_id}"
+
+    def _turns_key(self, session_id: str) -> str:
+        return f"context:{session_id}:turns"
+
+    async def _listen(self) -> None:
+        """Apply invalidations published by other workers."""
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        self._subscribed = True
+                        continue
+                    if message["type"] != "message":
+                        continue
+                    instance_id, _, session_id = message["data"].partition(":")
+                    if instance_id != self._instance_id:
+                        self._invalidate(session_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Context invalidation channel lost: {e}")
+            finally:
+                self._drop_cache()
+                try:
+                    await pubsub.aclose()
+                except Exception as e:
+                    logger.debug(f"Closing context invalidation channel: {e}")
+            await asyncio.sleep(1)
+
+    def _drop_cache(self) -> None:
+        """Stop serving from the cache until resubscribed."""
+        self._subscribed = False
+        self._generation += 1
+        self._cache.clear()
+
+    def _invalidate(self, session_id: str) -> None:
+        self._generation += 1
+        if self._cache.pop(session_id, None) is not None:
+            self._invalidations += 1
+
+    def _cache_get(self, session_id: str) -> Optional[tuple[ConversationContext, int]]:
+        entry = self._cache.get(session_id)
+        if entry is None:
+            return None
+        context, version, cached_at = entry
+        if time.monotonic() - cached_at > self.cache_ttl_seconds or (
+            context.is_expired(CONTEXT_EXPIRE_MINUTES)
+        ):
+            del self._cache[session_id]
+            return None
+        self._cache.move_to_end(session_id)
+        return context, version
+
+    def _cache_put(self, context: ConversationContext, version: int) -> None:
+        if not self._subscribed:
+            return
+        self._cache[context.session_id] = (context, version, time.monotonic())
+        self._cache.move_to_end(context.session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _track(self, context: ConversationContext, state: _SaveState) -> None:
+        key = id(context)
+        if key not in self._saved:
+            weakref.finalize(context, self._saved.pop, key, None)
+        self._saved[key] = state
+
+    def _loaded(self, context: ConversationContext, version: int) -> ConversationContext:
+        last_turn = context.history[-1] if context.history else None
+        self._track(context, _SaveState(last_turn, replace=False, version=version))
+        return context
+
+    async def get(self, session_id: str) -> Optional[ConversationContext]:
+        # Read-your-writes: send this session's queued save first
+        if session_id in self._pending:
+            await self.flush()
+        client = self._get_redis()
+
+        if self._subscribed:
+            cached = self._cache_get(session_id)
+            if cached is not None:
+                self._hits += 1
+                context, version = cached
+                return self._loaded(_copy_context(context), version)
+        self._misses += 1
+
+        generation = self._generation
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(self._context_key(session_id))
+            pipe.lrange(self._turns_key(session_id), 0, -1)
+            fields, turns = await pipe.execute()
+
+        context = self._decode_context(fields, turns)
+        if context is None:
+            return None
+        if context.is_expired(CONTEXT_EXPIRE_MINUTES):
+            logger.info(f"Session {session_id} expired")
+            return None
+        version = int(fields.get("version", 0))
+        if generation == self._generation:
+            self._cache_put(_copy_context(context), version)
+        return self._loaded(context, version)
+
+    async def get_or_create(
+        self,
+        session_id: str,
+        device_id: str,
+        language: str = "sv",
+    ) -> ConversationContext:
+        context = await self.get(session_id)
+        if context is None:
+            context = ConversationContext(
+                session_id=session_id,
+                device_id=device_id,
+                preferred_language=language,
+            )
+            # Replace whatever is stored (e.g. an expired context)
+            self._track(context, _SaveState(None, replace=True, version=0))
+            logger.info(f"Created new conversation context for session {session_id}")
+        return context
+
+    @staticmethod
+    def _decode_context(fields: dict, turns: list[str]) -> Optional[ConversationContext]:
+        if "session_id" not in fields:
+            return None
+        values: dict = {}
+        for name in _STR_FIELDS:
+            if name in fields:
+                values[name] = fields[name]
+        for name in _INT_FIELDS:
+            if name in fields:
+                values[name] = int(fields[name])
+        for name in _DATETIME_FIELDS:
+            if name in fields:
+                values[name] = datetime.fromisoformat(fields[name])
+        return ConversationContext(
+            history=[_decode_turn(t) for t in turns], **values)
+
+    @staticmethod
+    def _encode_fields(context: ConversationContext) -> dict:
+        fields = {}
+        for name in _STR_FIELDS + _INT_FIELDS:
+            value = getattr(context, name)
+            fields[name] = "" if value is None else str(value)
+        for name in _DATETIME_FIELDS:
+            fields[name] = getattr(context, name).isoformat()
+        return fields
+
+    def _unsaved_turns(self, context: ConversationContext, state: _SaveState) -> tuple[list, bool]:
+        """Turns added since the last save, and whether to replace all."""
+        history = list(context.history)
+        if state.replace:
+            return history, True
+        if state.last_turn is None:
+            return history, False
+        for index in range(len(history) - 1, -1, -1):
+            if history[index] is state.last_turn:
+                return history[index + 1:], False
+        # Cleared, or more turns added than history keeps
+        return history, True
+
+    async def save(self, context: ConversationContext) -> None:
+        state = self._saved.get(
+            id(context), _SaveState(None, replace=True, version=0))
+        turns, replace = self._unsaved_turns(context, state)
+
+        write = _PendingWrite(
+            fields=self._encode_fields(context),
+            turns=[_encode_turn(t) for t in turns],
+            replace=replace,
+            max_turns=context.max_turns,
+            base_version=0 if replace else state.version,
+            snapshot=_copy_context(context),
+        )
+        queued = self._pending.get(context.session_id)
+        if queued is not None:
+            write = _merge_writes(queued, write)
+        self._pending[context.session_id] = write
+        # The write will make the stored version base_version + 1
+        self._track(context, _SaveState(
+            context.history[-1] if context.history else None,
+            replace=False,
+            version=write.base_version + 1,
+        ))
+
+        if self.write_behind_ms > 0:
+            self._schedule_flush(self.write_behind_ms / 1000)
+            return
+        try:
+            await self.flush()
+        except Exception as e:
+            # Kept queued; written by the retry or the next flush
+            logger.error(f"Saving context {context.session_id} failed, will retry: {e}")
+            self._schedule_flush(FLUSH_RETRY_SECONDS)
+
+    def _schedule_flush(self, delay: float) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_delay(delay))
+
+    async def _flush_after_delay(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Write-behind flush of contexts failed, will retry: {e}")
+            self._schedule_flush(FLUSH_RETRY_SECONDS)
+
+    async def flush(self) -> None:
+        """Write all queued saves in one round trip.
+
+        If the write fails the saves stay queued (merged with any queued
+        since) and the error is raised.
+        """
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                await self._write(pending)
+                self._flushes += 1
+            except Exception:
+                self._flush_failures += 1
+                for session_id, write in pending.items():
+                    newer = self._pending.get(session_id)
+                    self._pending[session_id] = (
+                        write if newer is None else _merge_writes(write, newer))
+                raise
+
+    async def _write(self, pending: dict[str, _PendingWrite]) -> None:
+        """Write queued saves with one script call.
+
+        The script checks and writes every session atomically, so a
+        concurrent delete or create_session is never overwritten and
+        nothing has to be retried.
+        """
+        client = self._get_redis()
+        if self._write_script is None:
+            self._write_script = client.register_script(_WRITE_SCRIPT)
+
+        keys: list[str] = []
+        args: list = [
+            CONTEXT_EXPIRE_MINUTES * 60,
+            INVALIDATION_CHANNEL,
+            f"{self._instance_id}:" if self.cache_size > 0 else "",
+        ]
+        for session_id, write in pending.items():
+            keys += [self._context_key(session_id), self._turns_key(session_id)]
+            args.append(json.dumps({
+                "session_id": session_id,
+                "replace": write.replace,
+                # Empty strings mark unset optional fields
+                "fields": {
+                    name: value for name, value in write.fields.items() if value != ""},
+                "unset": [name for name, value in write.fields.items() if value == ""],
+                "turns": write.turns,
+                "keep": write.max_turns * 2,
+            }))
+        versions = await self._write_script(keys=keys, args=args)
+
+        vanished = 0
+        for (session_id, write), version in zip(pending.items(), versions):
+            if version < 0:
+                vanished += 1
+                self._invalidate(session_id)
+            elif write.replace or version == write.base_version + 1:
+                self._cache_put(write.snapshot, version)
+            else:
+                # Another write landed since this context was loaded,
+                # so the snapshot is not what Redis holds
+                self._write_races += 1
+                self._invalidate(session_id)
+        if vanished:
+            logger.info(
+                f"Not saving {vanished} contexts that expired or were deleted "
+                f"since loading")
+
+    async def delete(self, session_id: str) -> None:
+        async with self._flush_lock:
+            self._pending.pop(session_id, None)
+            async with self._get_redis().pipeline(transaction=True) as pipe:
+                pipe.delete(self._context_key(session_id), self._turns_key(session_id))
+                if self.cache_size > 0:
+                    pipe.publish(INVALIDATION_CHANNEL, f"{self._instance_id}:{session_id}")
+                await pipe.execute()
+            self._invalidate(session_id)
+
+    async def aclose(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Dropping {len(self._pending)} unsaved contexts: {e}")
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self._drop_cache()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            self._write_script = None
+
+    def get_metrics(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "backend": "redis",
+            "pending": len(self._pending),
+            "flushes": self._flushes,
+            "flush_failures": self._flush_failures,
+            "cache_enabled": self._subscribed,
+            "cache_entries": len(self._cache),
+            "cache_hits": self._hits,
+            "cache_misses": self._misses,
+            "cache_hit_rate": round(self._hits / (lookups or 1), 3),
+            "invalidations": self._invalidations,
+            "write_races": self._write_races,
+        }
+
+
+def create_context_store() -> ContextStore:
+    """Create the store selected by CONTEXT_STORE ("memory" or "redis")."""
+    backend = os.getenv("CONTEXT_STORE", "memory").lower()
+    if backend == "redis":
+        return RedisContextStore(
+            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"),
+            write_behind_ms=float(os.getenv("CONTEXT_STORE_WRITE_BEHIND_MS", "0")),
+        )
+    if backend != "memory":
+        logger.warning(f"Unknown CONTEXT_STORE '{backend}', using memory")
+    return InMemoryContextStore()
+
+
+# Global context store
+context_store = create_context_store()
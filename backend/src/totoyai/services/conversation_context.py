@@ -4,22 +4,74 @@ Inspired by XiaoGPT's conversation management approach.
 Maintains conversation history for more natural, contextual responses.
 """
 
+import asyncio
+import heapq
 import logging
+import os
+import sys
+import time
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional
+from itertools import islice
+from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Heap entries processed per sweep step before yielding to the event loop
+SWEEP_BATCH_SIZE = 1000
+
+
+_EPOCH = datetime(1970, 1, 1)
+
 
-@dataclass
 class ConversationTurn:
-    """Single turn in a conversation."""
+    """Single turn in a conversation.
+
+    Slotted, with the timestamp kept as float seconds (UTC) and role and
+    intent interned, since thousands of live contexts each hold up to
+    ``max_turns * 2`` of these.
+    """
+
+    __slots__ = ("role", "content", "created", "intent")
+
+    def __init__(
+        self,
+        role: str,  # "user" or "assistant"
+        content: str,
+        timestamp: Union[datetime, float, None] = None,
+        intent: Optional[str] = None,
+    ):
+        self.role = sys.intern(role)
+        self.content = content
+        if timestamp is None:
+            self.created = time.time()
+        elif isinstance(timestamp, datetime):
+            self.created = (timestamp - _EPOCH).total_seconds()
+        else:
+            self.created = float(timestamp)
+        self.intent = sys.intern(intent) if intent is not None else None
+
+    @property
+    def timestamp(self) -> datetime:
+        """Turn time as a naive UTC datetime."""
+        return _EPOCH + timedelta(seconds=self.created)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConversationTurn):
+            return NotImplemented
+        return (
+            self.role == other.role
+            and self.content == other.content
+            and self.created == other.created
+            and self.intent == other.intent
+        )
 
-    role: str  # "user" or "assistant"
-    content: str
-    timestamp: datetime = field(default_factory=datetime.utcnow)
-    intent: Optional[str] = None
+    def __repr__(self) -> str:
+        return (
+            f"ConversationTurn(role={self.role!r}, content={self.content!r}, "
+            f"timestamp={self.timestamp!r}, intent={self.intent!r})"
+        )
 
 
 @dataclass
@@ -28,7 +80,8 @@ class ConversationContext:
 
     session_id: str
     device_id: str
-    history: list[ConversationTurn] = field(default_factory=list)
+    # Bounded to max_turns * 2, so appending drops the oldest turn
+    history: deque[ConversationTurn] = field(default_factory=deque)
     max_turns: int = 10  # Keep last N turns for context
     created_at: datetime = field(default_factory=datetime.utcnow)
     last_activity: datetime = field(default_factory=datetime.utcnow)
@@ -42,20 +95,25 @@ class ConversationContext:
     current_story: Optional[str] = None
     current_topic: Optional[str] = None
 
+    def __post_init__(self) -> None:
+        self._resize_history()
+
+    def _resize_history(self) -> None:
+        """Bound history to max_turns * 2."""
+        capacity = self.max_turns * 2
+        if not isinstance(self.history, deque) or self.history.maxlen != capacity:
+            self.history = deque(self.history, maxlen=capacity)
+
     def add_turn(self, role: str, content: str, intent: Optional[str] = None) -> None:
         """Add a conversation turn to history."""
-        turn = ConversationTurn(
-            role=role,
-            content=content,
-            timestamp=datetime.utcnow(),
-            intent=intent,
-        )
-        self.history.append(turn)
-        self.last_activity = datetime.utcnow()
+        # max_turns may have been changed since the deque was created
+        if self.history.maxlen != self.max_turns * 2:
+            self._resize_history()
 
-        # Trim history if too long
-        if len(self.history) > self.max_turns * 2:
-            self.history = self.history[-self.max_turns * 2:]
+        now = time.time()
+        turn = ConversationTurn(role, content, now, intent)
+        self.history.append(turn)
+        self.last_activity = _EPOCH + timedelta(seconds=now)
 
     def add_user_message(self, content: str, intent: Optional[str] = None) -> None:
         """Add user message to history."""
@@ -73,7 +131,8 @@ class ConversationContext:
         """
         turns = max_turns or self.max_turns
         # *2 for user+assistant pairs
-        recent_history = self.history[-turns * 2:]
+        recent_history = islice(
+            self.history, max(0, len(self.history) - turns * 2), None)
 
         return [
             {"role": turn.role, "content": turn.content}
@@ -99,7 +158,7 @@ class ConversationContext:
 
     def clear(self) -> None:
         """Clear conversation history."""
-        self.history = []
+        self.history.clear()
         self.current_story = None
         self.current_topic = None
 
@@ -108,16 +167,54 @@ class ConversationContextManager:
     """Manages multiple conversation contexts.
 
     In-memory storage for development. Use Redis in production.
+
+    Contexts are kept in least-recently-used order, so making room for a
+    new one is O(1). Expiry is tracked in a min-heap of deadlines that a
+    background task drains (see start()), so no request ever scans or
+    sorts all contexts.
     """
 
-    def __init__(self, max_contexts: int = 1000):
+    def __init__(
+        self,
+        max_contexts: int = 1000,
+        timeout_minutes: int = 30,
+        sweep_interval_seconds: float = 30.0,
+    ):
         """Initialize context manager.
 
         Args:
             max_contexts: Maximum number of contexts to keep in memory
+            timeout_minutes: Inactivity after which a context expires
+            sweep_interval_seconds: How often expired contexts are removed
         """
-        self._contexts: dict[str, ConversationContext] = {}
+        self._contexts: OrderedDict[str, ConversationContext] = OrderedDict()
         self.max_contexts = max_contexts
+        self.timeout_minutes = timeout_minutes
+        self.sweep_interval_seconds = sweep_interval_seconds
+
+        # Min-heap of (deadline, session_id). Deadlines are checked
+        # lazily: activity since scheduling moves an entry back in.
+        self._expiry_heap: list[tuple[float, str]] = []
+        # Current deadline per session; heap entries that differ are stale
+        self._deadlines: dict[str, float] = {}
+        self._sweep_task: Optional[asyncio.Task] = None
+
+        # Counters
+        self._created = 0
+        self._expired = 0
+        self._evicted = 0
+
+    def _deadline(self, context: ConversationContext) -> float:
+        expiry = context.last_activity + timedelta(minutes=self.timeout_minutes)
+        return expiry.timestamp()
+
+    def _schedule(self, session_id: str, deadline: float) -> None:
+        self._deadlines[session_id] = deadline
+        heapq.heappush(self._expiry_heap, (deadline, session_id))
+
+    def _remove(self, session_id: str) -> None:
+        self._contexts.pop(session_id, None)
+        self._deadlines.pop(session_id, None)
 
     def get_or_create(
         self,
@@ -135,14 +232,16 @@ class ConversationContextManager:
         Returns:
             ConversationContext for the session
         """
-        if session_id in self._contexts:
-            context = self._contexts[session_id]
+        context = self._contexts.get(session_id)
+        if context is not None:
             # Check if expired
-            if context.is_expired():
+            if context.is_expired(self.timeout_minutes):
                 logger.info(
                     f"Session {session_id} expired, creating new context")
-                context = self._create_new_context(
-                    session_id, device_id, language)
+                self._remove(session_id)
+                self._expired += 1
+                return self._create_new_context(session_id, device_id, language)
+            self._contexts.move_to_end(session_id)
             return context
 
         return self._create_new_context(session_id, device_id, language)
@@ -154,9 +253,11 @@ class ConversationContextManager:
         language: str,
     ) -> ConversationContext:
         """Create a new conversation context."""
-        # Clean up old contexts if at limit
-        if len(self._contexts) >= self.max_contexts:
-            self._cleanup_old_contexts()
+        # Make room by evicting the least recently used context
+        while len(self._contexts) >= self.max_contexts:
+            evicted_id, _ = self._contexts.popitem(last=False)
+            self._deadlines.pop(evicted_id, None)
+            self._evicted += 1
 
         context = ConversationContext(
             session_id=session_id,
@@ -164,50 +265,112 @@ class ConversationContextManager:
             preferred_language=language,
         )
         self._contexts[session_id] = context
+        self._schedule(session_id, self._deadline(context))
+        self._created += 1
         logger.info(
             f"Created new conversation context for session {session_id}")
         return context
 
-    def _cleanup_old_contexts(self) -> None:
-        """Remove expired and oldest contexts."""
-        now = datetime.utcnow()
+    def sweep_expired(self, limit: Optional[int] = None) -> int:
+        """Remove contexts whose deadline has passed.
 
-        # Remove expired contexts
-        expired = [
-            sid for sid, ctx in self._contexts.items()
-            if ctx.is_expired()
-        ]
-        for sid in expired:
-            del self._contexts[sid]
-
-        # If still over limit, remove oldest
-        if len(self._contexts) >= self.max_contexts:
-            sorted_contexts = sorted(
-                self._contexts.items(),
-                key=lambda x: x[1].last_activity
-            )
-            # Remove oldest 10%
-            to_remove = len(sorted_contexts) // 10
-            for sid, _ in sorted_contexts[:to_remove]:
-                del self._contexts[sid]
-
-        logger.info(f"Cleaned up contexts, {len(self._contexts)} remaining")
+        Only heap entries that are due are looked at; a context that saw
+        activity since it was scheduled is pushed back with its new
+        deadline.
+
+        Args:
+            limit: Maximum heap entries to process
+
+        Returns:
+            Number of contexts removed
+        """
+        now = datetime.utcnow().timestamp()
+        heap = self._expiry_heap
+        removed = 0
+        processed = 0
+
+        while heap and heap[0][0] <= now and (limit is None or processed < limit):
+            deadline, session_id = heapq.heappop(heap)
+            processed += 1
+            if self._deadlines.get(session_id) != deadline:
+                continue  # Stale entry (rescheduled, deleted or evicted)
+
+            actual = self._deadline(self._contexts[session_id])
+            if actual > now:
+                self._schedule(session_id, actual)
+            else:
+                self._remove(session_id)
+                self._expired += 1
+                removed += 1
+
+        return removed
+
+    async def _sweep_loop(self) -> None:
+        """Periodically remove expired contexts, yielding between batches."""
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            removed = 0
+            while True:
+                batch = self.sweep_expired(limit=SWEEP_BATCH_SIZE)
+                removed += batch
+                if not self._expiry_heap or self._expiry_heap[0][0] > (
+                    datetime.utcnow().timestamp()
+                ):
+                    break
+                await asyncio.sleep(0)
+            if removed:
+                logger.info(
+                    f"Expired {removed} contexts, {len(self._contexts)} remaining")
+
+    def start(self) -> None:
+        """Start the background expiry sweep."""
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        """Stop the background expiry sweep."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
 
     def get(self, session_id: str) -> Optional[ConversationContext]:
         """Get context by session ID."""
-        return self._contexts.get(session_id)
+        context = self._contexts.get(session_id)
+        if context is not None:
+            self._contexts.move_to_end(session_id)
+        return context
 
     def delete(self, session_id: str) -> None:
         """Delete a conversation context."""
         if session_id in self._contexts:
-            del self._contexts[session_id]
+            self._remove(session_id)
             logger.info(
                 f"Deleted conversation context for session {session_id}")
 
     def get_active_count(self) -> int:
-        """Get count of active (non-expired) contexts."""
-        return sum(1 for ctx in self._contexts.values() if not ctx.is_expired())
+        """Get count of active contexts.
+
+        O(1): contexts that expired since the last sweep are still
+        counted until the sweep removes them.
+        """
+        return len(self._contexts)
+
+    def get_metrics(self) -> dict:
+        """Get context counters."""
+        return {
+            "active": len(self._contexts),
+            "max_contexts": self.max_contexts,
+            "created": self._created,
+            "expired": self._expired,
+            "evicted": self._evicted,
+        }
 
 
 # Global conversation context manager
-conversation_manager = ConversationContextManager()
+conversation_manager = ConversationContextManager(
+    max_contexts=int(os.getenv("CONTEXT_MAX_SESSIONS", "10000")),
+)
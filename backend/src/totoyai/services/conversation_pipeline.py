@@ -0,0 +1,235 @@
+"""Conversation pipeline - STT → LLM → TTS for one toy turn.
+
+Shared by the streaming (WebSocket) and request/response endpoints.
+Emits events as soon as each stage has something to say, so audio for
+the first sentence can leave the server before the rest is synthesized.
+"""
+
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from enum import Enum
+from typing import AsyncIterator, Optional
+
+from totoyai.models import AudioProfile, Intent
+from totoyai.services.audio_format import EDGE_AUDIO
+from totoyai.services.content_filter import (
+    REDIRECT_PHRASES,
+    StreamingContentFilter,
+    get_content_filter,
+    get_redirect_phrase,
+)
+from totoyai.services.context_store import ContextStore, context_store
+from totoyai.services.llm_fallback import LLMFallbackService, llm_fallback_service
+from totoyai.services.streaming_tts import StreamingTTSService, streaming_tts_service
+from totoyai.services.stt import (
+    STT_FALLBACK_MESSAGE,
+    AudioBuffer,
+    STTError,
+    STTService,
+    stt_service,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineEventType(str, Enum):
+    """Kinds of events emitted by the conversation pipeline."""
+
+    TRANSCRIPT = "transcript"
+    AUDIO = "audio"
+    RESPONSE = "response"
+
+
+@dataclass
+class PipelineEvent:
+    """Single event emitted while processing a conversation turn."""
+
+    type: PipelineEventType
+    text: Optional[str] = None
+    audio: Optional[bytes] = None
+    intent: Optional[Intent] = None
+
+
+class ConversationPipeline:
+    """Runs one conversation turn: STT → LLM → TTS.
+
+    Events are yielded in order:
+    1. TRANSCRIPT - what the child said
+    2. AUDIO - response audio chunks, starting as soon as the LLM has
+       written its first sentence
+    3. RESPONSE - full response text and detected intent
+
+    A transcript containing blocked words never reaches the LLM: the
+    redirect phrase is answered at once from pre-rendered audio.
+    """
+
+    def __init__(
+        self,
+        stt: STTService = stt_service,
+        llm: LLMFallbackService = llm_fallback_service,
+        tts: StreamingTTSService = streaming_tts_service,
+        contexts: ContextStore = context_store,
+    ):
+        """Initialize pipeline with its stage services."""
+        self.stt = stt
+        self.llm = llm
+        self.tts = tts
+        self.contexts = contexts
+
+        # Redirect phrase audio: (language, profile name) -> audio
+        self._redirect_audio: dict[tuple[str, str], bytes] = {}
+
+        # Blocked content by where it was found, then category
+        self._blocked: dict[str, Counter] = {
+            "transcript": Counter(),
+            "response": Counter(),
+        }
+
+    async def redirect_audio(
+        self,
+        language: str,
+        profile: Optional[AudioProfile] = None,
+    ) -> bytes:
+        """Audio of the redirect phrase, rendered once and kept."""
+        key = (language, (profile or EDGE_AUDIO).name)
+        audio = self._redirect_audio.get(key)
+        if audio is None:
+            audio = await self.tts.synthesize_to_bytes(
+                get_redirect_phrase(language), language, profile)
+            self._redirect_audio[key] = audio
+        return audio
+
+    async def prerender_redirects(self) -> None:
+        """Render the redirect phrase for every language ahead of time."""
+        for language in REDIRECT_PHRASES:
+            await self.redirect_audio(language)
+
+    async def run(
+        self,
+        audio_data: AudioBuffer,
+        session_id: str,
+        device_id: str,
+        sample_rate: int = 16000,
+        language: str = "sv",
+        audio_profile: Optional[AudioProfile] = None,
+    ) -> AsyncIterator[PipelineEvent]:
+        """Process one utterance and stream the response.
+
+        Args:
+            audio_data: Raw 16-bit PCM mono audio (memoryviews are not copied)
+            session_id: Conversation session identifier
+            device_id: Device the audio came from
+            sample_rate: Audio sample rate
+            language: Language code for the response
+            audio_profile: Output format for the device (default Edge MP3)
+
+        Yields:
+            PipelineEvent objects as each stage produces output
+        """
+        start_time = time.time()
+
+        try:
+            transcript = await self.stt.transcribe(audio_data, sample_rate)
+            user_text = transcript.text
+            if transcript.trimmed_seconds:
+                logger.debug(
+                    f"VAD trimmed {transcript.trimmed_seconds:.2f}s "
+                    f"for session {session_id}"
+                )
+        except STTError as e:
+            logger.warning(f"STT failed for session {session_id}: {e}")
+            user_text = ""
+
+        yield PipelineEvent(type=PipelineEventType.TRANSCRIPT, text=user_text)
+
+        # No speech (rejected by VAD) or STT failure: ask the child again
+        if not user_text:
+            async for chunk in self.tts.synthesize_streaming(
+                STT_FALLBACK_MESSAGE, "en", audio_profile
+            ):
+                yield PipelineEvent(type=PipelineEventType.AUDIO, audio=chunk)
+            yield PipelineEvent(
+                type=PipelineEventType.RESPONSE,
+                text=STT_FALLBACK_MESSAGE,
+                intent=Intent.GENERAL,
+            )
+            return
+
+        # Unsafe question: answer kindly without calling any provider
+        match = get_content_filter(language).search(user_text)
+        if match is not None:
+            self._blocked["transcript"][match.category] += 1
+            logger.info(
+                f"Blocked transcript for session {session_id} ({match.category})")
+            yield PipelineEvent(
+                type=PipelineEventType.AUDIO,
+                audio=await self.redirect_audio(language, audio_profile),
+            )
+            yield PipelineEvent(
+                type=PipelineEventType.RESPONSE,
+                text=get_redirect_phrase(language),
+                intent=Intent.GENERAL,
+            )
+            return
+
+        context = await self.contexts.get_or_create(session_id, device_id, language)
+        llm_stream = await self.llm.generate_response_stream(
+            user_input=user_text,
+            language=language,
+            context=context.get_context_for_llm(),
+        )
+        context.add_user_message(user_text, intent=llm_stream.intent.value)
+
+        response_parts: list[str] = []
+
+        async def collect_response() -> AsyncIterator[str]:
+            try:
+                async for delta in llm_stream.chunks:
+                    response_parts.append(delta)
+                    yield delta
+            finally:
+                # Cut short (e.g. by the content filter): stop the provider
+                await llm_stream.chunks.aclose()
+
+        content_filter = StreamingContentFilter(language)
+        first_audio = True
+        async for chunk in self.tts.synthesize_with_llm_streaming(
+            collect_response(),
+            language,
+            profile=audio_profile,
+            content_filter=content_filter,
+        ):
+            if first_audio:
+                first_audio = False
+                logger.info(
+                    f"First audio for session {session_id} after "
+                    f"{(time.time() - start_time) * 1000:.0f}ms"
+                )
+            yield PipelineEvent(type=PipelineEventType.AUDIO, audio=chunk)
+
+        if content_filter.match is not None:
+            self._blocked["response"][content_filter.match.category] += 1
+            # What the child heard; the blocked text stays out of the history
+            response_text = get_redirect_phrase(language)
+        else:
+            response_text = "".join(response_parts)
+        context.add_assistant_message(response_text)
+        await self.contexts.save(context)
+
+        yield PipelineEvent(
+            type=PipelineEventType.RESPONSE,
+            text=response_text,
+            intent=llm_stream.intent,
+        )
+
+    def get_metrics(self) -> dict:
+        """Get counts of blocked transcripts and responses by category."""
+        return {
+            source: dict(counts) for source, counts in self._blocked.items()
+        }
+
+
+# Global conversation pipeline instance
+conversation_pipeline = ConversationPipeline()
@@ -0,0 +1,254 @@
+"""Registry of toy devices and their secrets, stored in Redis.
+
+Each device is a hash at ``device:{id}`` holding the Device fields.
+Secrets are stored as bcrypt hashes. bcrypt is deliberately slow (tens
+of milliseconds per check), so checks run on a small thread pool
+instead of the event loop, with a cap on how many may queue.
+
+When power returns to a kindergarten, every toy re-authenticates at
+once, and toys retry if the first attempt is slow. Two things absorb
+that:
+- concurrent checks of the same credentials share one bcrypt call
+- a successful check is remembered for a short while, so reconnects
+  skip bcrypt entirely
+
+Remembered credentials are keyed by a keyed digest of the secret and
+the stored hash. Secrets are never kept in memory, and re-registering
+a device (a new hash) invalidates them.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+import redis.asyncio as redis
+
+from totoyai.models import Device
+from totoyai.services.auth import hash_secret, verify_secret
+
+logger = logging.getLogger(__name__)
+
+# Threads running bcrypt (each check occupies one core)
+DEVICE_AUTH_THREADS = int(os.getenv("DEVICE_AUTH_THREADS", "2"))
+# Checks allowed to queue before new ones are turned away
+DEVICE_AUTH_MAX_PENDING = int(os.getenv("DEVICE_AUTH_MAX_PENDING", "256"))
+# How long a successful check is remembered
+DEVICE_AUTH_CACHE_SECONDS = float(os.getenv("DEVICE_AUTH_CACHE_SECONDS", "300"))
+DEVICE_AUTH_CACHE_SIZE = int(os.getenv("DEVICE_AUTH_CACHE_SIZE", "10000"))
+
+_OPTIONAL_FIELDS = ("last_seen", "firmware_version", "owner_email")
+
+
+class DeviceRegistryBusy(Exception):
+    """Too many secret checks are already queued."""
+
+
+class DeviceRegistry:
+    """Registers devices and verifies their secrets."""
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379",
+        hash_threads: int = DEVICE_AUTH_THREADS,
+        max_pending: int = DEVICE_AUTH_MAX_PENDING,
+        cache_seconds: float = DEVICE_AUTH_CACHE_SECONDS,
+        cache_size: int = DEVICE_AUTH_CACHE_SIZE,
+    ):
+        """Initialize registry.
+
+        Args:
+            redis_url: Redis connection URL
+            hash_threads: Threads running bcrypt
+            max_pending: Secret checks allowed to run or queue at once
+            cache_seconds: How long a successful check is remembered
+            cache_size: Successful checks remembered (0 disables the cache)
+        """
+        self.redis_url = redis_url
+        self.hash_threads = hash_threads
+        self.max_pending = max_pending
+        self.cache_seconds = cache_seconds
+        self.cache_size = cache_size
+        self._redis: Optional[redis.Redis] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Per-process key for credential digests
+        self._digest_key = secrets.token_bytes(32)
+        # Verified credentials: digest -> verified_at, least recent first
+        self._verified: OrderedDict[bytes, float] = OrderedDict()
+        # Checks in progress: digest -> shared check
+        self._inflight: dict[bytes, asyncio.Task] = {}
+
+        # Metrics
+        self._cache_hits = 0
+        self._bcrypt_checks = 0
+        self._shared_checks = 0
+        self._failures = 0
+        self._rejected_busy = 0
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.hash_threads, thread_name_prefix="device-auth")
+        return self._executor
+
+    def _device_key(self, device_id: str) -> str:
+        return f"device:{device_id}"
+
+    async def _run_in_pool(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    async def register(
+        self,
+        device_id: str,
+        device_secret: str,
+        firmware_version: Optional[str] = None,
+        owner_email: Optional[str] = None,
+    ) -> Device:
+        """Register a device, replacing any existing registration."""
+        device = Device(
+            device_id=device_id,
+            device_secret_hash=await self._run_in_pool(hash_secret, device_secret),
+            firmware_version=firmware_version,
+            owner_email=owner_email,
+        )
+        fields = {
+            "device_id": device.device_id,
+            "device_secret_hash": device.device_secret_hash,
+            "registered_at": device.registered_at.isoformat(),
+        }
+        for name in _OPTIONAL_FIELDS:
+            value = getattr(device, name)
+            if value is not None:
+                fields[name] = value
+        async with self._get_redis().pipeline(transaction=True) as pipe:
+            pipe.delete(self._device_key(device_id))
+            pipe.hset(self._device_key(device_id), mapping=fields)
+            await pipe.execute()
+        logger.info(f"Registered device {device_id}")
+        return device
+
+    async def get(self, device_id: str) -> Optional[Device]:
+        """Look up a registered device."""
+        fields = await self._get_redis().hgetall(self._device_key(device_id))
+        if "device_secret_hash" not in fields:
+            return None
+        return Device.model_validate(fields)
+
+    async def delete(self, device_id: str) -> None:
+        """Remove a device. Its remembered credentials stop matching."""
+        await self._get_redis().delete(self._device_key(device_id))
+
+    def _digest(self, device: Device, device_secret: str) -> bytes:
+        message = f"{device.device_id}\x1f{device.device_secret_hash}\x1f{device_secret}"
+        return hmac.new(self._digest_key, message.encode(), hashlib.sha256).digest()
+
+    def _cache_hit(self, digest: bytes) -> bool:
+        verified_at = self._verified.get(digest)
+        if verified_at is None:
+            return False
+        if time.monotonic() - verified_at > self.cache_seconds:
+            del self._verified[digest]
+            return False
+        self._verified.move_to_end(digest)
+        return True
+
+    def _cache_put(self, digest: bytes) -> None:
+        if self.cache_size <= 0:
+            return
+        self._verified[digest] = time.monotonic()
+        self._verified.move_to_end(digest)
+        while len(self._verified) > self.cache_size:
+            self._verified.popitem(last=False)
+
+    async def authenticate(self, device_id: str, device_secret: str) -> bool:
+        """Check a device's secret.
+
+        Raises:
+            DeviceRegistryBusy: If too many checks are already queued
+        """
+        device = await self.get(device_id)
+        if device is None:
+            self._failures += 1
+            return False
+
+        digest = self._digest(device, device_secret)
+        if self._cache_hit(digest):
+            self._cache_hits += 1
+            return True
+
+        task = self._inflight.get(digest)
+        if task is not None:
+            self._shared_checks += 1
+        else:
+            if len(self._inflight) >= self.max_pending:
+                self._rejected_busy += 1
+                raise DeviceRegistryBusy("Too many device authentications in progress")
+            self._bcrypt_checks += 1
+            # Detached from the caller: one toy giving up must not cancel
+            # the check for every toy sharing it
+            task = asyncio.create_task(
+                self._verify(digest, device_secret, device.device_secret_hash))
+            self._inflight[digest] = task
+            task.add_done_callback(lambda done: self._check_done(digest, done))
+
+        valid = await asyncio.shield(task)
+        if not valid:
+            self._failures += 1
+            logger.warning(f"Invalid secret for device {device_id}")
+            return False
+
+        await self._get_redis().hset(
+            self._device_key(device_id), "last_seen", datetime.utcnow().isoformat())
+        return True
+
+    async def _verify(self, digest: bytes, device_secret: str, secret_hash: str) -> bool:
+        valid = await self._run_in_pool(verify_secret, device_secret, secret_hash)
+        if valid:
+            self._cache_put(digest)
+        return valid
+
+    def _check_done(self, digest: bytes, task: asyncio.Task) -> None:
+        del self._inflight[digest]
+        if not task.cancelled():
+            # Every waiter may have gone; don't log "never retrieved"
+            task.exception()
+
+    async def aclose(self) -> None:
+        """Stop the bcrypt threads and release the Redis connection."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def get_metrics(self) -> dict:
+        """Get verification metrics."""
+        return {
+            "cache_entries": len(self._verified),
+            "cache_hits": self._cache_hits,
+            "bcrypt_checks": self._bcrypt_checks,
+            "shared_checks": self._shared_checks,
+            "in_progress": len(self._inflight),
+            "failures": self._failures,
+            "rejected_busy": self._rejected_busy,
+        }
+
+
+# Global device registry
+device_registry = DeviceRegistry(
+    redis_url=os.getenv("REDIS_URL", "redis://localhost:6379"))
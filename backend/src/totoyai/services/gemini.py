@@ -3,7 +3,7 @@
 import logging
 import os
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import google.generativeai as genai
 
@@ -11,6 +11,23 @@ from totoyai.models import Intent
 
 logger = logging.getLogger(__name__)
 
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# System instructions for toy conversations, by language
+CONVERSATION_INSTRUCTIONS = {
+    "sv": """Du är en vänlig AI-assistent i en gosig leksak som pratar med barn 3-10 år.
+Använd enkelt, varmt och uppmuntrande språk. Håll svaren korta (2-3 meningar).
+Var lekfull och fantasifull. Använd aldrig komplicerade ord eller läskiga ämnen.
+Svara alltid på svenska.""",
+    "en": """You are a friendly AI assistant inside a plush toy, talking to children aged 3-10.
+Use simple, warm, and encouraging language. Keep responses short (2-3 sentences).
+Be playful and imaginative. Never use complex words or scary topics.
+Always respond in English.""",
+}
+
+# Upper bound on cached model objects (one per distinct system instruction)
+MAX_CACHED_MODELS = 16
+
 
 class GeminiService:
     """Google Gemini service for text and content generation."""
@@ -28,7 +45,10 @@ class GeminiService:
             genai.configure(api_key=self.api_key)
 
         # Use Gemini 2.5 Flash for text generation
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+        self.model = genai.GenerativeModel(GEMINI_MODEL)
+
+        # Model objects keyed by system instruction, built once and reused
+        self._models: dict[str, genai.GenerativeModel] = {}
 
         # Load storybook system prompt
         prompt_path = Path(
@@ -48,6 +68,31 @@ Create engaging stories with:
 
 Make every story fun, educational, and age-appropriate."""
 
+    def _get_model(self, system_instruction: str) -> genai.GenerativeModel:
+        """Get the cached model object for a system instruction."""
+        model = self._models.get(system_instruction)
+        if model is None:
+            if len(self._models) >= MAX_CACHED_MODELS:
+                self._models.pop(next(iter(self._models)))
+            model = genai.GenerativeModel(
+                GEMINI_MODEL,
+                system_instruction=system_instruction,
+            )
+            self._models[system_instruction] = model
+        return model
+
+    async def warm_up(self) -> None:
+        """Build the common models and open the connection to Gemini.
+
+        count_tokens goes through the same async client as generation
+        but does not use generation quota.
+        """
+        if not self.api_key:
+            return
+        for instruction in (*CONVERSATION_INSTRUCTIONS.values(), self.storybook_prompt):
+            self._get_model(instruction)
+        await self.model.count_tokens_async("Hej")
+
     def _detect_intent(self, user_input: str) -> Intent:
         """Detect user intent from input."""
         user_lower = user_input.lower()
@@ -81,13 +126,8 @@ Make every story fun, educational, and age-appropriate."""
             Generated text response
         """
         try:
-            # Create model with system instruction
-            model = genai.GenerativeModel(
-                "gemini-2.5-flash",
-                system_instruction=system_instruction,
-            )
-
-            response = model.generate_content(prompt)
+            model = self._get_model(system_instruction)
+            response = await model.generate_content_async(prompt)
             return response.text
 
         except Exception as e:
@@ -120,6 +160,57 @@ Make every story fun, educational, and age-appropriate."""
             logger.error(f"Story generation failed: {e}")
             raise GeminiError(f"Failed to generate story: {e}")
 
+    def _build_conversation_prompt(
+        self,
+        user_input: str,
+        language: str,
+        context: Optional[list] = None,
+    ) -> tuple[str, str]:
+        """Build (system_instruction, prompt) for a toy conversation turn."""
+        system_instruction = CONVERSATION_INSTRUCTIONS.get(
+            language, CONVERSATION_INSTRUCTIONS["en"])
+
+        # Build prompt with context
+        if context:
+            conversation_history = "\n".join(
+                [f"{msg['role']}: {msg['content']}" for msg in context[-3:]]
+            )
+            full_prompt = f"Previous conversation:\n{conversation_history}\n\nChild: {user_input}"
+        else:
+            full_prompt = user_input
+
+        return system_instruction, full_prompt
+
+    async def generate_response_stream(
+        self,
+        prompt: str,
+        system_instruction: str,
+        language: str = "en",
+    ) -> AsyncIterator[str]:
+        """Stream a response from Gemini as text deltas.
+
+        Args:
+            prompt: User prompt/question
+            system_instruction: System instruction for behavior
+            language: Language code ('en' or 'sv')
+
+        Yields:
+            Text deltas as the model produces them
+        """
+        try:
+            model = self._get_model(system_instruction)
+            response = await model.generate_content_async(prompt, stream=True)
+
+            async for chunk in response:
+                # Chunks without text parts (e.g. the final finish-reason
+                # chunk) raise on .text
+                if chunk.parts:
+                    yield chunk.text
+
+        except Exception as e:
+            logger.error(f"Gemini streaming failed: {e}")
+            raise GeminiError(f"Failed to stream response: {e}")
+
     async def generate_conversation_response(
         self,
         user_input: str,
@@ -137,26 +228,8 @@ Make every story fun, educational, and age-appropriate."""
             Tuple of (response_text, detected_intent)
         """
         intent = self._detect_intent(user_input)
-
-        if language == "sv":
-            system_instruction = """Du är en vänlig AI-assistent i en gosig leksak som pratar med barn 3-10 år.
-Använd enkelt, varmt och uppmuntrande språk. Håll svaren korta (2-3 meningar).
-Var lekfull och fantasifull. Använd aldrig komplicerade ord eller läskiga ämnen.
-Svara alltid på svenska."""
-        else:
-            system_instruction = """You are a friendly AI assistant inside a plush toy, talking to children aged 3-10.
-Use simple, warm, and encouraging language. Keep responses short (2-3 sentences).
-Be playful and imaginative. Never use complex words or scary topics.
-Always respond in English."""
-
-        # Build prompt with context
-        if context:
-            conversation_history = "\n".join(
-                [f"{msg['role']}: {msg['content']}" for msg in context[-3:]]
-            )
-            full_prompt = f"Previous conversation:\n{conversation_history}\n\nChild: {user_input}"
-        else:
-            full_prompt = user_input
+        system_instruction, full_prompt = self._build_conversation_prompt(
+            user_input, language, context)
 
         try:
             response = await self.generate_response(
@@ -170,6 +243,35 @@ Always respond in English."""
             logger.error(f"Conversation generation failed: {e}")
             raise GeminiError(f"Failed to generate conversation: {e}")
 
+    def generate_conversation_response_stream(
+        self,
+        user_input: str,
+        language: str = "en",
+        context: Optional[list] = None,
+    ) -> tuple[AsyncIterator[str], Intent]:
+        """Stream a conversational response for toy interaction.
+
+        The request is sent when the returned iterator is first awaited.
+
+        Args:
+            user_input: What the child said
+            language: Language code ('en' or 'sv')
+            context: Previous conversation messages
+
+        Returns:
+            Tuple of (text_delta_stream, detected_intent)
+        """
+        intent = self._detect_intent(user_input)
+        system_instruction, full_prompt = self._build_conversation_prompt(
+            user_input, language, context)
+
+        stream = self.generate_response_stream(
+            prompt=full_prompt,
+            system_instruction=system_instruction,
+            language=language,
+        )
+        return stream, intent
+
 
 class GeminiError(Exception):
     """Gemini service error."""
@@ -2,9 +2,10 @@
 
 import logging
 import os
-from typing import Optional, Tuple
+from typing import AsyncIterator, Optional, Tuple
 
-from groq import Groq
+import httpx
+from groq import AsyncGroq
 
 from totoyai.models import Intent
 
@@ -12,7 +13,12 @@ logger = logging.getLogger(__name__)
 
 
 class GroqService:
-    """Groq service for fast LLM inference."""
+    """Groq service for fast LLM inference.
+
+    Uses the async client over one pooled HTTP connection pool, so a
+    request waits on the network rather than blocking the event loop,
+    and consecutive requests reuse warm TLS connections.
+    """
 
     def __init__(self, api_key: Optional[str] = None):
         """Initialize Groq service.
@@ -25,11 +31,39 @@ class GroqService:
             logger.warning("GROQ_API_KEY not set, Groq will not work")
             self.client = None
         else:
-            self.client = Groq(api_key=self.api_key)
+            http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    float(os.getenv("GROQ_TIMEOUT_SECONDS", "10")),
+                    connect=float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", "3")),
+                ),
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("GROQ_MAX_CONNECTIONS", "20")),
+                    max_keepalive_connections=int(
+                        os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "10")),
+                    keepalive_expiry=60.0,
+                ),
+            )
+            self.client = AsyncGroq(
+                api_key=self.api_key,
+                http_client=http_client,
+                # Fallback to Gemini is faster than retrying a slow Groq
+                max_retries=int(os.getenv("GROQ_MAX_RETRIES", "1")),
+            )
 
         # Default model - fastest and most capable
         self.model = "llama-3.3-70b-versatile"
 
+    async def warm_up(self) -> None:
+        """Open the HTTPS connection to Groq ahead of the first request."""
+        if not self.client:
+            return
+        await self.client.models.list()
+
+    async def aclose(self) -> None:
+        """Close pooled HTTP connections."""
+        if self.client:
+            await self.client.close()
+
     def _detect_intent(self, user_input: str) -> Intent:
         """Detect user intent from input."""
         user_lower = user_input.lower()
@@ -76,7 +110,7 @@ class GroqService:
             raise GroqError("Groq client not initialized - check API key")
 
         try:
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = await self.client.chat.completions.create(
                 messages=[
                     {"role": "system", "content": system_instruction},
                     {"role": "user", "content": prompt},
@@ -92,24 +126,13 @@ class GroqService:
             logger.error(f"Groq generation failed: {e}")
             raise GroqError(f"Failed to generate response: {e}")
 
-    async def generate_conversation_response(
+    def _build_conversation_prompt(
         self,
         user_input: str,
-        language: str = "en",
+        language: str,
         context: Optional[list] = None,
-    ) -> Tuple[str, Intent]:
-        """Generate conversational response for toy interaction.
-
-        Args:
-            user_input: What the child said
-            language: Language code ('en' or 'sv')
-            context: Previous conversation messages
-
-        Returns:
-            Tuple of (response_text, detected_intent)
-        """
-        intent = self._detect_intent(user_input)
-
+    ) -> Tuple[str, str]:
+        """Build (system_instruction, prompt) for a toy conversation turn."""
         if language == "sv":
             system_instruction = """Du är en vänlig AI-assistent i en gosig leksak som pratar med barn 3-10 år.
 Använd enkelt, varmt och uppmuntrande språk. Håll svaren korta (2-3 meningar).
@@ -132,6 +155,69 @@ Always respond in English."""
         else:
             full_prompt = user_input
 
+        return system_instruction, full_prompt
+
+    async def generate_response_stream(
+        self,
+        prompt: str,
+        system_instruction: str,
+        temperature: float = 0.7,
+        max_tokens: int = 200,
+    ) -> AsyncIterator[str]:
+        """Stream a response from Groq as text deltas.
+
+        Args:
+            prompt: User prompt/question
+            system_instruction: System instruction for behavior
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens to generate
+
+        Yields:
+            Text deltas as the model produces them
+        """
+        if not self.client:
+            raise GroqError("Groq client not initialized - check API key")
+
+        try:
+            stream = await self.client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": system_instruction},
+                    {"role": "user", "content": prompt},
+                ],
+                model=self.model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except Exception as e:
+            logger.error(f"Groq streaming failed: {e}")
+            raise GroqError(f"Failed to stream response: {e}")
+
+    async def generate_conversation_response(
+        self,
+        user_input: str,
+        language: str = "en",
+        context: Optional[list] = None,
+    ) -> Tuple[str, Intent]:
+        """Generate conversational response for toy interaction.
+
+        Args:
+            user_input: What the child said
+            language: Language code ('en' or 'sv')
+            context: Previous conversation messages
+
+        Returns:
+            Tuple of (response_text, detected_intent)
+        """
+        intent = self._detect_intent(user_input)
+        system_instruction, full_prompt = self._build_conversation_prompt(
+            user_input, language, context)
+
         try:
             response = await self.generate_response(
                 prompt=full_prompt,
@@ -145,6 +231,36 @@ Always respond in English."""
             logger.error(f"Conversation generation failed: {e}")
             raise GroqError(f"Failed to generate conversation: {e}")
 
+    def generate_conversation_response_stream(
+        self,
+        user_input: str,
+        language: str = "en",
+        context: Optional[list] = None,
+    ) -> Tuple[AsyncIterator[str], Intent]:
+        """Stream a conversational response for toy interaction.
+
+        The request is sent when the returned iterator is first awaited.
+
+        Args:
+            user_input: What the child said
+            language: Language code ('en' or 'sv')
+            context: Previous conversation messages
+
+        Returns:
+            Tuple of (text_delta_stream, detected_intent)
+        """
+        intent = self._detect_intent(user_input)
+        system_instruction, full_prompt = self._build_conversation_prompt(
+            user_input, language, context)
+
+        stream = self.generate_response_stream(
+            prompt=full_prompt,
+            system_instruction=system_instruction,
+            temperature=0.7,
+            max_tokens=200,
+        )
+        return stream, intent
+
 
 class GroqError(Exception):
     """Groq service error."""
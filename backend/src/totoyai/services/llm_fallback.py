@@ -5,9 +5,10 @@ Provides resilience by trying multiple LLM providers in sequence.
 """
 
 import logging
+import time
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Callable, Awaitable
+from typing import AsyncIterator, Optional, Callable, Awaitable
 
 from totoyai.models import Intent
 from totoyai.services.groq_service import groq_service, GroqError
@@ -15,6 +16,12 @@ from totoyai.services.gemini import gemini_service, GeminiError
 
 logger = logging.getLogger(__name__)
 
+# Spoken when every provider fails
+LLM_FALLBACK_MESSAGES = {
+    "en": "Oops! My brain got a little fuzzy. Can you ask me again?",
+    "sv": "Hoppsan! Mitt huvud blev lite grumligt. Kan du fråga igen?",
+}
+
 
 class LLMProvider(str, Enum):
     """Available LLM providers."""
@@ -36,6 +43,27 @@ class LLMResult:
     fallback_reason: Optional[str] = None
 
 
+@dataclass
+class LLMStreamResult:
+    """Streaming result from LLM generation.
+
+    The provider has already produced its first token when this is
+    returned; ``chunks`` yields that token followed by the rest.
+    """
+
+    chunks: AsyncIterator[str]
+    intent: Intent
+    provider: LLMProvider
+    first_token_ms: float
+    fallback_used: bool = False
+    fallback_reason: Optional[str] = None
+
+
+async def _single_chunk(text: str) -> AsyncIterator[str]:
+    """Wrap a complete text as a one-chunk text stream."""
+    yield text
+
+
 class LLMFallbackService:
     """LLM service with automatic fallback between providers.
 
@@ -123,6 +151,140 @@ class LLMFallbackService:
         else:
             raise ValueError(f"Unknown provider: {provider}")
 
+    def _get_provider_order(self) -> list[LLMProvider]:
+        """Get healthy providers in order of preference."""
+        # Build provider order
+        providers = [self.primary] + self.fallbacks
+
+        # Filter to healthy providers
+        healthy_providers = [
+            p for p in providers if self._is_provider_healthy(p)]
+
+        # If no healthy providers, try all anyway
+        if not healthy_providers:
+            logger.warning("No healthy providers, trying all")
+            healthy_providers = providers
+            # Reset failure counts
+            self._provider_failures = {}
+
+        return healthy_providers
+
+    def _stream_provider(
+        self,
+        provider: LLMProvider,
+        user_input: str,
+        language: str,
+        context: Optional[list] = None,
+    ) -> tuple[AsyncIterator[str], Intent]:
+        """Open a streaming call to a specific LLM provider."""
+        if provider == LLMProvider.GROQ:
+            return groq_service.generate_conversation_response_stream(
+                user_input=user_input, language=language, context=context)
+        elif provider == LLMProvider.GEMINI:
+            return gemini_service.generate_conversation_response_stream(
+                user_input=user_input, language=language, context=context)
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+
+    async def _continue_stream(
+        self,
+        provider: LLMProvider,
+        first_chunk: str,
+        stream: AsyncIterator[str],
+    ) -> AsyncIterator[str]:
+        """Yield the first chunk, then the rest of a provider stream.
+
+        Text already handed out cannot be taken back, so a failure after
+        the first token ends the response instead of switching provider.
+        Closing this stream early closes the provider's stream too, so
+        it stops generating and releases its connection.
+        """
+        try:
+            yield first_chunk
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            self._record_failure(provider)
+            logger.error(f"Provider {provider} failed mid-stream: {e}")
+        finally:
+            await stream.aclose()
+
+    async def generate_response_stream(
+        self,
+        user_input: str,
+        language: str = "sv",
+        context: Optional[list] = None,
+    ) -> LLMStreamResult:
+        """Stream a response with automatic fallback.
+
+        Providers are tried in order until one produces its first token;
+        a provider that errors or returns nothing before then is skipped.
+
+        Args:
+            user_input: User's message
+            language: Language code ('en' or 'sv')
+            context: Previous conversation context
+
+        Returns:
+            LLMStreamResult whose chunks yield text deltas
+        """
+        healthy_providers = self._get_provider_order()
+
+        last_error: Optional[Exception] = None
+        fallback_used = False
+        fallback_reason = None
+
+        for i, provider in enumerate(healthy_providers):
+            start_time = time.time()
+            logger.info(f"Streaming from LLM provider: {provider}")
+            stream, intent = self._stream_provider(
+                provider, user_input, language, context)
+
+            try:
+                first_chunk = await stream.__anext__()
+            except Exception as e:
+                if isinstance(e, StopAsyncIteration):
+                    e = ValueError("empty response")
+                last_error = e
+                self._record_failure(provider)
+                await stream.aclose()
+
+                if i < len(healthy_providers) - 1:
+                    fallback_used = True
+                    fallback_reason = f"{provider} failed: {str(e)[:50]}"
+                    logger.warning(
+                        f"Provider {provider} failed before first token, "
+                        f"trying next: {e}"
+                    )
+                else:
+                    logger.error(f"All providers failed, last error: {e}")
+                continue
+
+            first_token_ms = (time.time() - start_time) * 1000
+            self._record_success(provider)
+            logger.info(
+                f"First token from {provider} in {first_token_ms:.0f}ms")
+
+            return LLMStreamResult(
+                chunks=self._continue_stream(provider, first_chunk, stream),
+                intent=intent,
+                provider=provider,
+                first_token_ms=first_token_ms,
+                fallback_used=fallback_used,
+                fallback_reason=fallback_reason,
+            )
+
+        # All providers failed, speak fallback message
+        return LLMStreamResult(
+            chunks=_single_chunk(
+                LLM_FALLBACK_MESSAGES.get(language, LLM_FALLBACK_MESSAGES["en"])),
+            intent=Intent.GENERAL,
+            provider=self.primary,
+            first_token_ms=0,
+            fallback_used=True,
+            fallback_reason=f"All providers failed: {last_error}",
+        )
+
     async def generate_response(
         self,
         user_input: str,
@@ -139,21 +301,7 @@ class LLMFallbackService:
         Returns:
             LLMResult with response and metadata
         """
-        import time
-
-        # Build provider order
-        providers = [self.primary] + self.fallbacks
-
-        # Filter to healthy providers
-        healthy_providers = [
-            p for p in providers if self._is_provider_healthy(p)]
-
-        # If no healthy providers, try all anyway
-        if not healthy_providers:
-            logger.warning("No healthy providers, trying all")
-            healthy_providers = providers
-            # Reset failure counts
-            self._provider_failures = {}
+        healthy_providers = self._get_provider_order()
 
         last_error = None
         fallback_used = False
@@ -199,13 +347,8 @@ class LLMFallbackService:
                     logger.error(f"All providers failed, last error: {e}")
 
         # All providers failed, return fallback message
-        fallback_messages = {
-            "en": "Oops! My brain got a little fuzzy. Can you ask me again?",
-            "sv": "Hoppsan! Mitt huvud blev lite grumligt. Kan du fråga igen?",
-        }
-
         return LLMResult(
-            text=fallback_messages.get(language, fallback_messages["en"]),
+            text=LLM_FALLBACK_MESSAGES.get(language, LLM_FALLBACK_MESSAGES["en"]),
             intent=Intent.GENERAL,
             provider=self.primary,
             latency_ms=0,
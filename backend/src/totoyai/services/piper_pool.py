@@ -0,0 +1,204 @@
+"""Pool of long-lived Piper processes, one or more per voice model.
+
+Starting ``piper`` per utterance reloads the ONNX voice every time. The
+pool keeps worker processes (see piper_worker) alive, feeds them one
+utterance per line over stdin and reads framed PCM back asynchronously
+as each sentence is synthesized.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import AsyncIterator, Optional
+
+from totoyai.services.piper_worker import FRAME_HEADER
+
+logger = logging.getLogger(__name__)
+
+# Sample rate of Piper's medium-quality voices
+DEFAULT_SAMPLE_RATE = 22050
+
+
+class PiperWorkerError(Exception):
+    """Piper worker failed to synthesize an utterance."""
+
+    pass
+
+
+class PiperProcess:
+    """One worker process serving utterances for a single voice model."""
+
+    def __init__(self, model_path: str):
+        """Initialize process handle (started on first use)."""
+        self.model_path = model_path
+        self.lock = asyncio.Lock()
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self.starts = 0
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    def _command(self) -> list[str]:
+        return [
+            sys.executable, "-m", "totoyai.services.piper_worker",
+            "--model", self.model_path,
+        ]
+
+    async def _ensure_started(self) -> asyncio.subprocess.Process:
+        if not self.running:
+            self._process = await asyncio.create_subprocess_exec(
+                *self._command(),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+            )
+            self.starts += 1
+            logger.info(
+                f"Started Piper worker for {os.path.basename(self.model_path)} "
+                f"(pid {self._process.pid})"
+            )
+        return self._process
+
+    async def synthesize(self, text: str) -> AsyncIterator[bytes]:
+        """Synthesize one utterance, yielding PCM as it is produced.
+
+        The caller must hold ``lock``. If the stream is abandoned before
+        the end-of-utterance frame, the process is killed so the next
+        utterance does not read stale audio.
+        """
+        process = await self._ensure_started()
+        finished = False
+        try:
+            line = " ".join(text.split()) + "\n"
+            process.stdin.write(line.encode("utf-8"))
+            await process.stdin.drain()
+
+            while True:
+                header = await process.stdout.readexactly(FRAME_HEADER.size)
+                (length,) = FRAME_HEADER.unpack(header)
+                if length == 0:
+                    finished = True
+                    return
+                if length < 0:
+                    message = await process.stdout.readexactly(-length)
+                    finished = True
+                    raise PiperWorkerError(message.decode("utf-8", "replace"))
+                yield await process.stdout.readexactly(length)
+
+        except (asyncio.IncompleteReadError, BrokenPipeError, ConnectionResetError) as e:
+            raise PiperWorkerError(f"Piper worker exited: {e!r}")
+        finally:
+            if not finished:
+                await self.stop()
+
+    async def stop(self) -> None:
+        """Stop the process; it is restarted on next use."""
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+class PiperWorkerPool:
+    """Long-lived Piper processes keyed by voice model."""
+
+    def __init__(self, model_dir: str, processes_per_voice: int = 1):
+        """Initialize pool.
+
+        Args:
+            model_dir: Directory containing ``<voice>.onnx`` models
+            processes_per_voice: Worker processes per voice model
+        """
+        self.model_dir = model_dir
+        self.processes_per_voice = max(1, processes_per_voice)
+        self._voices: dict[str, list[PiperProcess]] = {}
+        self._next: dict[str, int] = {}
+        self._sample_rates: dict[str, int] = {}
+
+        # Metrics
+        self._utterances = 0
+        self._failures = 0
+
+    def model_path(self, voice_model: str) -> str:
+        return os.path.join(self.model_dir, f"{voice_model}.onnx")
+
+    def sample_rate(self, voice_model: str) -> int:
+        """Output sample rate of a voice, from its ``.onnx.json`` config."""
+        if voice_model not in self._sample_rates:
+            try:
+                with open(f"{self.model_path(voice_model)}.json") as f:
+                    rate = int(json.load(f)["audio"]["sample_rate"])
+            except (OSError, KeyError, ValueError):
+                rate = DEFAULT_SAMPLE_RATE
+            self._sample_rates[voice_model] = rate
+        return self._sample_rates[voice_model]
+
+    def _pick(self, voice_model: str) -> PiperProcess:
+        """Pick an idle process for the voice, else the next in turn."""
+        processes = self._voices.get(voice_model)
+        if processes is None:
+            path = self.model_path(voice_model)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Piper voice model not found: {path}")
+            processes = [
+                PiperProcess(path) for _ in range(self.processes_per_voice)]
+            self._voices[voice_model] = processes
+            self._next[voice_model] = 0
+
+        for process in processes:
+            if not process.lock.locked():
+                return process
+        index = self._next[voice_model]
+        self._next[voice_model] = (index + 1) % len(processes)
+        return processes[index]
+
+    async def synthesize(self, voice_model: str, text: str) -> AsyncIterator[bytes]:
+        """Synthesize text with a pooled process for the voice.
+
+        Args:
+            voice_model: Voice model name, e.g. "sv_SE-nst-medium"
+            text: Text to speak
+
+        Yields:
+            Raw 16-bit mono PCM chunks, roughly one per sentence
+
+        Raises:
+            FileNotFoundError: If the voice model is not installed
+            PiperWorkerError: If the worker fails
+        """
+        process = self._pick(voice_model)
+        async with process.lock:
+            self._utterances += 1
+            stream = process.synthesize(text)
+            try:
+                async for chunk in stream:
+                    yield chunk
+            except PiperWorkerError:
+                self._failures += 1
+                raise
+            finally:
+                # Close explicitly so an abandoned utterance stops the
+                # process while the lock is still held
+                await stream.aclose()
+
+    async def aclose(self) -> None:
+        """Stop all worker processes."""
+        await asyncio.gather(*[
+            process.stop()
+            for processes in self._voices.values()
+            for process in processes
+        ])
+
+    def get_metrics(self) -> dict:
+        """Get pool metrics."""
+        processes = [p for ps in self._voices.values() for p in ps]
+        return {
+            "voices": sorted(self._voices),
+            "processes": len(processes),
+            "running": sum(p.running for p in processes),
+            "starts": sum(p.starts for p in processes),
+            "utterances": self._utterances,
+            "failed": self._failures,
+        }
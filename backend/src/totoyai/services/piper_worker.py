@@ -0,0 +1,82 @@
+"""Long-lived Piper TTS worker process.
+
+Loads one ONNX voice model once and then synthesizes utterances read
+from stdin, one UTF-8 line per utterance. Audio is written to stdout as
+it is produced, in length-prefixed frames:
+
+- ``n > 0``: n bytes of raw 16-bit mono PCM follow
+- ``0``: end of the utterance
+- ``n < 0``: utterance failed; -n bytes of UTF-8 error message follow
+
+Run as ``python -m totoyai.services.piper_worker --model voice.onnx``.
+"""
+
+import argparse
+import os
+import struct
+import sys
+from typing import BinaryIO, Callable, Iterator
+
+FRAME_HEADER = struct.Struct(">i")
+
+
+def load_voice(model_path: str) -> Callable[[str], Iterator[bytes]]:
+    """Load a Piper voice and return a text -> PCM chunks function.
+
+    Supports both the piper-tts 1.2 API (synthesize_stream_raw) and the
+    1.3 API (synthesize yielding AudioChunk objects).
+    """
+    from piper import PiperVoice
+
+    voice = PiperVoice.load(model_path)
+
+    if hasattr(voice, "synthesize_stream_raw"):
+        return voice.synthesize_stream_raw
+
+    def synthesize(text: str) -> Iterator[bytes]:
+        for chunk in voice.synthesize(text):
+            yield chunk.audio_int16_bytes
+
+    return synthesize
+
+
+def serve(
+    synthesize: Callable[[str], Iterator[bytes]],
+    stdin: BinaryIO,
+    stdout: BinaryIO,
+) -> None:
+    """Synthesize each input line and write framed audio until EOF."""
+    for line in stdin:
+        text = line.decode("utf-8", errors="replace").strip()
+        try:
+            if text:
+                for audio in synthesize(text):
+                    if audio:
+                        stdout.write(FRAME_HEADER.pack(len(audio)))
+                        stdout.write(audio)
+                        stdout.flush()
+            stdout.write(FRAME_HEADER.pack(0))
+        except Exception as e:
+            message = repr(e).encode("utf-8")
+            stdout.write(FRAME_HEADER.pack(-len(message)))
+            stdout.write(message)
+        stdout.flush()
+
+
+def main() -> None:
+    """Worker entry point."""
+    parser = argparse.ArgumentParser(description="Piper TTS worker")
+    parser.add_argument("--model", required=True, help="Path to .onnx voice")
+    args = parser.parse_args()
+
+    # Keep the protocol stream private: anything the libraries print
+    # goes to stderr instead of corrupting the audio frames
+    stdout = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    synthesize = load_voice(args.model)
+    serve(synthesize, sys.stdin.buffer, stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Incremental sentence segmentation for streaming TTS.
+
+Splits LLM output into speakable chunks while it is still being
+generated. Each character is scanned once (apart from a few characters
+of look-ahead at a possible boundary), punctuation is kept for Edge TTS
+prosody, and abbreviations and numbers such as "t.ex." or "2.5" are not
+mistaken for sentence ends.
+"""
+
+from typing import Optional
+
+SENTENCE_END = ".!?…"
+CLAUSE_END = ",;:"
+# Closing quotes/brackets that belong to the sentence they end
+CLOSERS = "\"')]»”’"
+
+ABBREVIATIONS = {
+    "sv": {
+        "bl.a", "ca", "d.v.s", "dvs", "e.d", "el", "etc", "f.d", "fr.o.m",
+        "kl", "m.fl", "m.m", "mm", "nr", "o.d", "o.s.v", "osv", "p.g.a",
+        "pga", "resp", "s.k", "st", "t.ex", "tex", "t.o.m", "tr", "vs",
+    },
+    "en": {
+        "dr", "e.g", "etc", "i.e", "jr", "mr", "mrs", "ms", "no", "prof",
+        "sr", "st", "vs",
+    },
+}
+
+
+class SentenceSegmenter:
+    """Streaming segmenter that turns text deltas into TTS chunks.
+
+    Chunking targets:
+    - The first chunk is flushed at the first sentence end, or earlier
+      at a clause break ("," ";" ":") once it is ``first_chunk_chars``
+      long, so the first audio starts as early as possible.
+    - Later chunks gather whole sentences until they are at least
+      ``chunk_chars`` long, so fewer, larger TTS requests are made.
+    - Any chunk growing past ``max_chunk_chars`` without a sentence end
+      is cut at the last clause or word break.
+    """
+
+    def __init__(
+        self,
+        language: str = "sv",
+        first_chunk_chars: Optional[int] = 40,
+        chunk_chars: int = 120,
+        max_chunk_chars: int = 250,
+    ):
+        """Initialize segmenter.
+
+        Args:
+            language: Language code for abbreviation rules
+            first_chunk_chars: Early clause flush for the first chunk
+                (None disables it)
+            chunk_chars: Minimum size of later chunks (0 = one sentence each)
+            max_chunk_chars: Hard upper bound on chunk size
+        """
+        self.abbreviations = ABBREVIATIONS.get(language, set()) | ABBREVIATIONS["en"]
+        self.first_chunk_chars = first_chunk_chars
+        self.chunk_chars = chunk_chars
+        self.max_chunk_chars = max_chunk_chars
+
+        # Pending (not yet emitted) text; only this tail is ever copied
+        self._text = ""
+        # Next index in _text to scan
+        self._pos = 0
+        # Ends of the last sentence and clause breaks seen in _text
+        self._sentence_end = 0
+        self._clause_end = 0
+        self._emitted = 0
+        self._chunks: list[str] = []
+
+    def feed(self, delta: str) -> list[str]:
+        """Add a text delta and return any chunks that are complete.
+
+        Args:
+            delta: New text from the LLM
+
+        Returns:
+            Chunks ready for synthesis, in order
+        """
+        self._text += delta
+        text = self._text
+        i = self._pos
+
+        while i < len(text):
+            char = text[i]
+            next_i = i + 1
+            pending = len(self._text)
+
+            if char in SENTENCE_END:
+                end = next_i
+                while end < len(text) and (
+                    text[end] in SENTENCE_END or text[end] in CLOSERS
+                ):
+                    end += 1
+                after = end
+                while after < len(text) and text[after].isspace():
+                    after += 1
+                if after == len(text):
+                    # Need to see what follows before deciding
+                    break
+                next_i = end
+                # "2.5" (no space) and "t.ex. en" are not sentence ends
+                if after > end and not self._continues_sentence(text, i, after):
+                    self._on_sentence_end(end)
+
+            elif char == "\n":
+                self._on_sentence_end(next_i)
+
+            elif char in CLAUSE_END:
+                if next_i == len(text):
+                    break
+                if text[next_i].isspace():
+                    self._on_clause_end(next_i)
+
+            if len(self._text) == pending and next_i > self.max_chunk_chars:
+                self._cut_oversized(next_i)
+
+            # Emitted text is dropped from the front of the buffer
+            i = next_i - (pending - len(self._text))
+            text = self._text
+
+        self._pos = i
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text remains at the end of the stream."""
+        chunk = self._text.strip()
+        self._text = ""
+        self._pos = self._sentence_end = self._clause_end = 0
+        if chunk:
+            self._emitted += 1
+        return chunk or None
+
+    def _continues_sentence(self, text: str, dot: int, after: int) -> bool:
+        """Check whether punctuation followed by space is inside a sentence."""
+        # Lowercase continuation: "ca. fem", '"Ja!" sa han'
+        if text[after].islower():
+            return True
+        if text[dot] != ".":
+            return False
+
+        start = dot
+        while start > 0 and (text[start - 1].isalnum() or text[start - 1] == "."):
+            start -= 1
+        token = text[start:dot]
+        if not token:
+            return False
+        # Single capital initials: "J. K. Rowling"
+        if len(token) == 1 and token.isupper():
+            return True
+        return token.lower() in self.abbreviations
+
+    def _emit(self, end: int) -> None:
+        """Emit pending text up to end and keep the rest."""
+        chunk = self._text[:end].strip()
+        self._text = self._text[end:]
+        self._sentence_end = self._clause_end = 0
+        if chunk:
+            self._emitted += 1
+            self._chunks.append(chunk)
+
+    def _on_sentence_end(self, end: int) -> None:
+        """Handle a sentence boundary at end; emit if the target is met."""
+        target = 0 if self._emitted == 0 else self.chunk_chars
+        if end >= target:
+            self._emit(end)
+        else:
+            self._sentence_end = end
+
+    def _on_clause_end(self, end: int) -> None:
+        """Handle a clause boundary at end; emit an early first chunk."""
+        if (
+            self._emitted == 0
+            and self.first_chunk_chars is not None
+            and end >= self.first_chunk_chars
+        ):
+            self._emit(end)
+        else:
+            self._clause_end = end
+
+    def _cut_oversized(self, scanned: int) -> None:
+        """Cut a chunk that grew past max_chunk_chars."""
+        end = self._sentence_end or self._clause_end
+        if not end:
+            end = self._text.rfind(" ", 0, scanned) + 1
+        if not end:
+            end = scanned
+        self._emit(end)
@@ -7,11 +7,16 @@ Reduces perceived latency by starting audio playback before full response.
 import asyncio
 import logging
 import os
-import re
 from typing import AsyncIterator, Optional
 
 import edge_tts
 
+from totoyai.models.audio import AudioProfile
+from totoyai.services.audio_format import EDGE_AUDIO, mp3_unit_length, transcode
+from totoyai.services.content_filter import StreamingContentFilter, get_redirect_phrase
+from totoyai.services.sentence_segmenter import SentenceSegmenter
+from totoyai.services.tts_cache import tts_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,23 +41,31 @@ class StreamingTTSService:
         }
         self.rate = os.getenv("TTS_RATE", "-10%")
 
-        # Sentence splitting patterns
-        self.sentence_pattern = re.compile(r'[.!?]+\s*')
+        # Sentences synthesized concurrently ahead of playback
+        self.lookahead = int(os.getenv("TTS_LOOKAHEAD", "3"))
+
+        # Chunk size targets for LLM-driven TTS (see SentenceSegmenter)
+        self.first_chunk_chars = int(os.getenv("TTS_FIRST_CHUNK_CHARS", "40"))
+        self.chunk_chars = int(os.getenv("TTS_CHUNK_CHARS", "120"))
 
-    def _split_into_sentences(self, text: str) -> list[str]:
+    def _split_into_sentences(self, text: str, language: str = "sv") -> list[str]:
         """Split text into sentences for streaming.
 
+        Punctuation is kept so TTS gets the right intonation.
+
         Args:
             text: Full text to split
+            language: Language code for abbreviation rules
 
         Returns:
             List of sentences
         """
-        # Split on sentence endings
-        sentences = self.sentence_pattern.split(text)
-
-        # Filter empty and clean up
-        sentences = [s.strip() for s in sentences if s.strip()]
+        segmenter = SentenceSegmenter(
+            language, first_chunk_chars=None, chunk_chars=0)
+        sentences = segmenter.feed(text)
+        remainder = segmenter.flush()
+        if remainder:
+            sentences.append(remainder)
 
         # If no sentences found, return whole text
         if not sentences:
@@ -64,25 +77,36 @@ class StreamingTTSService:
         self,
         text: str,
         language: str = "sv",
+        profile: Optional[AudioProfile] = None,
     ) -> AsyncIterator[bytes]:
         """Stream audio chunks for text.
 
         Args:
             text: Text to convert to speech
             language: Language code
+            profile: Device audio profile (default: Edge's 24 kHz MP3)
 
         Yields:
             Audio chunks as bytes
         """
         voice = self.voices.get(language, self.voices["en"])
+        # Cached audio is already in the device's format
+        key = tts_cache.make_key(
+            text, voice, self.rate, (profile or EDGE_AUDIO).name)
 
-        try:
+        async def edge_stream() -> AsyncIterator[bytes]:
             communicate = edge_tts.Communicate(text, voice, rate=self.rate)
-
             async for chunk in communicate.stream():
                 if chunk["type"] == "audio":
                     yield chunk["data"]
 
+        def synthesize() -> AsyncIterator[bytes]:
+            return transcode(edge_stream(), EDGE_AUDIO, profile)
+
+        try:
+            async for chunk in tts_cache.stream(key, synthesize):
+                yield chunk
+
         except Exception as e:
             logger.error(f"Streaming TTS failed: {e}")
             raise TTSStreamError(f"Failed to stream TTS: {e}")
@@ -91,101 +115,262 @@ class StreamingTTSService:
         self,
         text: str,
         language: str = "sv",
+        lookahead: Optional[int] = None,
+        profile: Optional[AudioProfile] = None,
     ) -> AsyncIterator[tuple[str, bytes]]:
         """Stream audio sentence by sentence.
 
-        Useful for displaying text while playing audio.
+        Useful for displaying text while playing audio. Up to
+        ``lookahead`` sentences are synthesized concurrently, so a long
+        story costs roughly one TTS round trip of extra latency rather
+        than one per sentence.
 
         Args:
             text: Full text to convert
             language: Language code
+            lookahead: Sentences synthesized concurrently (default TTS_LOOKAHEAD)
+            profile: Device audio profile (default: Edge's 24 kHz MP3)
 
         Yields:
             Tuples of (sentence_text, audio_bytes)
         """
-        sentences = self._split_into_sentences(text)
-
-        for sentence in sentences:
-            if not sentence:
-                continue
-
+        async def sentence_source() -> AsyncIterator[str]:
+            for sentence in self._split_into_sentences(text, language):
+                if sentence:
+                    yield sentence
+
+        async for sentence, chunks in self._synthesize_ahead(
+            sentence_source(), language, lookahead, profile
+        ):
             try:
                 # Collect audio for this sentence
-                audio_chunks = []
-                async for chunk in self.synthesize_streaming(sentence, language):
-                    audio_chunks.append(chunk)
-
-                audio_data = b"".join(audio_chunks)
+                audio_data = b"".join([chunk async for chunk in chunks])
                 yield (sentence, audio_data)
 
             except Exception as e:
                 logger.error(f"Failed to synthesize sentence: {e}")
                 continue
 
+    async def _sentences_from_llm(
+        self,
+        llm_stream: AsyncIterator[str],
+        language: str,
+        first_chunk_chars: Optional[int],
+        chunk_chars: int,
+    ) -> AsyncIterator[str]:
+        """Group LLM text deltas into chunks ready for TTS.
+
+        Each delta is scanned once by an incremental segmenter, so this
+        stays linear in the length of the response.
+        """
+        segmenter = SentenceSegmenter(
+            language,
+            first_chunk_chars=first_chunk_chars,
+            chunk_chars=chunk_chars,
+        )
+
+        async for text_chunk in llm_stream:
+            for sentence in segmenter.feed(text_chunk):
+                yield sentence
+
+        # Flush remaining buffer
+        remainder = segmenter.flush()
+        if remainder:
+            yield remainder
+
+    async def _safe_text(
+        self,
+        llm_stream: AsyncIterator[str],
+        content_filter: StreamingContentFilter,
+    ) -> AsyncIterator[str]:
+        """Pass on LLM text once the content filter has cleared it.
+
+        Stops reading the LLM (and closes its stream) at the first match.
+        """
+        try:
+            async for delta in llm_stream:
+                text = content_filter.feed(delta)
+                if content_filter.match is not None:
+                    return
+                if text:
+                    yield text
+            text = content_filter.flush()
+            if text:
+                yield text
+        finally:
+            if content_filter.match is not None and hasattr(llm_stream, "aclose"):
+                await llm_stream.aclose()
+
     async def synthesize_with_llm_streaming(
         self,
         llm_stream: AsyncIterator[str],
         language: str = "sv",
-        min_chunk_size: int = 50,
+        first_chunk_chars: Optional[int] = None,
+        chunk_chars: Optional[int] = None,
+        lookahead: Optional[int] = None,
+        profile: Optional[AudioProfile] = None,
+        content_filter: Optional[StreamingContentFilter] = None,
     ) -> AsyncIterator[bytes]:
         """Stream TTS as LLM generates text.
 
         This is the most advanced mode - starts TTS as soon as
-        we have enough text from the LLM.
+        we have enough text from the LLM, and synthesizes later
+        sentences while earlier ones are still being sent. A sentence
+        that fails to synthesize is logged and skipped.
+
+        Sentences are synthesized in Edge's native format and the whole
+        response is converted to ``profile`` by one ffmpeg process, so
+        the device receives one continuous stream rather than one Ogg or
+        MP3 stream per sentence.
+
+        Text passes through a content filter on its way to TTS, so only
+        checked text is ever synthesized. If the filter finds a blocked
+        word, synthesis stops at once and the redirect phrase is spoken
+        instead of the rest of the response.
 
         Args:
             llm_stream: Async iterator yielding text chunks from LLM
             language: Language code
-            min_chunk_size: Minimum characters before starting TTS
+            first_chunk_chars: Flush the first chunk at a clause break once
+                this long (default TTS_FIRST_CHUNK_CHARS)
+            chunk_chars: Minimum size of later chunks (default TTS_CHUNK_CHARS)
+            lookahead: Sentences synthesized concurrently (default TTS_LOOKAHEAD)
+            profile: Device audio profile (default: Edge's 24 kHz MP3)
+            content_filter: Filter for the response, for callers that need
+                its ``match`` afterwards (default: a new one for language)
 
         Yields:
             Audio chunks
         """
-        buffer = ""
-
-        async for text_chunk in llm_stream:
-            buffer += text_chunk
-
-            # Check if we have a complete sentence
-            sentences = self._split_into_sentences(buffer)
-
-            if len(sentences) > 1:
-                # We have at least one complete sentence
-                complete_sentence = sentences[0]
-                buffer = " ".join(sentences[1:])
-
-                # Generate TTS for complete sentence
+        if content_filter is None:
+            content_filter = StreamingContentFilter(language)
+
+        sentences = self._sentences_from_llm(
+            self._safe_text(llm_stream, content_filter),
+            language,
+            first_chunk_chars=(
+                self.first_chunk_chars if first_chunk_chars is None
+                else first_chunk_chars
+            ),
+            chunk_chars=self.chunk_chars if chunk_chars is None else chunk_chars,
+        )
+
+        async def edge_audio() -> AsyncIterator[bytes]:
+            ahead = self._synthesize_ahead(sentences, language, lookahead)
+            try:
+                async for _, chunks in ahead:
+                    try:
+                        async for audio_chunk in chunks:
+                            if content_filter.match is not None:
+                                break
+                            yield audio_chunk
+                    except Exception as e:
+                        # Skip the sentence; the rest of the response still plays
+                        logger.error(f"Failed to synthesize sentence: {e}")
+                    if content_filter.match is not None:
+                        break
+            finally:
+                # Cancels synthesis still in flight
+                await ahead.aclose()
+
+            if content_filter.match is not None:
                 async for audio_chunk in self.synthesize_streaming(
-                    complete_sentence, language
+                    get_redirect_phrase(language), language
                 ):
                     yield audio_chunk
 
-            elif len(buffer) >= min_chunk_size and buffer.endswith((" ", ",")):
-                # Buffer is getting long, flush it
-                async for audio_chunk in self.synthesize_streaming(
-                    buffer.strip(), language
+        # One conversion for the whole response: a single ffmpeg process
+        # and a single continuous stream in the device's format
+        async for audio_chunk in transcode(edge_audio(), EDGE_AUDIO, profile):
+            yield audio_chunk
+
+    async def _synthesize_ahead(
+        self,
+        sentences: AsyncIterator[str],
+        language: str,
+        lookahead: Optional[int] = None,
+        profile: Optional[AudioProfile] = None,
+    ) -> AsyncIterator[tuple[str, AsyncIterator[bytes]]]:
+        """Synthesize up to ``lookahead`` sentences at once, in order.
+
+        A background feeder pulls sentences and starts a synthesis task
+        for each while earlier sentences are still being consumed. At
+        most ``lookahead`` sentences are in flight or buffered at a time,
+        which caps memory on long stories.
+
+        Yields:
+            Tuples of (sentence, audio_chunks) in sentence order. The
+            current sentence's chunks stream live as they arrive; a
+            synthesis failure is raised when its chunks are read.
+        """
+        slots = asyncio.Semaphore(max(1, lookahead or self.lookahead))
+        ready: asyncio.Queue = asyncio.Queue()
+        tasks: set[asyncio.Task] = set()
+
+        async def produce(sentence: str, audio: asyncio.Queue) -> None:
+            try:
+                async for chunk in self.synthesize_streaming(
+                    sentence, language, profile
                 ):
-                    yield audio_chunk
-                buffer = ""
+                    audio.put_nowait(chunk)
+                audio.put_nowait(None)
+            except Exception as e:
+                audio.put_nowait(e)
 
-        # Flush remaining buffer
-        if buffer.strip():
-            async for audio_chunk in self.synthesize_streaming(
-                buffer.strip(), language
-            ):
-                yield audio_chunk
+        async def feed() -> None:
+            try:
+                async for sentence in sentences:
+                    await slots.acquire()
+                    audio: asyncio.Queue = asyncio.Queue()
+                    task = asyncio.create_task(produce(sentence, audio))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    ready.put_nowait((sentence, audio))
+                ready.put_nowait(None)
+            except Exception as e:
+                ready.put_nowait(e)
+
+        async def drain(audio: asyncio.Queue) -> AsyncIterator[bytes]:
+            while True:
+                item = await audio.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        feeder = asyncio.create_task(feed())
+        try:
+            while True:
+                item = await ready.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+
+                sentence, audio = item
+                try:
+                    yield sentence, drain(audio)
+                finally:
+                    slots.release()
+        finally:
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(feeder, *tasks, return_exceptions=True)
 
     async def synthesize_to_bytes(
         self,
         text: str,
         language: str = "sv",
+        profile: Optional[AudioProfile] = None,
     ) -> bytes:
         """Convert text to complete audio bytes.
 
         Non-streaming version for compatibility.
         """
         chunks = []
-        async for chunk in self.synthesize_streaming(text, language):
+        async for chunk in self.synthesize_streaming(text, language, profile):
             chunks.append(chunk)
         return b"".join(chunks)
 
@@ -213,17 +398,33 @@ class TTSStreamError(Exception):
 class AudioChunkBuffer:
     """Buffer for managing audio chunks in streaming.
 
-    Useful for the hardware side to manage playback.
+    Useful for the hardware side to manage playback. Incoming data is
+    appended to one growing buffer and consumed by advancing an offset,
+    so emitting a chunk copies only that chunk; consumed space is
+    reclaimed once it makes up more than half the buffer.
+
+    With ``frame_aligned=True`` the input is treated as MP3 and chunks
+    end on frame boundaries (at most ``chunk_size`` bytes, unless one
+    frame is larger), so every chunk can be decoded on its own.
     """
 
-    def __init__(self, chunk_size: int = 4096):
+    def __init__(self, chunk_size: int = 4096, frame_aligned: bool = False):
         """Initialize buffer.
 
         Args:
             chunk_size: Size of chunks to yield
+            frame_aligned: Never split MP3 frames across chunks
         """
         self.chunk_size = chunk_size
+        self.frame_aligned = frame_aligned
         self._buffer = bytearray()
+        # Start of unconsumed data in _buffer
+        self._start = 0
+        # Frame-aligned mode: end of the last complete frame scanned
+        self._scan = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer) - self._start
 
     def add(self, data: bytes) -> list[bytes]:
         """Add data to buffer and return complete chunks.
@@ -236,12 +437,14 @@ class AudioChunkBuffer:
         """
         self._buffer.extend(data)
 
-        chunks = []
-        while len(self._buffer) >= self.chunk_size:
-            chunk = bytes(self._buffer[:self.chunk_size])
-            self._buffer = self._buffer[self.chunk_size:]
-            chunks.append(chunk)
+        if self.frame_aligned:
+            chunks = self._take_frames()
+        else:
+            chunks = []
+            while len(self) >= self.chunk_size:
+                chunks.append(self._take(self._start + self.chunk_size))
 
+        self._compact()
         return chunks
 
     def flush(self) -> Optional[bytes]:
@@ -250,11 +453,51 @@ class AudioChunkBuffer:
         Returns:
             Remaining data or None if empty
         """
-        if self._buffer:
-            data = bytes(self._buffer)
-            self._buffer = bytearray()
-            return data
-        return None
+        data = self._take(len(self._buffer)) if len(self) else None
+        self._buffer = bytearray()
+        self._start = self._scan = 0
+        return data
+
+    def _take(self, end: int) -> bytes:
+        """Consume and return the bytes from the current start to end."""
+        with memoryview(self._buffer) as view:
+            chunk = view[self._start:end].tobytes()
+        self._start = end
+        return chunk
+
+    def _take_frames(self) -> list[bytes]:
+        """Consume whole MP3 frames in chunks of up to chunk_size."""
+        chunks = []
+        buffer = self._buffer
+        pos = max(self._scan, self._start)
+
+        while True:
+            length = mp3_unit_length(buffer, pos)
+            if length is None:
+                break
+            if length == 0:
+                # Not a frame header: resync at the next possible one,
+                # keeping the skipped bytes in the current chunk
+                next_sync = buffer.find(b"\xff", pos + 1)
+                length = (next_sync if next_sync != -1 else len(buffer)) - pos
+            if pos + length > len(buffer):
+                break
+
+            if pos + length - self._start > self.chunk_size and pos > self._start:
+                chunks.append(self._take(pos))
+            pos += length
+            if pos - self._start >= self.chunk_size:
+                chunks.append(self._take(pos))
+
+        self._scan = pos
+        return chunks
+
+    def _compact(self) -> None:
+        """Drop consumed bytes once they are most of the buffer."""
+        if self._start and self._start * 2 >= len(self._buffer):
+            del self._buffer[:self._start]
+            self._scan -= self._start
+            self._start = 0
 
 
 # Global streaming TTS service
@@ -1,17 +1,38 @@
 """Speech-to-Text service using Whisper."""
 
+import asyncio
 import base64
-import io
 import logging
+import os
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Union
+
+from totoyai.services.stt_batcher import STTBatcher
+from totoyai.services.stt_pool import STTWorkerPool
+from totoyai.services.vad import detect_speech
 
 logger = logging.getLogger(__name__)
 
+# Any buffer holding raw 16-bit PCM; memoryviews are read without copying
+AudioBuffer = Union[bytes, bytearray, memoryview]
+
 # Whisper model will be loaded lazily
 _whisper_model = None
 
 
+def pcm16_to_float32(audio_data: AudioBuffer):
+    """Convert 16-bit PCM to float32 samples in [-1, 1].
+
+    Reads the buffer in place and allocates exactly one float array:
+    the int16 view costs nothing and normalization happens in place.
+    """
+    import numpy as np
+
+    audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32)
+    audio_array *= 1.0 / 32768.0
+    return audio_array
+
+
 @dataclass
 class TranscriptResult:
     """Result from STT transcription."""
@@ -19,15 +40,56 @@ class TranscriptResult:
     text: str
     confidence: float
     language: str
+    speech_detected: bool = True
+    trimmed_seconds: float = 0.0  # Silence cut by VAD before decoding
 
 
 class STTService:
-    """Speech-to-Text service using OpenAI Whisper."""
+    """Speech-to-Text service using OpenAI Whisper.
+
+    Inference runs in a pool of worker processes (``STT_WORKERS``,
+    default 1) so a decode never blocks the event loop. With
+    ``STT_WORKERS=0`` the model is loaded in-process and run on a thread,
+    which is simpler for development but shares the GIL with the API.
 
-    def __init__(self, model_name: str = "base"):
-        """Initialize STT service with specified model."""
+    Clips arriving while a decode runs are collected for up to
+    ``STT_BATCH_WINDOW_MS`` and decoded together (up to
+    ``STT_MAX_BATCH_SIZE``); a window of 0 disables batching.
+
+    Leading/trailing silence is trimmed before decoding and clips with no
+    speech are rejected without running Whisper (``STT_VAD_ENABLED``).
+    """
+
+    def __init__(self, model_name: str = "base", workers: Optional[int] = None):
+        """Initialize STT service with specified model.
+
+        Args:
+            model_name: Whisper model name
+            workers: Worker processes (default from env STT_WORKERS)
+        """
         self.model_name = model_name
+        self.language = "en"
+        self.workers = (
+            int(os.getenv("STT_WORKERS", "1")) if workers is None else workers
+        )
+        self.vad_enabled = os.getenv("STT_VAD_ENABLED", "true").lower() == "true"
         self._model = None
+        self._vad_rejected = 0
+        self._vad_trimmed_seconds = 0.0
+        self._pool = (
+            STTWorkerPool(model_name, self.workers) if self.workers > 0 else None
+        )
+
+        batch_window_ms = float(os.getenv("STT_BATCH_WINDOW_MS", "25"))
+        self._batcher = (
+            STTBatcher(
+                self._pool,
+                window_ms=batch_window_ms,
+                max_batch_size=int(os.getenv("STT_MAX_BATCH_SIZE", "8")),
+            )
+            if self._pool is not None and batch_window_ms > 0
+            else None
+        )
 
     def _load_model(self):
         """Lazy load Whisper model."""
@@ -39,49 +101,122 @@ class STTService:
             _whisper_model = whisper.load_model(self.model_name)
         self._model = _whisper_model
 
+    def _transcribe_inline(self, audio_array) -> dict:
+        """Run Whisper in the current process (blocking)."""
+        import torch
+
+        if self._model is None:
+            self._load_model()
+
+        result = self._model.transcribe(
+            audio_array,
+            language=self.language,
+            fp16=torch.cuda.is_available(),
+        )
+        return {
+            "text": result["text"].strip(),
+            "language": result.get("language", self.language),
+        }
+
+    def start(self) -> None:
+        """Start STT workers ahead of the first request."""
+        if self._pool is not None:
+            self._pool.start()
+        elif self._model is None:
+            self._load_model()
+
+    async def warm_up(self) -> None:
+        """Load the model and run a dummy decode on every worker.
+
+        The first real Whisper call pays for weight loading and kernel
+        setup; this moves that cost to startup. VAD is bypassed since
+        the dummy clip is silence.
+        """
+        import numpy as np
+
+        silence = np.zeros(16000, dtype=np.float32)
+        if self._pool is not None:
+            await asyncio.gather(*[
+                self._pool.transcribe(silence, self.language)
+                for _ in range(self.workers)
+            ])
+        else:
+            await asyncio.to_thread(self._transcribe_inline, silence)
+
+    def shutdown(self) -> None:
+        """Stop STT worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+
     async def transcribe(
         self,
-        audio_data: bytes,
+        audio_data: AudioBuffer,
         sample_rate: int = 16000,
     ) -> TranscriptResult:
         """Convert audio to text.
 
         Args:
-            audio_data: Raw audio bytes
+            audio_data: Raw 16-bit PCM audio (bytes, bytearray or memoryview)
             sample_rate: Audio sample rate (default 16kHz)
 
         Returns:
             TranscriptResult with transcribed text
         """
-        if self._model is None:
-            self._load_model()
-
         try:
-            import numpy as np
-            import torch
-
-            # Convert bytes to numpy array
-            audio_array = np.frombuffer(
-                audio_data, dtype=np.int16).astype(np.float32)
-            audio_array = audio_array / 32768.0  # Normalize to [-1, 1]
-
-            # Transcribe
-            result = self._model.transcribe(
-                audio_array,
-                language="en",
-                fp16=torch.cuda.is_available(),
-            )
+            audio_array = pcm16_to_float32(audio_data)
+
+            trimmed_seconds = 0.0
+            if self.vad_enabled:
+                vad = detect_speech(audio_array, sample_rate)
+                trimmed_seconds = vad.trimmed_seconds
+                self._vad_trimmed_seconds += trimmed_seconds
+                if not vad.speech_detected:
+                    self._vad_rejected += 1
+                    logger.info(
+                        f"No speech in {trimmed_seconds:.2f}s clip, skipping STT")
+                    return TranscriptResult(
+                        text="",
+                        confidence=0.0,
+                        language=self.language,
+                        speech_detected=False,
+                        trimmed_seconds=trimmed_seconds,
+                    )
+                audio_array = audio_array[vad.start:vad.end]
+
+            if self._batcher is not None:
+                result = await self._batcher.transcribe(audio_array, self.language)
+            elif self._pool is not None:
+                result = await self._pool.transcribe(audio_array, self.language)
+            else:
+                result = await asyncio.to_thread(
+                    self._transcribe_inline, audio_array)
 
             return TranscriptResult(
-                text=result["text"].strip(),
+                text=result["text"],
                 confidence=1.0,  # Whisper doesn't provide confidence scores
-                language=result.get("language", "en"),
+                language=result["language"],
+                trimmed_seconds=trimmed_seconds,
             )
 
         except Exception as e:
             logger.error(f"STT transcription failed: {e}")
             raise STTError(f"Failed to transcribe audio: {e}")
 
+    def get_metrics(self) -> dict:
+        """Get STT worker metrics."""
+        if self._pool is not None:
+            metrics = self._pool.get_metrics()
+            if self._batcher is not None:
+                metrics["batching"] = self._batcher.get_metrics()
+        else:
+            metrics = {"workers": 0, "running": self._model is not None}
+        metrics["vad"] = {
+            "enabled": self.vad_enabled,
+            "rejected_clips": self._vad_rejected,
+            "trimmed_seconds": round(self._vad_trimmed_seconds, 2),
+        }
+        return metrics
+
     async def transcribe_base64(
         self,
         audio_base64: str,
@@ -0,0 +1,137 @@
+"""STT micro-batching - decode clips from several toys in one pass.
+
+When several children finish talking at nearly the same moment, their
+clips are collected for a short window and transcribed with a single
+batched Whisper encoder pass instead of one decode per clip.
+
+A clip that arrives while no batch is running is decoded at once; the
+window only applies while the pool is busy, so a lone toy never waits.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from totoyai.services.stt_pool import STTWorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Whisper's fixed input window; longer clips need sequential decoding
+MAX_BATCH_CLIP_SECONDS = 30
+WHISPER_SAMPLE_RATE = 16000
+
+
+class STTBatcher:
+    """Collects pending clips and transcribes them as one batch.
+
+    A clip arriving while no batch runs is dispatched immediately.
+    Otherwise it waits for more: the batch is flushed when the
+    collection window closes or when it reaches max_batch_size,
+    whichever comes first. Clips longer than Whisper's 30s window
+    bypass batching.
+    """
+
+    def __init__(
+        self,
+        pool: STTWorkerPool,
+        window_ms: float = 25,
+        max_batch_size: int = 8,
+    ):
+        """Initialize batcher.
+
+        Args:
+            pool: Worker pool that runs the batched decode
+            window_ms: How long a clip queued behind a running batch
+                waits for more
+            max_batch_size: Flush immediately once this many are pending
+        """
+        self.pool = pool
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+
+        self._pending: list[tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+        # Metrics
+        self._batches = 0
+        self._batched_clips = 0
+
+    async def transcribe(self, audio, language: str) -> dict:
+        """Queue a clip for the next batch and wait for its transcript.
+
+        Args:
+            audio: Contiguous float32 numpy array of 16kHz samples
+            language: Whisper language code
+
+        Returns:
+            Result dict as returned by STTWorkerPool
+        """
+        if len(audio) > MAX_BATCH_CLIP_SECONDS * WHISPER_SAMPLE_RATE:
+            return await self.pool.transcribe(audio, language)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((audio, language, future))
+
+        if len(self._pending) >= self.max_batch_size or not self._batch_tasks:
+            # Full, or nothing running that would share a batch with it
+            self._flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        """Flush pending clips once the collection window closes."""
+        await asyncio.sleep(self.window_ms / 1000)
+        self._flush_task = None
+        self._flush()
+
+    def _flush(self) -> None:
+        """Dispatch all pending clips, one batch per language."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        pending, self._pending = self._pending, []
+        by_language: dict[str, list[tuple]] = {}
+        for item in pending:
+            by_language.setdefault(item[1], []).append(item)
+
+        for language, items in by_language.items():
+            task = asyncio.create_task(self._run_batch(language, items))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, language: str, items: list[tuple]) -> None:
+        """Transcribe one batch and fan results back to the waiters."""
+        clips = [audio for audio, _, _ in items]
+        self._batches += 1
+        self._batched_clips += len(clips)
+        logger.debug(f"Transcribing batch of {len(clips)} clip(s)")
+
+        try:
+            if len(clips) == 1:
+                results = [await self.pool.transcribe(clips[0], language)]
+            else:
+                results = await self.pool.transcribe_batch(clips, language)
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_metrics(self) -> dict:
+        """Get batching metrics."""
+        return {
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "waiting": len(self._pending),
+            "batches": self._batches,
+            "avg_batch_size": round(
+                self._batched_clips / (self._batches or 1), 2),
+        }
@@ -0,0 +1,156 @@
+"""Whisper worker pool - run STT inference outside the event loop.
+
+Each worker process loads its own Whisper model once at startup.
+Audio is handed over through shared memory, so only the segment name
+and sample count cross the process boundary - the samples are never
+pickled. The code run in the workers lives in ``totoyai.stt_worker``.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, resource_tracker, shared_memory
+from typing import Callable, Optional
+
+from totoyai import stt_worker
+
+logger = logging.getLogger(__name__)
+
+
+class STTWorkerPool:
+    """Pool of Whisper worker processes fed through shared memory."""
+
+    def __init__(
+        self,
+        model_name: str = "base",
+        workers: int = 1,
+        worker_init: Callable[[str], None] = stt_worker.init_worker,
+    ):
+        """Initialize worker pool.
+
+        Args:
+            model_name: Whisper model each worker loads
+            workers: Number of worker processes
+            worker_init: Run once in each new worker with model_name
+                (must be importable without ``totoyai.services``)
+        """
+        self.model_name = model_name
+        self.workers = workers
+        self.worker_init = worker_init
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Metrics
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+        self._total_decode_ms = 0.0
+
+    def start(self) -> None:
+        """Start worker processes (idempotent)."""
+        if self._executor is None:
+            logger.info(
+                f"Starting {self.workers} Whisper worker(s) "
+                f"with model {self.model_name}"
+            )
+            # Workers must share the parent's resource tracker; otherwise
+            # each one would unlink the segments it attached to on exit.
+            resource_tracker.ensure_running()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context("spawn"),
+                initializer=self.worker_init,
+                initargs=(self.model_name,),
+            )
+
+    def shutdown(self) -> None:
+        """Stop worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, worker_fn, clips: list, language: str) -> list[dict]:
+        """Copy clips into one shared memory segment and run worker_fn."""
+        self.start()
+
+        total_bytes = sum(clip.nbytes for clip in clips)
+        shm = shared_memory.SharedMemory(create=True, size=max(total_bytes, 1))
+        self._pending += len(clips)
+        try:
+            offset = 0
+            for clip in clips:
+                shm.buf[offset:offset + clip.nbytes] = memoryview(clip).cast("B")
+                offset += clip.nbytes
+
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                self._executor,
+                worker_fn,
+                shm.name,
+                [len(clip) for clip in clips],
+                language,
+                time.time(),
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); restart the pool on the next call
+            logger.error("Whisper worker pool broke, restarting on next request")
+            self._failed += len(clips)
+            self.shutdown()
+            raise
+        except Exception:
+            self._failed += len(clips)
+            raise
+        finally:
+            self._pending -= len(clips)
+            shm.close()
+            shm.unlink()
+
+        for result in results:
+            self._completed += 1
+            self._total_wait_ms += result["wait_ms"]
+            self._max_wait_ms = max(self._max_wait_ms, result["wait_ms"])
+            self._total_decode_ms += result["decode_ms"]
+        return results
+
+    async def transcribe(self, audio, language: str) -> dict:
+        """Transcribe float32 audio in a worker process.
+
+        Args:
+            audio: Contiguous float32 numpy array of samples
+            language: Whisper language code
+
+        Returns:
+            Dict with 'text', 'language', 'wait_ms' and 'decode_ms'
+        """
+        (result,) = await self._submit(stt_worker.transcribe, [audio], language)
+        return result
+
+    async def transcribe_batch(self, clips: list, language: str) -> list[dict]:
+        """Transcribe several clips of up to 30s in one worker call.
+
+        Args:
+            clips: Contiguous float32 numpy arrays
+            language: Whisper language code
+
+        Returns:
+            One result dict per clip, in the same order
+        """
+        return await self._submit(stt_worker.transcribe_batch, clips, language)
+
+    def get_metrics(self) -> dict:
+        """Get queue depth and latency metrics."""
+        completed = self._completed or 1
+        return {
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "in_flight": self._pending,
+            "queue_depth": max(0, self._pending - self.workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_ms": round(self._total_wait_ms / completed, 1),
+            "max_wait_ms": round(self._max_wait_ms, 1),
+            "avg_decode_ms": round(self._total_decode_ms / completed, 1),
+        }
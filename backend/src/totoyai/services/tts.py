@@ -2,7 +2,12 @@
 
 import logging
 import os
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
+
+from totoyai.models.audio import AudioProfile
+from totoyai.services.audio_format import EDGE_AUDIO, pcm_profile, transcode
+from totoyai.services.piper_pool import PiperWorkerPool
+from totoyai.services.tts_cache import tts_cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,32 +22,38 @@ class TTSService:
             provider: TTS provider ('edge', 'piper', 'coqui')
         """
         self.provider = provider.lower()
+        self.piper_pool = PiperWorkerPool(
+            model_dir=os.getenv("PIPER_MODEL_DIR", "models/piper"),
+            processes_per_voice=int(os.getenv("PIPER_PROCESSES_PER_VOICE", "1")),
+        )
 
     async def synthesize(
         self,
         text: str,
         language: str = "en",
+        profile: Optional[AudioProfile] = None,
     ) -> AsyncIterator[bytes]:
         """Convert text to streaming audio.
 
         Args:
             text: Text to convert to speech
             language: Language code ('en' or 'sv')
+            profile: Device audio profile (None = provider's native format)
 
         Yields:
             Audio chunks as bytes
         """
         if self.provider == "edge":
-            async for chunk in self._synthesize_edge(text, language):
+            async for chunk in self._synthesize_edge(text, language, profile):
                 yield chunk
         elif self.provider == "piper":
-            async for chunk in self._synthesize_piper(text, language):
+            async for chunk in self._synthesize_piper(text, language, profile):
                 yield chunk
         else:
             raise TTSError(f"Unknown TTS provider: {self.provider}")
 
     async def _synthesize_edge(
-        self, text: str, language: str
+        self, text: str, language: str, profile: Optional[AudioProfile] = None
     ) -> AsyncIterator[bytes]:
         """Synthesize using Edge TTS (cloud, free, good quality)."""
         try:
@@ -61,63 +72,74 @@ class TTSService:
                 # Slightly slower for clarity
                 rate = os.getenv("TTS_RATE", "-10%")
 
-            communicate = edge_tts.Communicate(text, voice, rate=rate)
+            async def edge_stream() -> AsyncIterator[bytes]:
+                communicate = edge_tts.Communicate(text, voice, rate=rate)
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        yield chunk["data"]
+
+            def synthesize() -> AsyncIterator[bytes]:
+                return transcode(edge_stream(), EDGE_AUDIO, profile)
 
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    yield chunk["data"]
+            # Repeated phrases (greetings, fallbacks) are served from cache
+            key = tts_cache.make_key(
+                text, voice, rate, (profile or EDGE_AUDIO).name)
+            async for chunk in tts_cache.stream(key, synthesize):
+                yield chunk
 
         except Exception as e:
             logger.error(f"Edge TTS failed: {e}")
             raise TTSError(f"Failed to synthesize with Edge TTS: {e}")
 
     async def _synthesize_piper(
-        self, text: str, language: str
+        self, text: str, language: str, profile: Optional[AudioProfile] = None
     ) -> AsyncIterator[bytes]:
         """Synthesize using Piper TTS (local, fast, offline).
 
         Piper is recommended for production - it's fast, runs locally,
         and has excellent quality. Install: pip install piper-tts
-        """
-        try:
-            import subprocess
-
-            # Select voice model based on language
-            if language == "sv":
-                voice_model = "sv_SE-nst-medium"
-            else:
-                voice_model = "en_US-lessac-medium"
-
-            # Run piper command
-            process = subprocess.Popen(
-                ["piper", "--model", voice_model, "--output-raw"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-
-            stdout, stderr = process.communicate(input=text.encode())
 
-            if process.returncode != 0:
-                raise TTSError(f"Piper failed: {stderr.decode()}")
-
-            # Yield audio in chunks
-            chunk_size = 4096
-            for i in range(0, len(stdout), chunk_size):
-                yield stdout[i: i + chunk_size]
+        Utterances go to long-lived worker processes that keep the voice
+        model loaded, and audio is yielded sentence by sentence. If Piper
+        fails before producing audio, Edge TTS is used instead.
+        """
+        # Select voice model based on language
+        if language == "sv":
+            voice_model = "sv_SE-nst-medium"
+        else:
+            voice_model = "en_US-lessac-medium"
 
-        except FileNotFoundError:
-            logger.warning("Piper not installed, falling back to Edge TTS")
-            async for chunk in self._synthesize_edge(text, language):
+        started = False
+        try:
+            # Piper produces raw PCM at the voice's own sample rate
+            source = pcm_profile(self.piper_pool.sample_rate(voice_model))
+            async for chunk in transcode(
+                self.piper_pool.synthesize(voice_model, text), source, profile
+            ):
+                started = True
                 yield chunk
+
         except Exception as e:
-            logger.error(f"Piper TTS failed: {e}")
-            raise TTSError(f"Failed to synthesize with Piper: {e}")
+            if started:
+                logger.error(f"Piper TTS failed: {e}")
+                raise TTSError(f"Failed to synthesize with Piper: {e}")
+            logger.warning(f"Piper unavailable ({e}), falling back to Edge TTS")
+            async for chunk in self._synthesize_edge(text, language, profile):
+                yield chunk
+
+    async def aclose(self) -> None:
+        """Stop local TTS worker processes."""
+        await self.piper_pool.aclose()
 
-    async def synthesize_to_bytes(self, text: str, language: str = "en") -> bytes:
+    async def synthesize_to_bytes(
+        self,
+        text: str,
+        language: str = "en",
+        profile: Optional[AudioProfile] = None,
+    ) -> bytes:
         """Convert text to complete audio bytes."""
         chunks = []
-        async for chunk in self.synthesize(text, language):
+        async for chunk in self.synthesize(text, language, profile):
             chunks.append(chunk)
         return b"".join(chunks)
 
@@ -135,4 +157,4 @@ TTS_FALLBACK_MESSAGES = {
 }
 
 # Global TTS service instance
-tts_service = TTSService()
+tts_service = TTSService(provider=os.getenv("TTS_PROVIDER", "edge"))
@@ -0,0 +1,342 @@
+"""Content-addressed cache for synthesized speech.
+
+Greetings, fallback messages and weather phrases are spoken over and
+over. Their audio is cached by a hash of the normalized text, voice,
+rate and output format, in a memory tier backed by a size-bounded disk
+tier shared by all workers. Both tiers evict least recently used
+entries first.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_NAME = "index.sqlite"
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    used_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_use ON entries (used_ns);
+-- Single row with the running totals; missing until the index is built
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+"""
+
+
+def default_cache_dir() -> str:
+    """Per-user cache directory (``$XDG_CACHE_HOME/totoyai/tts``)."""
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "totoyai", "tts")
+
+
+class TTSCache:
+    """Two-tier (memory + disk) LRU cache of synthesized audio.
+
+    The disk tier is shared by every worker process using the same
+    directory. A small SQLite index in the directory records each
+    file's size and last use plus the running total, so a store only
+    touches its own row and the total; least recently used files are
+    removed only once the total is over budget. The index is rebuilt
+    from the directory if it is missing, and SQLite's locking keeps the
+    budget shared however many workers write to it.
+    """
+
+    def __init__(
+        self,
+        memory_bytes: int = 32 * 1024 * 1024,
+        disk_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+    ):
+        """Initialize cache.
+
+        Args:
+            memory_bytes: Memory tier budget (0 disables it)
+            disk_bytes: Disk tier budget (0 disables it)
+            disk_dir: Directory for the disk tier (default: per-user cache
+                directory, see default_cache_dir)
+        """
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.disk_dir = disk_dir or default_cache_dir()
+
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        # Disk tier size as of the last store (None until the first one)
+        self._disk_entries: Optional[int] = None
+        self._disk_size: Optional[int] = None
+        # Index connection, shared by the to_thread workers
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        # Metrics
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._bytes_served = 0
+
+    @staticmethod
+    def make_key(text: str, voice: str, rate: str, output_format: str) -> str:
+        """Build the cache key for a phrase.
+
+        Whitespace is normalized so formatting differences in LLM or
+        template output still hit the same entry.
+        """
+        normalized = " ".join(text.split())
+        raw = "\x1f".join((normalized, voice, rate, output_format))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.audio")
+
+    def _index(self) -> sqlite3.Connection:
+        """Open the disk index, building it from the directory if missing."""
+        if self._db is None:
+            os.makedirs(self.disk_dir, mode=0o700, exist_ok=True)
+            db = sqlite3.connect(
+                os.path.join(self.disk_dir, INDEX_NAME),
+                timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_INDEX_SCHEMA)
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if db.execute("SELECT 1 FROM usage").fetchone() is None:
+                    self._rebuild_index(db)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                db.close()
+                raise
+            self._db = db
+        return self._db
+
+    def _rebuild_index(self, db: sqlite3.Connection) -> None:
+        """Index the files already on disk, using mtime as last use."""
+        entries = total = 0
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".audio"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                    (entry.name[:-len(".audio")], stat.st_size, stat.st_mtime_ns))
+                entries += 1
+                total += stat.st_size
+        db.execute("INSERT INTO usage VALUES (0, ?, ?)", (entries, total))
+        logger.info(f"Rebuilt TTS cache index: {entries} files, {total} bytes")
+
+    @staticmethod
+    def _track(db: sqlite3.Connection, key: str, size: Optional[int]) -> None:
+        """Record a use of an entry (or its removal if size is None)."""
+        row = db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        old_entries, old_size = (1, row[0]) if row else (0, 0)
+        if size is None:
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            new_entries, size = 0, 0
+        else:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (key, size, time.time_ns()))
+            new_entries = 1
+        db.execute(
+            "UPDATE usage SET entries = entries + ?, bytes = bytes + ?",
+            (new_entries - old_entries, size - old_size))
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Keep LRU order across workers and restarts
+        with self._db_lock:
+            db = self._index()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._track(db, key, len(data))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return data
+
+    def _write_disk(self, key: str, audio: bytes) -> tuple[int, int, int]:
+        """Store a file, evicting LRU files if the disk tier is over budget.
+
+        Returns:
+            Entries and bytes left on disk, and files evicted
+        """
+        path = self._path(key)
+        with self._db_lock:
+            db = self._index()
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                os.replace(tmp_path, path)
+                self._track(db, key, len(audio))
+                evicted = self._evict(db)
+                entries, total = db.execute(
+                    "SELECT entries, bytes FROM usage").fetchone()
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return entries, total, evicted
+
+    def _evict(self, db: sqlite3.Connection) -> int:
+        """Remove least recently used files until within the budget."""
+        (total,) = db.execute("SELECT bytes FROM usage").fetchone()
+        if total <= self.disk_bytes:
+            return 0
+        victims = []
+        for key, size in db.execute(
+                "SELECT key, size FROM entries ORDER BY used_ns"):
+            if total <= self.disk_bytes:
+                break
+            victims.append(key)
+            total -= size
+        for key in victims:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self._track(db, key, None)
+        return len(victims)
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        """Insert into the memory tier, evicting LRU entries."""
+        # A single entry may use at most a quarter of the memory budget
+        if len(audio) > self.memory_bytes // 4:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self._evictions += 1
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Look up audio, promoting disk hits into memory."""
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            self._memory_hits += 1
+            self._bytes_served += len(audio)
+            return audio
+
+        if self.disk_bytes > 0:
+            try:
+                audio = await asyncio.to_thread(self._read_disk, key)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"TTS cache disk read failed: {e}")
+                audio = None
+
+            if audio is not None:
+                self._disk_hits += 1
+                self._bytes_served += len(audio)
+                self._remember(key, audio)
+                return audio
+
+        self._misses += 1
+        return None
+
+    async def put(self, key: str, audio: bytes) -> None:
+        """Store audio in both tiers."""
+        if not audio:
+            return
+        self._stores += 1
+        if self.memory_bytes > 0:
+            self._remember(key, audio)
+
+        if self.disk_bytes <= 0 or len(audio) > self.disk_bytes:
+            return
+
+        try:
+            entries, size, evicted = await asyncio.to_thread(
+                self._write_disk, key, audio)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"TTS cache disk write failed: {e}")
+            return
+        self._disk_entries = entries
+        self._disk_size = size
+        self._evictions += evicted
+
+    async def stream(
+        self,
+        key: str,
+        synthesize: Callable[[], AsyncIterator[bytes]],
+    ) -> AsyncIterator[bytes]:
+        """Serve audio from cache, or stream and store a fresh synthesis.
+
+        Audio is only stored once the synthesis has completed, so a
+        failed or abandoned stream never leaves a truncated entry.
+
+        Args:
+            key: Cache key from make_key
+            synthesize: Produces the audio stream on a miss
+
+        Yields:
+            Audio chunks
+        """
+        audio = await self.get(key)
+        if audio is not None:
+            yield audio
+            return
+
+        chunks = []
+        async for chunk in synthesize():
+            chunks.append(chunk)
+            yield chunk
+        await self.put(key, b"".join(chunks))
+
+    def get_metrics(self) -> dict:
+        """Get hit/miss and size metrics."""
+        lookups = self._memory_hits + self._disk_hits + self._misses
+        return {
+            "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_rate": round(
+                (self._memory_hits + self._disk_hits) / (lookups or 1), 3),
+            "stores": self._stores,
+            "evictions": self._evictions,
+            "bytes_served": self._bytes_served,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "disk_entries": self._disk_entries,
+            "disk_bytes": self._disk_size,
+        }
+
+
+# Global TTS cache shared by both TTS services
+tts_cache = TTSCache(
+    memory_bytes=int(float(os.getenv("TTS_CACHE_MEMORY_MB", "32")) * 1024 * 1024),
+    disk_bytes=int(float(os.getenv("TTS_CACHE_DISK_MB", "256")) * 1024 * 1024),
+    disk_dir=os.getenv("TTS_CACHE_DIR"),
+)
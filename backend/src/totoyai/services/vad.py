@@ -0,0 +1,83 @@
+"""Energy-based voice activity detection for incoming audio.
+
+Runs before Whisper to cut leading/trailing silence and to reject
+clips that contain only room noise (e.g. after a false wake). All
+frame energies are computed in one vectorized NumPy pass.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class VADResult:
+    """Speech region found in a clip."""
+
+    start: int  # First sample to keep
+    end: int  # One past the last sample to keep
+    speech_detected: bool
+    trimmed_seconds: float
+
+
+def detect_speech(
+    audio,
+    sample_rate: int = 16000,
+    frame_ms: int = 30,
+    noise_margin_db: float = 10.0,
+    min_level_db: float = -45.0,
+    min_speech_ms: int = 150,
+    padding_ms: int = 200,
+) -> VADResult:
+    """Find the speech region in a clip.
+
+    A frame counts as speech when its energy is both above an absolute
+    floor and well above the clip's own noise floor (10th percentile of
+    frame energies), so quiet rooms and noisy rooms both work.
+
+    Args:
+        audio: float32 numpy array of samples in [-1, 1]
+        sample_rate: Audio sample rate
+        frame_ms: Analysis frame length
+        noise_margin_db: How far above the noise floor speech must be
+        min_level_db: Absolute energy floor in dBFS
+        min_speech_ms: Minimum total speech for the clip to count
+        padding_ms: Audio kept on each side of the speech region
+
+    Returns:
+        VADResult with the sample range to keep
+    """
+    import numpy as np
+
+    frame_len = max(1, sample_rate * frame_ms // 1000)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return VADResult(0, 0, False, len(audio) / sample_rate)
+
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    energy = np.einsum("ij,ij->i", frames, frames) / frame_len
+    level_db = 10 * np.log10(energy + 1e-10)
+
+    # Clips that are speech from start to end have no quiet frames to
+    # learn the noise floor from, so never demand more than peak - margin
+    noise_floor = float(np.percentile(level_db, 10))
+    peak = float(level_db.max())
+    threshold = max(
+        min(noise_floor + noise_margin_db, peak - noise_margin_db),
+        min_level_db,
+    )
+    speech = level_db > threshold
+
+    if np.count_nonzero(speech) * frame_ms < min_speech_ms:
+        return VADResult(0, 0, False, len(audio) / sample_rate)
+
+    first = int(np.argmax(speech))
+    last = n_frames - 1 - int(np.argmax(speech[::-1]))
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, first * frame_len - padding)
+    end = min(len(audio), (last + 1) * frame_len + padding)
+
+    return VADResult(
+        start=start,
+        end=end,
+        speech_detected=True,
+        trimmed_seconds=(len(audio) - (end - start)) / sample_rate,
+    )
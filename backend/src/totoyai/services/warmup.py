@@ -0,0 +1,96 @@
+"""Startup warm-up - pay first-request costs before traffic arrives.
+
+Loads Whisper and runs a dummy decode, opens the LLM provider
+connections, synthesizes a short phrase and renders the safety
+redirect phrases. The readiness endpoint reports ready only once this
+has finished.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from totoyai.services.conversation_pipeline import conversation_pipeline
+from totoyai.services.gemini import gemini_service
+from totoyai.services.groq_service import groq_service
+from totoyai.services.streaming_tts import streaming_tts_service
+from totoyai.services.stt import stt_service
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_up_tts() -> None:
+    """Synthesize a short phrase to open the Edge TTS connection."""
+    await streaming_tts_service.synthesize_to_bytes("Hej!", language="sv")
+
+
+# Components to warm up: (name, warm-up coroutine, timeout in seconds)
+WARMUP_STEPS: list[tuple[str, Callable[[], Awaitable[None]], float]] = [
+    ("stt", stt_service.warm_up, 300.0),
+    ("groq", groq_service.warm_up, 15.0),
+    ("gemini", gemini_service.warm_up, 15.0),
+    ("tts", _warm_up_tts, 15.0),
+    ("redirects", conversation_pipeline.prerender_redirects, 30.0),
+]
+
+
+class WarmupService:
+    """Runs startup warm-up and tracks readiness."""
+
+    def __init__(self):
+        """Initialize warm-up state."""
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.components: dict[str, dict] = {}
+
+    async def run(self) -> None:
+        """Warm up all components, then mark the worker ready.
+
+        Failures are recorded but do not block readiness: every stage
+        has a fallback, and a provider outage must not keep the worker
+        out of rotation.
+        """
+        self.started_at = time.time()
+
+        async def warm(name: str, step, timeout: float) -> None:
+            start = time.time()
+            try:
+                await asyncio.wait_for(step(), timeout=timeout)
+                status = "ok"
+            except Exception as e:
+                logger.warning(f"Warm-up of {name} failed: {e!r}")
+                status = "failed"
+            self.components[name] = {
+                "status": status,
+                "duration_ms": round((time.time() - start) * 1000),
+            }
+
+        await asyncio.gather(*[
+            warm(name, step, timeout) for name, step, timeout in WARMUP_STEPS
+        ])
+
+        self.finished_at = time.time()
+        self.ready = True
+        summary = ", ".join(
+            f"{name}={c['status']}" for name, c in self.components.items())
+        logger.info(
+            f"Warm-up finished in {self.finished_at - self.started_at:.1f}s "
+            f"({summary})"
+        )
+
+    def mark_ready(self) -> None:
+        """Mark ready without warming up (warm-up disabled)."""
+        self.ready = True
+
+    def get_status(self) -> dict:
+        """Get readiness and per-component warm-up status."""
+        return {
+            "ready": self.ready,
+            "components": self.components,
+        }
+
+
+# Global warm-up service instance
+warmup_service = WarmupService()
@@ -0,0 +1,110 @@
+"""Whisper worker process code for STTWorkerPool.
+
+Runs in spawned worker processes. Spawned workers import the module
+that defines the function they run, so this module sits outside
+``totoyai.services`` and imports only the standard library, numpy and
+Whisper: loading the services package would start LLM, Redis and TTS
+clients in every worker.
+"""
+
+import time
+from multiprocessing import shared_memory
+
+# Whisper model loaded once per worker process
+_worker_model = None
+
+
+def init_worker(model_name: str) -> None:
+    """Load the Whisper model in a freshly started worker process."""
+    global _worker_model
+    import whisper
+
+    _worker_model = whisper.load_model(model_name)
+
+
+def read_shared_audio(name: str, lengths: list[int]) -> list:
+    """Copy float32 clips out of a shared memory segment.
+
+    Clips are stored back to back; ``lengths`` gives each clip's
+    sample count in order.
+    """
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        view = np.ndarray((sum(lengths),), dtype=np.float32, buffer=shm.buf)
+        clips = []
+        offset = 0
+        for length in lengths:
+            clips.append(view[offset:offset + length].copy())
+            offset += length
+        del view
+    finally:
+        shm.close()
+    return clips
+
+
+def transcribe(
+    name: str,
+    lengths: list[int],
+    language: str,
+    submitted_at: float,
+) -> list[dict]:
+    """Transcribe one clip of any length inside a worker process."""
+    import torch
+
+    started_at = time.time()
+    (audio,) = read_shared_audio(name, lengths)
+    result = _worker_model.transcribe(
+        audio,
+        language=language,
+        fp16=torch.cuda.is_available(),
+    )
+    return [{
+        "text": result["text"].strip(),
+        "language": result.get("language", language),
+        "wait_ms": (started_at - submitted_at) * 1000,
+        "decode_ms": (time.time() - started_at) * 1000,
+    }]
+
+
+def transcribe_batch(
+    name: str,
+    lengths: list[int],
+    language: str,
+    submitted_at: float,
+) -> list[dict]:
+    """Transcribe several clips of up to 30s with one batched decode.
+
+    Every clip is padded to Whisper's 30s window, so the mel spectrograms
+    stack into one tensor and the encoder runs once for the whole batch.
+    """
+    import torch
+    import whisper
+
+    started_at = time.time()
+    clips = read_shared_audio(name, lengths)
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(clip), n_mels=_worker_model.dims.n_mels
+        )
+        for clip in clips
+    ]).to(_worker_model.device)
+
+    options = whisper.DecodingOptions(
+        language=language,
+        without_timestamps=True,
+        fp16=torch.cuda.is_available(),
+    )
+    results = whisper.decode(_worker_model, mel, options)
+
+    decode_ms = (time.time() - started_at) * 1000
+    return [
+        {
+            "text": result.text.strip(),
+            "language": result.language or language,
+            "wait_ms": (started_at - submitted_at) * 1000,
+            "decode_ms": decode_ms,
+        }
+        for result in results
+    ]
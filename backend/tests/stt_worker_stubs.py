@@ -0,0 +1,42 @@
+"""Worker functions for STTWorkerPool tests, run in spawned processes.
+
+Kept apart from the tests so a worker imports only this module and
+totoyai.stt_worker, as the real workers do.
+"""
+
+import sys
+import time
+
+from totoyai.stt_worker import read_shared_audio
+
+
+def init_worker(model_name: str) -> None:
+    """Stand-in for loading Whisper."""
+
+
+def sum_clips(name: str, lengths: list[int], language: str, submitted_at: float) -> list[dict]:
+    """Report each clip's sum, and whether the services package was loaded."""
+    started_at = time.time()
+    clips = read_shared_audio(name, lengths)
+    return [
+        {
+            "text": f"{float(clip.sum()):g}",
+            "language": language,
+            "wait_ms": (started_at - submitted_at) * 1000,
+            "decode_ms": 0.0,
+            "segment": name,
+            "services_loaded": "totoyai.services" in sys.modules,
+        }
+        for clip in clips
+    ]
+
+
+def slow_clip(name: str, lengths: list[int], language: str, submitted_at: float) -> list[dict]:
+    """Hold a worker for a moment."""
+    time.sleep(0.5)
+    return sum_clips(name, lengths, language, submitted_at)
+
+
+def fail_clip(name: str, lengths: list[int], language: str, submitted_at: float) -> list[dict]:
+    """Fail, naming the segment so the test can check it was unlinked."""
+    raise ValueError(name)
@@ -0,0 +1,59 @@
+"""AudioChunkBuffer tests."""
+
+from totoyai.services.audio_format import mp3_unit_length
+from totoyai.services.streaming_tts import AudioChunkBuffer
+
+# MPEG-2 Layer III, 48 kbps, 24 kHz (Edge TTS output): 144-byte frames
+EDGE_FRAME = b"\xff\xf3\x64\xc4" + bytes(140)
+
+
+def test_fixed_size_chunks_preserve_data():
+    """Chunks are exactly chunk_size and nothing is lost or reordered."""
+    data = bytes(range(256)) * 40
+    buffer = AudioChunkBuffer(chunk_size=1000)
+
+    chunks = []
+    for i in range(0, len(data), 333):
+        chunks.extend(buffer.add(data[i:i + 333]))
+    assert all(len(chunk) == 1000 for chunk in chunks)
+
+    tail = buffer.flush()
+    assert b"".join(chunks) + tail == data
+    assert buffer.flush() is None
+
+
+def test_mp3_frame_length():
+    """Frame length comes from the header; junk is 0, a short header None."""
+    assert mp3_unit_length(EDGE_FRAME, 0) == 144
+    assert mp3_unit_length(b"\x00\x01\x02\x03", 0) == 0
+    assert mp3_unit_length(b"\xff\xf3", 0) is None
+
+
+def test_frame_aligned_chunks_never_split_frames():
+    """Every chunk is a whole number of frames, however input is split."""
+    data = EDGE_FRAME * 50
+    buffer = AudioChunkBuffer(chunk_size=1000, frame_aligned=True)
+
+    chunks = []
+    for i in range(0, len(data), 100):
+        chunks.extend(buffer.add(data[i:i + 100]))
+    chunks.append(buffer.flush())
+
+    assert b"".join(chunks) == data
+    for chunk in chunks:
+        assert len(chunk) <= 1000
+        assert len(chunk) % 144 == 0
+        assert chunk.startswith(b"\xff\xf3")
+
+
+def test_frame_aligned_keeps_leading_id3_tag():
+    """An ID3v2 tag stays whole and junk bytes are not dropped."""
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x06" + b"TAGDAT"
+    data = tag + b"junk" + EDGE_FRAME * 10
+    buffer = AudioChunkBuffer(chunk_size=300, frame_aligned=True)
+
+    chunks = buffer.add(data)
+    chunks.append(buffer.flush())
+
+    assert b"".join(chunks) == data
+    assert chunks[0].startswith(tag)
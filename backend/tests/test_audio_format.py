@@ -0,0 +1,75 @@
+"""Audio profile and transcoding tests (ffmpeg itself is not run)."""
+
+import asyncio
+
+import pytest
+
+from totoyai.services.audio_format import (
+    AUDIO_PROFILES,
+    EDGE_AUDIO,
+    AudioFormatError,
+    _ffmpeg_args,
+    pcm_profile,
+    transcode,
+)
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.fixture
+def no_ffmpeg(monkeypatch):
+    """Fail the test if transcode starts a subprocess."""
+    async def create_subprocess_exec(*args, **kwargs):
+        raise AssertionError("ffmpeg started")
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", create_subprocess_exec)
+
+
+@pytest.mark.parametrize("target", [None, EDGE_AUDIO, AUDIO_PROFILES["mp3-24k"]])
+async def test_matching_audio_is_passed_through(no_ffmpeg, target):
+    """No target, or one matching the source, streams the input untouched."""
+    chunks = [chunk async for chunk in transcode(_chunks(b"ab", b"cd"), EDGE_AUDIO, target)]
+    assert chunks == [b"ab", b"cd"]
+
+
+async def test_pcm_passthrough_ignores_bitrate(no_ffmpeg):
+    """PCM at the same rate matches whatever bitrate is recorded."""
+    target = AUDIO_PROFILES["pcm-16k"].model_copy(update={"bitrate_kbps": 256})
+    chunks = [chunk async for chunk in transcode(_chunks(b"pcm"), pcm_profile(16000), target)]
+    assert chunks == [b"pcm"]
+
+
+async def test_missing_ffmpeg_raises(monkeypatch):
+    """A conversion without ffmpeg installed is an AudioFormatError."""
+    async def create_subprocess_exec(*args, **kwargs):
+        raise FileNotFoundError("ffmpeg")
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", create_subprocess_exec)
+    with pytest.raises(AudioFormatError, match="not installed"):
+        async for _ in transcode(_chunks(b"x"), EDGE_AUDIO, AUDIO_PROFILES["pcm-16k"]):
+            pass
+
+
+def test_ffmpeg_args_pcm_to_mp3():
+    """Raw PCM input is described to ffmpeg; MP3 output uses the profile bitrate."""
+    args = _ffmpeg_args(pcm_profile(22050), AUDIO_PROFILES["mp3-16k-low"])
+    assert args[:4] == ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    assert args[args.index("-i") - 6:args.index("-i")] == [
+        "-f", "s16le", "-ar", "22050", "-ac", "1"]
+    assert args[args.index("-c:a") + 1] == "libmp3lame"
+    assert args[args.index("-b:a") + 1] == "24k"
+    assert args[args.index("-ar", args.index("-i")) + 1] == "16000"
+    assert args[-1] == "pipe:1"
+
+
+def test_ffmpeg_args_mp3_to_opus():
+    """Edge MP3 becomes streamable Ogg Opus at the profile's rate."""
+    args = _ffmpeg_args(EDGE_AUDIO, AUDIO_PROFILES["opus-16k"])
+    assert args[args.index("-i") - 2:args.index("-i") + 2] == [
+        "-f", "mp3", "-i", "pipe:0"]
+    assert args[args.index("-c:a") + 1] == "libopus"
+    assert "-page_duration" in args
+    assert args[-3:] == ["-flush_packets", "1", "pipe:1"]
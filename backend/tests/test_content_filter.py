@@ -0,0 +1,95 @@
+"""Content filter tests."""
+
+from totoyai.services.content_filter import (
+    ContentMatch,
+    StreamingContentFilter,
+    contains_inappropriate_content,
+    filter_content,
+    find_inappropriate_content,
+    get_redirect_phrase,
+)
+from totoyai.services.streaming_tts import StreamingTTSService
+
+
+def test_matches_report_category_and_span():
+    text = "The knight had a knife and some beer"
+    matches = find_inappropriate_content(text, "en")
+
+    assert matches == [
+        ContentMatch("violence", "knife", 17, 22),
+        ContentMatch("substances", "beer", 32, 36),
+    ]
+    assert text[17:22] == "knife"
+
+
+def test_swedish_words_and_inflections():
+    matches = find_inappropriate_content("Draken DÖDADE riddaren med en kniv", "sv")
+    assert [(m.category, m.term) for m in matches] == [
+        ("violence", "DÖDADE"), ("violence", "kniv")]
+
+
+def test_swedish_allows_harmless_lookalikes():
+    """"sex" is six in Swedish and Gun is a name."""
+    assert not contains_inappropriate_content("Jag har sex nallar och Gun", "sv")
+    assert contains_inappropriate_content("I saw a gun", "en")
+    # English words are still caught in Swedish text
+    assert contains_inappropriate_content("Han sa att jag är stupid", "sv")
+
+
+def test_whole_words_only():
+    assert not contains_inappropriate_content("The skill of a diet", "en")
+    assert not contains_inappropriate_content("Vinter och dörrar", "sv")
+
+
+def test_filter_content_redirects_in_language():
+    assert filter_content("Berätta om blod", "sv").startswith("Vi pratar")
+    assert filter_content("Tell me about the sun", "en") == "Tell me about the sun"
+
+
+def _stream(deltas, language="sv"):
+    content_filter = StreamingContentFilter(language)
+    released = [content_filter.feed(delta) for delta in deltas]
+    released.append(content_filter.flush())
+    return released, content_filter.match
+
+
+def test_stream_holds_back_only_possible_blocked_words():
+    released, match = _stream(["Draken ville dö", "rrar öppna. Sen dra", "g"])
+    assert match is None
+    # "dö" could become "döda"; "dra" cannot become anything blocked
+    assert released == ["Draken ville ", "dörrar öppna. Sen dra", "g", ""]
+
+
+def test_stream_catches_word_split_across_deltas():
+    released, match = _stream(["En drake som ", "dö", "dade alla. ", "Slut"])
+    assert "".join(released) == "En drake som "
+    assert match == ContentMatch("violence", "dödade", 13, 19)
+
+
+def test_stream_does_not_match_inside_longer_word():
+    released, match = _stream(["Superlång", "kniv", " och skill"], "sv")
+    assert match is None
+    assert "".join(released) == "Superlångkniv och skill"
+
+
+async def test_llm_tts_switches_to_redirect_on_match(monkeypatch):
+    tts = StreamingTTSService()
+    spoken = []
+
+    async def synthesize_streaming(text, language="sv", profile=None):
+        spoken.append(text)
+        yield text.encode()
+
+    async def llm():
+        for delta in ["Det var en gång. ", "En riddare med en ", "kniv", " och mer."]:
+            yield delta
+
+    monkeypatch.setattr(tts, "synthesize_streaming", synthesize_streaming)
+    content_filter = StreamingContentFilter("sv")
+    audio = [chunk async for chunk in tts.synthesize_with_llm_streaming(
+        llm(), "sv", first_chunk_chars=0, chunk_chars=0,
+        content_filter=content_filter)]
+
+    assert content_filter.match.term == "kniv"
+    assert not any("kniv" in text for text in spoken)
+    assert audio[-1] == get_redirect_phrase("sv").encode()
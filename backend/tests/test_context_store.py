@@ -0,0 +1,408 @@
+"""Context store tests."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+import redis.asyncio as redis
+
+from totoyai.services.context_store import (
+    InMemoryContextStore,
+    RedisContextStore,
+    _encode_turn,
+)
+from totoyai.services.conversation_context import ConversationContextManager
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """In-process Redis shared by every store created in the test."""
+    server = fakeredis.FakeServer()
+
+    def from_url(url, **kwargs):
+        return fakeredis.FakeAsyncRedis(server=server, **kwargs)
+
+    monkeypatch.setattr(redis, "from_url", from_url)
+    return server
+
+
+@pytest.fixture
+async def make_store(redis_server):
+    """Create Redis stores (one per simulated worker), closed afterwards."""
+    stores = []
+
+    def make(**kwargs) -> RedisContextStore:
+        store = RedisContextStore(**kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    redis_server.connected = True
+    for store in stores:
+        await store.aclose()
+
+
+async def _stored_turns(store: RedisContextStore, session_id: str) -> list[str]:
+    context = await store.get(session_id)
+    return [turn.content for turn in context.history]
+
+
+async def test_in_memory_store_keeps_history():
+    """The memory backend returns the same live context."""
+    store = InMemoryContextStore(ConversationContextManager())
+    context = await store.get_or_create("s1", "toy-1", "sv")
+    context.add_user_message("Hej!", intent="general")
+    context.add_assistant_message("Hej hej!")
+    await store.save(context)
+
+    again = await store.get_or_create("s1", "toy-1", "sv")
+    assert [turn.content for turn in again.history] == ["Hej!", "Hej hej!"]
+
+
+def test_redis_encoding_preserves_context_fields():
+    """Scalar fields and turns survive a round trip through Redis types."""
+    store = InMemoryContextStore(ConversationContextManager())
+    context = store.manager.get_or_create("s1", "toy-1", "en")
+    context.child_name = "Alva"
+    context.child_age = 5
+    context.max_turns = 4
+    context.current_topic = "dinosaurs"
+    context.add_user_message("Tell me about T. rex", intent="story")
+
+    fields = RedisContextStore._encode_fields(context)
+    stored = {name: value for name, value in fields.items() if value != ""}
+    turns = [_encode_turn(turn) for turn in context.history]
+    decoded = RedisContextStore._decode_context(stored, turns)
+
+    assert decoded.child_name == "Alva"
+    assert decoded.child_age == 5
+    assert decoded.max_turns == 4
+    assert decoded.current_topic == "dinosaurs"
+    assert decoded.current_story is None
+    assert decoded.preferred_language == "en"
+    assert decoded.history[0].intent == "story"
+    assert decoded.last_activity == context.last_activity
+
+
+async def test_saves_append_only_new_turns(make_store):
+    """Another worker sees every turn, each saved once, in order."""
+    store = make_store()
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Hej!")
+    await store.save(context)
+    context.add_assistant_message("Hej hej!")
+    await store.save(context)
+
+    assert await _stored_turns(make_store(), "s1") == ["Hej!", "Hej hej!"]
+
+
+async def test_write_behind_coalesces_saves(make_store):
+    """Saves queued within the window go out in a single flush."""
+    store = make_store(write_behind_ms=60_000)
+    reader = make_store()
+    first = await store.get_or_create("s1", "toy-1")
+    second = await store.get_or_create("s2", "toy-2")
+    first.add_user_message("Ett")
+    await store.save(first)
+    first.add_user_message("Två")
+    await store.save(first)
+    second.add_user_message("Tre")
+    await store.save(second)
+
+    assert await reader.get("s1") is None
+    await store.flush()
+
+    assert await _stored_turns(reader, "s1") == ["Ett", "Två"]
+    assert await _stored_turns(reader, "s2") == ["Tre"]
+    assert store.get_metrics()["flushes"] == 1
+
+
+async def test_cleared_history_replaces_stored_turns(make_store):
+    """Clearing a context replaces its stored turns and fields."""
+    store = make_store()
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Gammal")
+    context.current_story = "Draken"
+    await store.save(context)
+
+    context = await store.get("s1")
+    context.clear()
+    context.add_user_message("Ny")
+    await store.save(context)
+
+    stored = await make_store().get("s1")
+    assert [turn.content for turn in stored.history] == ["Ny"]
+    assert stored.current_story is None
+
+
+async def test_create_session_replaces_existing(make_store):
+    """A new session over an old one does not inherit its turns."""
+    store = make_store()
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Gammal")
+    await store.save(context)
+
+    fresh = await make_store().create_session("s1", "toy-1")
+    assert fresh.messages == []
+    assert await _stored_turns(make_store(), "s1") == []
+
+
+async def test_failed_flush_keeps_writes_for_retry(make_store, redis_server):
+    """Saves made while Redis is down are written once it is back."""
+    store = make_store()
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Ett")
+    await store.save(context)
+
+    redis_server.connected = False
+    context.add_assistant_message("Två")
+    await store.save(context)
+    context.add_user_message("Tre")
+    await store.save(context)
+    metrics = store.get_metrics()
+    assert metrics["pending"] == 1
+    assert metrics["flush_failures"] == 2
+
+    redis_server.connected = True
+    await store.flush()
+    assert store.get_metrics()["pending"] == 0
+    assert await _stored_turns(make_store(), "s1") == ["Ett", "Två", "Tre"]
+
+
+async def test_session_api(make_store):
+    """Sessions are created, updated and read as SessionContext models."""
+    store = make_store()
+    created = await store.create_session("s1", "toy-1")
+    assert created.messages == []
+    assert created.expires_at > created.created_at
+
+    assert await store.update_context("s1", "Hej!", "Hej hej!")
+    assert await store.set_story_context("s1", "Draken Sigge")
+
+    session = await make_store().get_context("s1")
+    assert [(m.role, m.content) for m in session.messages] == [
+        ("user", "Hej!"), ("assistant", "Hej hej!")]
+    assert session.current_story == "Draken Sigge"
+    assert session.device_id == "toy-1"
+
+    await store.clear_session("s1")
+    assert await store.get_context("s1") is None
+
+
+async def test_updates_to_missing_session_return_false(make_store):
+    """Updating an unknown session reports it and creates nothing."""
+    store = make_store()
+    assert not await store.update_context("missing", "Hej!", "Hej hej!")
+    assert not await store.set_story_context("missing", "Draken")
+    assert await store.get("missing") is None
+
+
+async def test_history_trimmed_to_max_turns(make_store, redis_server):
+    """Only the last max_turns pairs are kept in Redis."""
+    store = make_store()
+    context = await store.get_or_create("s1", "toy-1")
+    context.max_turns = 2
+    for i in range(6):
+        context.add_user_message(f"Fråga {i}")
+        await store.save(context)
+
+    raw = fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True)
+    assert await raw.llen("context:s1:turns") == 4
+    assert 0 < await raw.ttl("context:s1") <= 30 * 60
+    assert await _stored_turns(make_store(), "s1") == [
+        "Fråga 2", "Fråga 3", "Fråga 4", "Fråga 5"]
+
+
+async def test_expired_session_is_not_returned(make_store):
+    """A context idle longer than the timeout reads as missing."""
+    store = make_store()
+    context = await store.get_or_create("s1", "toy-1")
+    context.last_activity = datetime.utcnow() - timedelta(minutes=31)
+    await store.save(context)
+
+    assert await store.get_context("s1") is None
+    assert not await store.update_context("s1", "Hej!", "Hej hej!")
+    fresh = await store.get_or_create("s1", "toy-1")
+    assert not fresh.history
+
+
+async def test_save_does_not_resurrect_deleted_session(make_store):
+    """Turns saved after another worker deleted the session are dropped."""
+    store = make_store()
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Hej!")
+    await store.save(context)
+
+    context = await store.get("s1")
+    await make_store().clear_session("s1")
+    context.add_assistant_message("Hej hej!")
+    await store.save(context)
+
+    assert await make_store().get("s1") is None
+
+
+async def test_batch_skips_deleted_session_in_one_call(make_store, monkeypatch):
+    """A flush writes live sessions and drops deleted ones in one script call."""
+    store = make_store(write_behind_ms=60_000)
+    for session_id in ("s1", "s2"):
+        await store.save(await store.get_or_create(session_id, "toy-1"))
+    await store.flush()
+    first = await store.get("s1")
+    second = await store.get("s2")
+    await make_store().clear_session("s1")
+
+    client = store._get_redis()
+    calls = []
+    for name in ("evalsha", "pipeline", "watch"):
+        method = getattr(client, name)
+        monkeypatch.setattr(
+            client, name,
+            lambda *args, _name=name, _method=method, **kwargs: (
+                calls.append(_name), _method(*args, **kwargs))[1])
+    first.add_user_message("Ett")
+    await store.save(first)
+    second.add_user_message("Två")
+    await store.save(second)
+    await store.flush()
+
+    assert calls == ["evalsha"]
+    assert await make_store().get("s1") is None
+    assert await _stored_turns(make_store(), "s2") == ["Två"]
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    """Let the invalidation listeners run until condition() holds."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def _subscribed(store: RedisContextStore) -> RedisContextStore:
+    store._get_redis()
+    await _wait_for(lambda: store.get_metrics()["cache_enabled"])
+    return store
+
+
+async def test_cache_hit_returns_a_copy(make_store):
+    """A cached context is served without Redis, as an independent copy."""
+    store = await _subscribed(make_store())
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Hej!")
+    await store.save(context)
+
+    first = await store.get("s1")
+    first.add_assistant_message("Inte sparad")
+    second = await store.get("s1")
+
+    assert [turn.content for turn in second.history] == ["Hej!"]
+    metrics = store.get_metrics()
+    assert metrics["cache_hits"] == 2
+    # Only get_or_create, before the session existed, went to Redis
+    assert metrics["cache_misses"] == 1
+
+
+async def test_peer_write_invalidates_cache(make_store):
+    """A save by another worker drops this worker's cached copy."""
+    store = await _subscribed(make_store())
+    peer = await _subscribed(make_store())
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Hej!")
+    await store.save(context)
+    assert await store.get("s1") is not None
+
+    other = await peer.get("s1")
+    other.add_assistant_message("Hej hej!")
+    await peer.save(other)
+    await _wait_for(lambda: store.get_metrics()["invalidations"] == 1)
+
+    assert await _stored_turns(store, "s1") == ["Hej!", "Hej hej!"]
+
+
+async def test_peer_delete_invalidates_cache(make_store):
+    """A session deleted by another worker is not served from cache."""
+    store = await _subscribed(make_store())
+    peer = await _subscribed(make_store())
+    await store.create_session("s1", "toy-1")
+
+    await peer.clear_session("s1")
+    await _wait_for(lambda: store.get_metrics()["invalidations"] == 1)
+
+    assert await store.get("s1") is None
+
+
+class _LosablePubSub:
+    """Subscription that drops when ``lost`` is set and cannot come back."""
+
+    def __init__(self, lost: asyncio.Event):
+        self.lost = lost
+
+    async def subscribe(self, channel: str) -> None:
+        if self.lost.is_set():
+            raise redis.ConnectionError("Connection refused")
+
+    async def listen(self):
+        yield {"type": "subscribe", "data": 1}
+        await self.lost.wait()
+        raise redis.ConnectionError("Connection closed by server")
+
+    async def close(self) -> None:
+        pass
+
+
+async def test_cache_bypassed_without_subscription(make_store, monkeypatch):
+    """Losing the invalidation channel drops the cache and reads go to Redis."""
+    lost = asyncio.Event()
+    store = make_store()
+    monkeypatch.setattr(store._get_redis(), "pubsub", lambda: _LosablePubSub(lost))
+    await _wait_for(lambda: store.get_metrics()["cache_enabled"])
+    await store.create_session("s1", "toy-1")
+    assert store.get_metrics()["cache_entries"] == 1
+
+    lost.set()
+    await _wait_for(lambda: not store.get_metrics()["cache_enabled"])
+    assert store.get_metrics()["cache_entries"] == 0
+
+    assert await store.get("s1") is not None
+    assert await store.get("s1") is not None
+    metrics = store.get_metrics()
+    assert metrics["cache_hits"] == 0
+    assert metrics["cache_entries"] == 0
+
+
+async def test_racing_write_invalidates_instead_of_caching(make_store):
+    """A save that lands after another worker's is not cached as-is."""
+    store = await _subscribed(make_store())
+    peer = make_store(cache_size=0)
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Ett")
+    await store.save(context)
+    context = await store.get("s1")
+
+    other = await peer.get("s1")
+    other.add_user_message("Två")
+    await peer.save(other)
+    # Published without cache_size; this worker has not heard of it
+    context.add_user_message("Tre")
+    await store.save(context)
+
+    metrics = store.get_metrics()
+    assert metrics["write_races"] == 1
+    assert metrics["cache_entries"] == 0
+    assert await _stored_turns(store, "s1") == ["Ett", "Två", "Tre"]
+
+
+async def test_own_write_is_cached(make_store):
+    """A save with no competing write updates the cache in place."""
+    store = await _subscribed(make_store())
+    context = await store.get_or_create("s1", "toy-1")
+    context.add_user_message("Ett")
+    await store.save(context)
+    context.add_assistant_message("Två")
+    await store.save(context)
+
+    assert await _stored_turns(store, "s1") == ["Ett", "Två"]
+    metrics = store.get_metrics()
+    assert metrics["cache_hits"] == 1
+    assert metrics["write_races"] == 0
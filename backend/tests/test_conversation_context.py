@@ -0,0 +1,70 @@
+"""Conversation context manager tests."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from totoyai.services import conversation_context
+from totoyai.services.conversation_context import ConversationContextManager
+
+
+class Clock:
+    """Wall clock for the context module that only moves when told to."""
+
+    def __init__(self):
+        self.now = datetime.utcnow()
+
+    def advance(self, minutes: float) -> None:
+        self.now += timedelta(minutes=minutes)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Patch the clocks read by conversation_context."""
+    clock = Clock()
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return clock.now
+
+    monkeypatch.setattr(conversation_context, "datetime", FrozenDatetime)
+    monkeypatch.setattr(
+        conversation_context.time, "time",
+        lambda: (clock.now - datetime(1970, 1, 1)).total_seconds())
+    return clock
+
+
+def test_least_recently_used_context_is_evicted():
+    """Creating a context beyond max_contexts drops the least recently used."""
+    manager = ConversationContextManager(max_contexts=2)
+    manager.get_or_create("a", "toy")
+    manager.get_or_create("b", "toy")
+    manager.get_or_create("a", "toy")  # "b" is now least recently used
+    manager.get_or_create("c", "toy")
+
+    assert manager.get("b") is None
+    assert manager.get("a") is not None
+    assert manager.get_active_count() == 2
+    assert manager.get_metrics()["evicted"] == 1
+
+
+def test_sweep_removes_only_inactive_contexts(clock):
+    """A sweep drops idle contexts and reschedules ones that saw activity."""
+    manager = ConversationContextManager(timeout_minutes=30)
+    manager.get_or_create("idle", "toy")
+    busy = manager.get_or_create("busy", "toy")
+
+    clock.advance(20)
+    # Activity after scheduling pushes the deadline back
+    busy.add_user_message("Hej!")
+    clock.advance(11)
+
+    assert manager.sweep_expired() == 1
+    assert manager.get("idle") is None
+    assert manager.get("busy") is busy
+    assert manager.sweep_expired() == 0
+
+    clock.advance(20)
+    assert manager.sweep_expired() == 1
+    assert manager.get_metrics()["expired"] == 2
@@ -0,0 +1,186 @@
+"""Conversation pipeline tests."""
+
+from totoyai.models import Intent
+from totoyai.services import llm_fallback
+from totoyai.services.content_filter import get_redirect_phrase
+from totoyai.services.context_store import InMemoryContextStore
+from totoyai.services.conversation_context import ConversationContextManager
+from totoyai.services.conversation_pipeline import ConversationPipeline, PipelineEventType
+from totoyai.services.llm_fallback import LLMFallbackService, LLMProvider, LLMStreamResult
+from totoyai.services.streaming_tts import StreamingTTSService
+from totoyai.services.stt import TranscriptResult
+
+
+class FakeSTT:
+    """STT stub that hears the same text every time."""
+
+    def __init__(self, text):
+        self.text = text
+
+    async def transcribe(self, audio_data, sample_rate=16000):
+        return TranscriptResult(text=self.text, confidence=1.0, language="sv")
+
+
+class FailingLLM:
+    """LLM stub that fails the test if it is asked anything."""
+
+    async def generate_response_stream(self, **kwargs):
+        raise AssertionError("LLM must not be called")
+
+
+class FakeTTS:
+    """TTS stub recording the phrases it renders."""
+
+    def __init__(self):
+        self.rendered = []
+
+    async def synthesize_to_bytes(self, text, language="sv", profile=None):
+        self.rendered.append(text)
+        return text.encode()
+
+
+async def test_unsafe_transcript_skips_llm():
+    """A blocked transcript is answered from the pre-rendered redirect clip."""
+    tts = FakeTTS()
+    pipeline = ConversationPipeline(
+        stt=FakeSTT("Hur använder man en kniv?"),
+        llm=FailingLLM(),
+        tts=tts,
+        contexts=InMemoryContextStore(ConversationContextManager()),
+    )
+    await pipeline.prerender_redirects()
+    rendered = len(tts.rendered)
+
+    for _ in range(2):
+        events = [event async for event in pipeline.run(b"\x00" * 640, "s1", "toy-1")]
+        assert [event.type for event in events] == [
+            PipelineEventType.TRANSCRIPT,
+            PipelineEventType.AUDIO,
+            PipelineEventType.RESPONSE,
+        ]
+        assert events[1].audio == get_redirect_phrase("sv").encode()
+        assert events[2].text == get_redirect_phrase("sv")
+
+    # Served from the pre-rendered clip
+    assert len(tts.rendered) == rendered
+    assert pipeline.get_metrics()["transcript"] == {"violence": 2}
+
+
+class FakeLLM:
+    """LLM stub streaming a fixed reply."""
+
+    def __init__(self, *deltas):
+        self.deltas = deltas
+        self.requests = []
+
+    async def generate_response_stream(self, user_input, language="sv", context=None):
+        self.requests.append((user_input, context))
+
+        async def chunks():
+            for delta in self.deltas:
+                yield delta
+
+        return LLMStreamResult(
+            chunks=chunks(), intent=Intent.STORY,
+            provider=LLMProvider.GROQ, first_token_ms=1.0)
+
+
+class SavingContextStore(InMemoryContextStore):
+    """In-memory store that records what is saved."""
+
+    def __init__(self):
+        super().__init__(ConversationContextManager())
+        self.saved = []
+
+    async def save(self, context):
+        self.saved.append([(turn.role, turn.content) for turn in context.history])
+        await super().save(context)
+
+
+def _speaking_tts(monkeypatch) -> StreamingTTSService:
+    """Streaming TTS whose audio is the text it was asked to say."""
+    tts = StreamingTTSService()
+
+    async def synthesize_streaming(text, language="sv", profile=None):
+        yield text.encode()
+
+    monkeypatch.setattr(tts, "synthesize_streaming", synthesize_streaming)
+    return tts
+
+
+async def test_blocked_response_closes_provider_stream(monkeypatch):
+    """A blocked word in the reply stops the provider's stream."""
+    closed = []
+
+    async def provider_stream():
+        try:
+            for delta in ["Det var en gång. ", "En riddare med en ", "kniv", " och mer."]:
+                yield delta
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(
+        llm_fallback.groq_service, "generate_conversation_response_stream",
+        lambda user_input, language, context: (provider_stream(), Intent.STORY))
+    pipeline = ConversationPipeline(
+        stt=FakeSTT("Berätta en saga"),
+        llm=LLMFallbackService(),
+        tts=_speaking_tts(monkeypatch),
+        contexts=InMemoryContextStore(ConversationContextManager()),
+    )
+
+    events = [event async for event in pipeline.run(b"\x00" * 640, "s1", "toy-1")]
+
+    assert events[-1].text == get_redirect_phrase("sv")
+    assert closed == [True]
+
+
+async def test_turn_streams_llm_reply_as_audio(monkeypatch):
+    """Transcript, then audio per sentence, then the reply; the turn is saved."""
+    llm = FakeLLM("Det var en gång en drake. ", "Den hette Sigge.")
+    contexts = SavingContextStore()
+    pipeline = ConversationPipeline(
+        stt=FakeSTT("Berätta en saga"),
+        llm=llm,
+        tts=_speaking_tts(monkeypatch),
+        contexts=contexts,
+    )
+
+    events = [event async for event in pipeline.run(b"\x00" * 640, "s1", "toy-1")]
+
+    assert [event.type for event in events] == [
+        PipelineEventType.TRANSCRIPT,
+        PipelineEventType.AUDIO,
+        PipelineEventType.AUDIO,
+        PipelineEventType.RESPONSE,
+    ]
+    assert events[0].text == "Berätta en saga"
+    assert b"".join(event.audio for event in events[1:3]).decode() == (
+        "Det var en gång en drake.Den hette Sigge.")
+    assert events[3].text == "Det var en gång en drake. Den hette Sigge."
+    assert events[3].intent == Intent.STORY
+    assert llm.requests == [("Berätta en saga", [])]
+    assert contexts.saved == [[
+        ("user", "Berätta en saga"),
+        ("assistant", "Det var en gång en drake. Den hette Sigge."),
+    ]]
+    assert pipeline.get_metrics() == {"transcript": {}, "response": {}}
+
+
+async def test_blocked_response_is_counted_and_kept_out_of_history(monkeypatch):
+    """A blocked reply counts under response and the child hears the redirect."""
+    contexts = SavingContextStore()
+    pipeline = ConversationPipeline(
+        stt=FakeSTT("Berätta en saga"),
+        llm=FakeLLM("En riddare med en ", "kniv", " gick hem."),
+        tts=_speaking_tts(monkeypatch),
+        contexts=contexts,
+    )
+
+    events = [event async for event in pipeline.run(b"\x00" * 640, "s1", "toy-1")]
+
+    assert events[-1].text == get_redirect_phrase("sv")
+    assert all(b"kniv" not in event.audio for event in events if event.audio)
+    assert pipeline.get_metrics() == {
+        "transcript": {}, "response": {"violence": 1}}
+    assert contexts.saved[-1][-1] == ("assistant", get_redirect_phrase("sv"))
@@ -0,0 +1,163 @@
+"""Streaming conversation endpoint tests."""
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from totoyai.models import Intent
+from totoyai.services.auth import create_access_token
+from totoyai.services.conversation_pipeline import PipelineEvent, PipelineEventType
+
+
+class FakePipeline:
+    """Pipeline stub that echoes the received audio size."""
+
+    def __init__(self):
+        self.calls = []
+        self.profiles = []
+
+    async def run(
+        self, audio_data, session_id, device_id, sample_rate, language,
+        audio_profile=None,
+    ):
+        self.calls.append((len(audio_data), session_id, device_id, language))
+        self.profiles.append(audio_profile and audio_profile.name)
+        yield PipelineEvent(type=PipelineEventType.TRANSCRIPT, text="hej")
+        yield PipelineEvent(type=PipelineEventType.AUDIO, audio=b"\x01\x02")
+        yield PipelineEvent(
+            type=PipelineEventType.RESPONSE, text="Hej hej!", intent=Intent.GENERAL
+        )
+
+
+def test_conversation_stream_turn(client, monkeypatch):
+    """Audio frames followed by end produce transcript, audio and response."""
+    pipeline = FakePipeline()
+    monkeypatch.setattr("totoyai.api.routes.conversation_pipeline", pipeline)
+    token = create_access_token("toy-1")
+
+    with client.websocket_connect(
+        f"/api/v1/conversation/stream?token={token}&session_id=s1"
+    ) as ws:
+        ws.send_bytes(b"\x00" * 640)
+        ws.send_bytes(b"\x00" * 640)
+        ws.send_json({"type": "end"})
+
+        assert ws.receive_json() == {"type": "transcript", "text": "hej"}
+        assert ws.receive_bytes() == b"\x01\x02"
+        assert ws.receive_json() == {
+            "type": "response", "text": "Hej hej!", "intent": "general"}
+
+    assert pipeline.calls == [(1280, "s1", "toy-1", "sv")]
+
+
+class FailingPipeline(FakePipeline):
+    """Pipeline stub whose first turn fails after the transcript."""
+
+    async def run(self, audio_data, *args, **kwargs):
+        if not self.calls:
+            self.calls.append(len(audio_data))
+            yield PipelineEvent(type=PipelineEventType.TRANSCRIPT, text="hej")
+            raise RuntimeError("TTS unavailable")
+        async for event in super().run(audio_data, *args, **kwargs):
+            yield event
+
+
+def test_conversation_stream_failed_turn_keeps_socket(client, monkeypatch):
+    """A failing turn sends an error frame and the next turn still works."""
+    pipeline = FailingPipeline()
+    monkeypatch.setattr("totoyai.api.routes.conversation_pipeline", pipeline)
+    token = create_access_token("toy-1")
+
+    with client.websocket_connect(
+        f"/api/v1/conversation/stream?token={token}&session_id=s1"
+    ) as ws:
+        ws.send_bytes(b"\x00" * 640)
+        ws.send_json({"type": "end"})
+        assert ws.receive_json() == {"type": "transcript", "text": "hej"}
+        error = ws.receive_json()
+        assert error["type"] == "error"
+        assert error["error_code"] == "TURN_FAILED"
+
+        ws.send_bytes(b"\x00" * 320)
+        ws.send_json({"type": "end"})
+        assert ws.receive_json() == {"type": "transcript", "text": "hej"}
+        assert ws.receive_bytes() == b"\x01\x02"
+        assert ws.receive_json()["type"] == "response"
+
+    # The failed turn's audio was not carried into the next one
+    assert pipeline.calls == [640, (320, "s1", "toy-1", "sv")]
+
+
+def test_conversation_stream_rejects_bad_token(client):
+    """Invalid tokens are refused before the socket is accepted."""
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(
+            "/api/v1/conversation/stream?token=bogus&session_id=s1"
+        ) as ws:
+            ws.receive_json()
+
+
+def test_conversation_audio_upload(client, monkeypatch):
+    """Raw PCM bodies are streamed to the pipeline and audio comes back."""
+    pipeline = FakePipeline()
+    monkeypatch.setattr("totoyai.api.routes.conversation_pipeline", pipeline)
+    token = create_access_token("toy-1")
+
+    response = client.post(
+        "/api/v1/conversation/audio?session_id=s1&language=en",
+        content=b"\x00" * 1281,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/octet-stream",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.headers["x-transcript"] == "hej"
+    assert response.content == b"\x01\x02"
+    assert pipeline.calls == [(1280, "s1", "toy-1", "en")]
+
+
+def test_conversation_audio_profile(client, monkeypatch):
+    """The requested device audio profile reaches the pipeline."""
+    pipeline = FakePipeline()
+    monkeypatch.setattr("totoyai.api.routes.conversation_pipeline", pipeline)
+    headers = {"Authorization": f"Bearer {create_access_token('toy-1')}"}
+
+    response = client.post(
+        "/api/v1/conversation/audio?session_id=s1&audio_profile=pcm-16k",
+        content=b"\x00" * 640,
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert pipeline.profiles == ["pcm-16k"]
+
+    response = client.post(
+        "/api/v1/conversation/audio?session_id=s1&audio_profile=wav-96k",
+        content=b"\x00" * 640,
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("content_length", ["abc", "-1", "+4", " 4"])
+def test_conversation_audio_rejects_bad_content_length(client, monkeypatch, content_length):
+    """A malformed or negative Content-Length is a client error, not a crash."""
+    pipeline = FakePipeline()
+    monkeypatch.setattr("totoyai.api.routes.conversation_pipeline", pipeline)
+    token = create_access_token("toy-1")
+
+    response = client.post(
+        "/api/v1/conversation/audio?session_id=s1",
+        content=b"\x00" * 4,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/octet-stream",
+            "Content-Length": content_length,
+        },
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid Content-Length"
+    assert pipeline.calls == []
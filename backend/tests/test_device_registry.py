@@ -0,0 +1,98 @@
+"""Device registry tests."""
+
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from totoyai.models import Device
+from totoyai.services.device_registry import DeviceRegistry, DeviceRegistryBusy
+
+# The package re-exports the device_registry instance under the module's name
+registry_module = sys.modules[DeviceRegistry.__module__]
+
+DEVICE = Device(device_id="toy-1", device_secret_hash="hashed:right")
+
+
+@pytest.fixture
+async def registry(monkeypatch):
+    checks = []
+
+    def slow_verify(secret, hashed):
+        checks.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return hashed == f"hashed:{secret}"
+
+    async def get(device_id):
+        return DEVICE if device_id == DEVICE.device_id else None
+
+    async def touch(*args):
+        pass
+
+    monkeypatch.setattr(registry_module, "verify_secret", slow_verify)
+    registry = DeviceRegistry(hash_threads=2, max_pending=4)
+    monkeypatch.setattr(registry, "get", get)
+    monkeypatch.setattr(registry._get_redis(), "hset", touch)
+    registry.checks = checks
+    yield registry
+    await registry.aclose()
+
+
+async def test_reconnect_storm_runs_bcrypt_once(registry):
+    """Concurrent and repeated logins share one check off the event loop."""
+    results = await asyncio.gather(
+        *[registry.authenticate("toy-1", "right") for _ in range(20)])
+    assert all(results)
+    assert await registry.authenticate("toy-1", "right")
+
+    assert len(registry.checks) == 1
+    assert registry.checks[0].startswith("device-auth")
+    metrics = registry.get_metrics()
+    assert metrics["shared_checks"] == 19
+    assert metrics["cache_hits"] == 1
+
+
+async def test_wrong_secret_and_unknown_device_fail(registry):
+    """Bad credentials are rejected and never remembered."""
+    assert not await registry.authenticate("toy-1", "wrong")
+    assert not await registry.authenticate("toy-2", "right")
+    # Failures are not remembered
+    assert not await registry.authenticate("toy-1", "wrong")
+    assert len(registry.checks) == 2
+
+
+async def test_queue_is_bounded(registry):
+    """Checks beyond max_pending are turned away as busy."""
+    attempts = [registry.authenticate("toy-1", f"guess-{i}") for i in range(6)]
+    results = await asyncio.gather(*attempts, return_exceptions=True)
+
+    busy = [r for r in results if isinstance(r, DeviceRegistryBusy)]
+    assert len(busy) == 2
+    assert registry.get_metrics()["rejected_busy"] == 2
+
+
+async def test_shared_failure_counted_for_every_caller(registry):
+    """Each caller sharing a failed check counts as a failure."""
+    results = await asyncio.gather(
+        *[registry.authenticate("toy-1", "wrong") for _ in range(3)])
+    assert not any(results)
+
+    metrics = registry.get_metrics()
+    assert metrics["bcrypt_checks"] == 1
+    assert metrics["failures"] == 3
+
+
+async def test_cancelled_caller_does_not_cancel_shared_check(registry):
+    """The first caller giving up leaves the check running for the rest."""
+    first = asyncio.create_task(registry.authenticate("toy-1", "right"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(registry.authenticate("toy-1", "right"))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second
+    assert first.cancelled()
+    assert len(registry.checks) == 1
+    assert registry.get_metrics()["in_progress"] == 0
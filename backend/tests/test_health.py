@@ -6,3 +6,18 @@ def test_health_check(client):
     response = client.get("/api/v1/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+
+def test_readiness_reports_warmup_status(client, monkeypatch):
+    """Readiness is 503 until warm-up has finished."""
+    from totoyai.services.warmup import warmup_service
+
+    monkeypatch.setattr(warmup_service, "ready", False)
+    response = client.get("/api/v1/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+    monkeypatch.setattr(warmup_service, "ready", True)
+    response = client.get("/api/v1/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
@@ -0,0 +1,89 @@
+"""LLM fallback streaming tests."""
+
+from totoyai.models import Intent
+from totoyai.services import llm_fallback
+from totoyai.services.llm_fallback import LLMFallbackService, LLMProvider
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def _stream_of(*deltas, error=None):
+    async def stream():
+        for delta in deltas:
+            yield delta
+        if error is not None:
+            raise error
+
+    def open_stream(user_input, language, context):
+        return stream(), Intent.GENERAL
+
+    return open_stream
+
+
+async def test_stream_falls_back_before_first_token(monkeypatch):
+    """A provider failing before its first token is skipped."""
+    monkeypatch.setattr(
+        llm_fallback.groq_service, "generate_conversation_response_stream",
+        _stream_of(error=RuntimeError("down")))
+    monkeypatch.setattr(
+        llm_fallback.gemini_service, "generate_conversation_response_stream",
+        _stream_of("Hej! ", "Jag heter Saga."))
+    service = LLMFallbackService()
+
+    result = await service.generate_response_stream("hej", language="sv")
+
+    assert result.provider == LLMProvider.GEMINI
+    assert result.fallback_used
+    assert await _collect(result.chunks) == ["Hej! ", "Jag heter Saga."]
+
+
+async def test_stream_keeps_provider_after_first_token(monkeypatch):
+    """A mid-stream failure ends the response without switching provider."""
+    monkeypatch.setattr(
+        llm_fallback.groq_service, "generate_conversation_response_stream",
+        _stream_of("Hej! ", error=RuntimeError("reset")))
+    service = LLMFallbackService()
+
+    result = await service.generate_response_stream("hej", language="sv")
+
+    assert result.provider == LLMProvider.GROQ
+    assert not result.fallback_used
+    assert await _collect(result.chunks) == ["Hej! "]
+
+
+async def test_stream_speaks_fallback_when_all_fail(monkeypatch):
+    """Empty responses from every provider yield the fallback message."""
+    for service in (llm_fallback.groq_service, llm_fallback.gemini_service):
+        monkeypatch.setattr(
+            service, "generate_conversation_response_stream", _stream_of())
+    service = LLMFallbackService()
+
+    result = await service.generate_response_stream("hello", language="en")
+
+    assert result.fallback_used
+    assert await _collect(result.chunks) == [llm_fallback.LLM_FALLBACK_MESSAGES["en"]]
+
+
+async def test_closing_stream_closes_provider(monkeypatch):
+    """Abandoning the response closes the provider's stream at once."""
+    closed = []
+
+    async def stream():
+        try:
+            yield "Hej! "
+            yield "Mer text."
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(
+        llm_fallback.groq_service, "generate_conversation_response_stream",
+        lambda user_input, language, context: (stream(), Intent.GENERAL))
+    service = LLMFallbackService()
+
+    result = await service.generate_response_stream("hej", language="sv")
+    assert await result.chunks.__anext__() == "Hej! "
+    await result.chunks.aclose()
+
+    assert closed == [True]
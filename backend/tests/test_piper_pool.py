@@ -0,0 +1,65 @@
+"""Piper worker pool tests, using a fake voice in the worker process."""
+
+import sys
+
+import pytest
+
+from totoyai.services.piper_pool import PiperProcess, PiperWorkerError, PiperWorkerPool
+
+FAKE_WORKER = """
+import sys
+from totoyai.services.piper_worker import serve
+
+def synthesize(text):
+    if text == "fail":
+        raise ValueError("bad text")
+    for word in text.split():
+        yield word.encode()
+
+serve(synthesize, sys.stdin.buffer, sys.stdout.buffer)
+"""
+
+
+@pytest.fixture
+async def pool(tmp_path, monkeypatch):
+    (tmp_path / "voice.onnx").write_bytes(b"")
+    monkeypatch.setattr(
+        PiperProcess, "_command", lambda self: [sys.executable, "-c", FAKE_WORKER])
+    pool = PiperWorkerPool(model_dir=str(tmp_path))
+    yield pool
+    await pool.aclose()
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+async def test_process_is_reused_across_utterances(pool):
+    """Utterances stream back framed chunks from one long-lived process."""
+    assert await _collect(pool.synthesize("voice", "Hej på dig")) == [b"Hej", b"p\xc3\xa5", b"dig"]
+    assert await _collect(pool.synthesize("voice", "Igen")) == [b"Igen"]
+    assert pool.get_metrics()["starts"] == 1
+
+
+async def test_worker_error_keeps_process(pool):
+    """A failed utterance raises but the process stays in sync."""
+    with pytest.raises(PiperWorkerError, match="bad text"):
+        await _collect(pool.synthesize("voice", "fail"))
+    assert await _collect(pool.synthesize("voice", "ok")) == [b"ok"]
+    assert pool.get_metrics()["starts"] == 1
+
+
+async def test_abandoned_utterance_restarts_process(pool):
+    """Stopping mid-utterance kills the process so no stale audio is read."""
+    stream = pool.synthesize("voice", "one two three")
+    assert await stream.__anext__() == b"one"
+    await stream.aclose()
+    assert await _collect(pool.synthesize("voice", "four")) == [b"four"]
+    assert pool.get_metrics()["starts"] == 2
+
+
+async def test_missing_model(pool):
+    """A voice without a model file fails without starting a process."""
+    with pytest.raises(FileNotFoundError):
+        await _collect(pool.synthesize("missing", "Hej"))
+    assert pool.get_metrics()["starts"] == 0
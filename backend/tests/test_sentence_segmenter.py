@@ -0,0 +1,56 @@
+"""Incremental sentence segmenter tests."""
+
+import pytest
+
+from totoyai.services.sentence_segmenter import SentenceSegmenter
+
+STORY = (
+    "Hej! Jag är Saga. Idag är det 2.5 grader, t.ex. lite kallt. "
+    "Vill du höra om Dr. Kanin? \"Ja!\" sa han. Slut."
+)
+
+
+def _segment(text: str, step: int, **kwargs) -> list[str]:
+    segmenter = SentenceSegmenter("sv", **kwargs)
+    chunks = []
+    for i in range(0, len(text), step):
+        chunks.extend(segmenter.feed(text[i:i + step]))
+    remainder = segmenter.flush()
+    if remainder:
+        chunks.append(remainder)
+    return chunks
+
+
+@pytest.mark.parametrize("step", [1, 2, 5, len(STORY)])
+def test_sentences_do_not_depend_on_delta_size(step):
+    """Output is the same whether text arrives char by char or at once."""
+    assert _segment(STORY, step, first_chunk_chars=None, chunk_chars=0) == [
+        "Hej!",
+        "Jag är Saga.",
+        "Idag är det 2.5 grader, t.ex. lite kallt.",
+        "Vill du höra om Dr. Kanin?",
+        "\"Ja!\" sa han.",
+        "Slut.",
+    ]
+
+
+def test_first_chunk_is_fast_and_later_chunks_are_larger():
+    """The first sentence is flushed alone, later ones are grouped."""
+    chunks = _segment(STORY, 3, chunk_chars=40)
+    assert chunks[0] == "Hej!"
+    assert all(len(chunk) >= 40 for chunk in chunks[1:-1])
+    assert " ".join(chunks) == STORY
+
+
+def test_long_first_sentence_flushes_at_clause():
+    """A long opening sentence is cut at a comma once past the target."""
+    text = "Det var en gång, i ett land långt borta, en liten prinsessa."
+    assert _segment(text, 4, first_chunk_chars=30)[0] == (
+        "Det var en gång, i ett land långt borta,")
+
+
+def test_oversized_chunk_is_cut_at_word_break():
+    """Text without punctuation is cut before max_chunk_chars."""
+    chunks = _segment("ord " * 30, 3, max_chunk_chars=50)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == ["ord"] * 30
@@ -0,0 +1,123 @@
+"""Streaming TTS tests, with synthesis replaced by a stub."""
+
+import asyncio
+
+import pytest
+
+from totoyai.services import streaming_tts
+from totoyai.services.audio_format import AUDIO_PROFILES
+from totoyai.services.streaming_tts import StreamingTTSService
+
+
+async def _sentences(*texts):
+    for text in texts:
+        yield text
+
+
+@pytest.fixture
+def tts():
+    return StreamingTTSService()
+
+
+async def test_ahead_yields_in_sentence_order(tts, monkeypatch):
+    """Later sentences finishing first are still played in order."""
+    async def synthesize_streaming(text, language="sv", profile=None):
+        await asyncio.sleep(0.03 / len(text))
+        yield text.encode()
+
+    monkeypatch.setattr(tts, "synthesize_streaming", synthesize_streaming)
+    played = []
+    async for sentence, chunks in tts._synthesize_ahead(
+        _sentences("a", "bb", "ccc"), "sv", lookahead=3
+    ):
+        played.append((sentence, b"".join([chunk async for chunk in chunks])))
+
+    assert played == [("a", b"a"), ("bb", b"bb"), ("ccc", b"ccc")]
+
+
+async def test_ahead_bounds_sentences_in_flight(tts, monkeypatch):
+    """No more than lookahead sentences are synthesized or buffered at once."""
+    started = []
+
+    async def synthesize_streaming(text, language="sv", profile=None):
+        started.append(text)
+        yield text.encode()
+
+    monkeypatch.setattr(tts, "synthesize_streaming", synthesize_streaming)
+    ahead = tts._synthesize_ahead(_sentences(*"abcdef"), "sv", lookahead=2)
+
+    sentence, _ = await ahead.__anext__()
+    await asyncio.sleep(0.01)
+    assert sentence == "a"
+    assert started == ["a", "b"]
+
+    await ahead.__anext__()
+    await asyncio.sleep(0.01)
+    assert started == ["a", "b", "c"]
+    await ahead.aclose()
+
+
+async def test_closing_ahead_cancels_synthesis(tts, monkeypatch):
+    """Closing the stream cancels sentences still being synthesized."""
+    cancelled = []
+
+    async def synthesize_streaming(text, language="sv", profile=None):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+        yield b""
+
+    monkeypatch.setattr(tts, "synthesize_streaming", synthesize_streaming)
+    ahead = tts._synthesize_ahead(_sentences("a", "b", "c"), "sv", lookahead=2)
+    await ahead.__anext__()
+    await asyncio.sleep(0.01)
+    await ahead.aclose()
+
+    assert sorted(cancelled) == ["a", "b"]
+
+
+async def test_llm_tts_skips_failed_sentence(tts, monkeypatch):
+    """One sentence failing to synthesize does not end the response."""
+    async def synthesize_streaming(text, language="sv", profile=None):
+        if text.startswith("Två"):
+            raise ConnectionError("TTS unavailable")
+        yield text.encode()
+
+    async def llm():
+        for delta in ["Ett. ", "Två. ", "Tre."]:
+            yield delta
+
+    monkeypatch.setattr(tts, "synthesize_streaming", synthesize_streaming)
+    audio = [chunk async for chunk in tts.synthesize_with_llm_streaming(
+        llm(), "sv", first_chunk_chars=0, chunk_chars=0)]
+
+    assert audio == [b"Ett.", b"Tre."]
+
+
+async def test_llm_tts_converts_response_in_one_stream(tts, monkeypatch):
+    """All sentences of a response go through a single transcode."""
+    conversions = []
+
+    async def synthesize_streaming(text, language="sv", profile=None):
+        assert profile is None
+        yield text.encode()
+
+    async def transcode(chunks, source, target):
+        conversions.append(target)
+        async for chunk in chunks:
+            yield chunk.upper()
+
+    async def llm():
+        for delta in ["One. ", "Two. ", "Three."]:
+            yield delta
+
+    monkeypatch.setattr(tts, "synthesize_streaming", synthesize_streaming)
+    monkeypatch.setattr(streaming_tts, "transcode", transcode)
+    opus = AUDIO_PROFILES["opus-16k"]
+    audio = [chunk async for chunk in tts.synthesize_with_llm_streaming(
+        llm(), "en", first_chunk_chars=0, chunk_chars=0, profile=opus)]
+
+    assert audio == [b"ONE.", b"TWO.", b"THREE."]
+    assert conversions == [opus]
@@ -0,0 +1,111 @@
+"""STT batcher tests, using a stub worker pool."""
+
+import asyncio
+
+import pytest
+
+from totoyai.services.stt_batcher import STTBatcher
+
+
+class StubPool:
+    """Records decodes and holds them until ``release`` is set."""
+
+    def __init__(self):
+        self.calls: list[tuple[str, list]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def transcribe(self, audio, language):
+        return (await self.transcribe_batch([audio], language))[0]
+
+    async def transcribe_batch(self, clips, language):
+        self.calls.append((language, clips))
+        await self.release.wait()
+        if language == "xx":
+            raise RuntimeError("decode failed")
+        return [{"text": f"{language}:{clip[0]}"} for clip in clips]
+
+
+@pytest.fixture
+def pool():
+    return StubPool()
+
+
+async def _start(batcher: STTBatcher, clip: int, language: str = "sv") -> asyncio.Task:
+    task = asyncio.create_task(batcher.transcribe([clip], language))
+    await asyncio.sleep(0)
+    return task
+
+
+async def _busy(batcher: STTBatcher, pool: StubPool) -> asyncio.Task:
+    """Occupy the pool with a held decode so later clips queue."""
+    pool.release.clear()
+    return await _start(batcher, 0)
+
+
+async def test_lone_clip_is_not_delayed(pool):
+    """With nothing running, a clip is decoded without waiting for the window."""
+    batcher = STTBatcher(pool, window_ms=60_000)
+    result = await asyncio.wait_for(batcher.transcribe([1], "sv"), timeout=1)
+    assert result == {"text": "sv:1"}
+    assert pool.calls == [("sv", [[1]])]
+
+
+async def test_window_flush_batches_queued_clips(pool):
+    """Clips queued behind a running decode go out together after the window."""
+    batcher = STTBatcher(pool, window_ms=20)
+    running = await _busy(batcher, pool)
+    queued = [await _start(batcher, clip) for clip in (1, 2)]
+    assert len(pool.calls) == 1
+
+    await asyncio.sleep(0.05)
+    pool.release.set()
+    assert await asyncio.gather(running, *queued) == [
+        {"text": "sv:0"}, {"text": "sv:1"}, {"text": "sv:2"}]
+    assert pool.calls[1] == ("sv", [[1], [2]])
+    assert batcher.get_metrics()["batches"] == 2
+
+
+async def test_full_batch_flushes_before_window(pool):
+    """Reaching max_batch_size dispatches without waiting for the window."""
+    batcher = STTBatcher(pool, window_ms=60_000, max_batch_size=3)
+    running = await _busy(batcher, pool)
+    queued = [await _start(batcher, clip) for clip in (1, 2, 3)]
+    await asyncio.sleep(0)
+
+    assert pool.calls[1] == ("sv", [[1], [2], [3]])
+    assert batcher.get_metrics()["waiting"] == 0
+    pool.release.set()
+    await asyncio.gather(running, *queued)
+
+
+async def test_batches_grouped_by_language(pool):
+    """One flush sends a separate batch per language."""
+    batcher = STTBatcher(pool, window_ms=60_000, max_batch_size=3)
+    running = await _busy(batcher, pool)
+    queued = [
+        await _start(batcher, 1, "sv"),
+        await _start(batcher, 2, "en"),
+        await _start(batcher, 3, "sv"),
+    ]
+    pool.release.set()
+
+    assert await asyncio.gather(*queued) == [
+        {"text": "sv:1"}, {"text": "en:2"}, {"text": "sv:3"}]
+    assert sorted(pool.calls[1:]) == [("en", [[2]]), ("sv", [[1], [3]])]
+    await running
+
+
+async def test_batch_error_reaches_only_its_clips(pool):
+    """A failed batch raises for its own clips; other batches succeed."""
+    batcher = STTBatcher(pool, window_ms=60_000, max_batch_size=3)
+    running = await _busy(batcher, pool)
+    failing = [await _start(batcher, clip, "xx") for clip in (1, 2)]
+    ok = await _start(batcher, 3, "en")
+    pool.release.set()
+
+    for task in failing:
+        with pytest.raises(RuntimeError, match="decode failed"):
+            await task
+    assert await ok == {"text": "en:3"}
+    await running
@@ -0,0 +1,74 @@
+"""STT worker pool tests, with stub worker functions instead of Whisper."""
+
+import asyncio
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from tests import stt_worker_stubs
+from totoyai.services.stt_pool import STTWorkerPool
+
+
+@pytest.fixture
+def pool():
+    """Single-worker pool that skips loading Whisper."""
+    pool = STTWorkerPool(workers=1, worker_init=stt_worker_stubs.init_worker)
+    yield pool
+    pool.shutdown()
+
+
+def _segment_exists(name: str) -> bool:
+    try:
+        shared_memory.SharedMemory(name=name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+async def test_clips_reach_worker_through_shared_memory(pool):
+    """Workers read every clip from one segment, which is then unlinked."""
+    clips = [np.full(4, 0.5, dtype=np.float32), np.arange(3, dtype=np.float32)]
+    results = await pool._submit(stt_worker_stubs.sum_clips, clips, "sv")
+
+    assert [result["text"] for result in results] == ["2", "3"]
+    assert not results[0]["services_loaded"]
+    assert not _segment_exists(results[0]["segment"])
+
+    metrics = pool.get_metrics()
+    assert metrics["completed"] == 2
+    assert metrics["failed"] == 0
+    assert metrics["in_flight"] == 0
+    assert metrics["avg_wait_ms"] >= 0
+
+
+async def test_failed_decode_unlinks_segment(pool):
+    """A worker error is raised, counted, and leaves no segment behind."""
+    with pytest.raises(ValueError) as error:
+        await pool._submit(
+            stt_worker_stubs.fail_clip, [np.zeros(4, dtype=np.float32)], "sv")
+
+    assert not _segment_exists(str(error.value))
+    assert pool.get_metrics()["failed"] == 1
+
+
+async def test_queue_depth_counts_clips_waiting_for_a_worker(pool):
+    """Clips beyond the number of workers show up as queued."""
+    clip = np.zeros(4, dtype=np.float32)
+    # Start the worker so the measurement below does not include spawning
+    await pool._submit(stt_worker_stubs.sum_clips, [clip], "sv")
+
+    calls = [
+        asyncio.create_task(pool._submit(stt_worker_stubs.slow_clip, [clip], "sv"))
+        for _ in range(2)]
+    await asyncio.sleep(0.1)
+    metrics = pool.get_metrics()
+    assert metrics["in_flight"] == 2
+    assert metrics["queue_depth"] == 1
+
+    await asyncio.gather(*calls)
+    metrics = pool.get_metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["completed"] == 3
+    # The second clip waited for the first to finish
+    assert metrics["max_wait_ms"] >= 400
@@ -0,0 +1,93 @@
+"""Token cache tests."""
+
+import sys
+import time
+
+import pytest
+from jose import jwt
+
+from totoyai.services.auth import (
+    ALGORITHM,
+    SECRET_KEY,
+    TokenCache,
+    create_access_token,
+    verify_token,
+)
+
+auth_module = sys.modules[TokenCache.__module__]
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    """Fresh cache used by verify_token for the duration of a test."""
+    cache = TokenCache()
+    monkeypatch.setattr(auth_module, "token_cache", cache)
+    return cache
+
+
+def _token(device_id: str, issued_at=None) -> str:
+    claims = {"device_id": device_id, "exp": int(time.time()) + 60, "type": "access"}
+    if issued_at is not None:
+        claims["iat"] = issued_at
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def test_verified_token_is_served_from_cache(token_cache):
+    """A repeated token is answered from the cache without decoding."""
+    token = create_access_token("toy-1")
+    first = verify_token(token)
+
+    assert verify_token(token) is first
+    metrics = token_cache.get_metrics()
+    assert metrics["hits"] == 1
+    assert metrics["misses"] == 1
+
+
+def test_entries_expire_at_token_exp(token_cache):
+    """A cached token is dropped once its exp has passed."""
+    token = create_access_token("toy-1")
+    token_data = verify_token(token)
+    cache = TokenCache(max_size=10)
+
+    cache.put(token, token_data, time.time() - 1, None)
+    assert cache.get(token) is None
+    assert cache.get_metrics()["entries"] == 0
+
+
+def test_cache_is_bounded(token_cache):
+    """The least recently used token is evicted beyond max_size."""
+    cache = TokenCache(max_size=2)
+    token_data = verify_token(create_access_token("toy-1"))
+    for token in ("a", "b", "c"):
+        cache.put(token, token_data, time.time() + 60, None)
+
+    assert cache.get("a") is None
+    assert cache.get("c") is token_data
+
+
+def test_revoked_token_is_rejected(token_cache):
+    """A revoked token is rejected even though it is cached."""
+    token = create_access_token("toy-2")
+    assert verify_token(token) is not None
+
+    token_cache.revoke(token)
+    assert verify_token(token) is None
+
+
+def test_revoke_device_rejects_earlier_tokens(token_cache):
+    """Tokens issued before the revocation stop working; others do not."""
+    earlier = _token("toy-3", int(time.time()) - 5)
+    assert verify_token(earlier) is not None
+    # Token without an issued-at claim cannot prove it is newer
+    legacy = _token("toy-3")
+
+    token_cache.revoke_device("toy-3")
+    assert verify_token(earlier) is None
+    assert verify_token(legacy) is None
+    assert verify_token(create_access_token("toy-4")) is not None
+
+
+def test_token_from_revocation_second_is_accepted(token_cache):
+    """A login in the same second as the revocation is not rejected."""
+    token_cache.revoke_device("toy-3")
+    assert verify_token(_token("toy-3", int(time.time()))) is not None
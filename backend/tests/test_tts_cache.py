@@ -0,0 +1,118 @@
+"""TTS audio cache tests."""
+
+import pytest
+
+from totoyai.services import tts_cache
+from totoyai.services.tts_cache import TTSCache, default_cache_dir
+
+
+def _synthesizer(calls, *chunks, error=None):
+    async def synthesize():
+        calls.append(1)
+        for chunk in chunks:
+            yield chunk
+        if error is not None:
+            raise error
+
+    return synthesize
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_key_normalizes_whitespace():
+    """Formatting differences map to the same entry; voices do not."""
+    key = TTSCache.make_key("Hej  där!\n", "sv-SE-SofieNeural", "-10%", "mp3")
+    assert key == TTSCache.make_key("Hej där!", "sv-SE-SofieNeural", "-10%", "mp3")
+    assert key != TTSCache.make_key("Hej där!", "sv-SE-MattiasNeural", "-10%", "mp3")
+
+
+async def test_repeated_phrase_is_served_from_cache(tmp_path):
+    """A second request does not synthesize and survives a restart."""
+    calls = []
+    cache = TTSCache(disk_dir=str(tmp_path))
+    key = cache.make_key("Hej!", "voice", "-10%", "mp3")
+
+    assert await _collect(cache.stream(key, _synthesizer(calls, b"ab", b"c"))) == [b"ab", b"c"]
+    assert await _collect(cache.stream(key, _synthesizer(calls, b"x"))) == [b"abc"]
+    assert len(calls) == 1
+    assert cache.get_metrics()["memory_hits"] == 1
+
+    restarted = TTSCache(disk_dir=str(tmp_path))
+    assert await restarted.get(key) == b"abc"
+    assert restarted.get_metrics()["disk_hits"] == 1
+
+
+async def test_failed_synthesis_is_not_cached(tmp_path):
+    """A stream that errors part-way leaves no truncated entry."""
+    cache = TTSCache(disk_dir=str(tmp_path))
+    key = cache.make_key("Hej!", "voice", "-10%", "mp3")
+
+    with pytest.raises(RuntimeError):
+        await _collect(cache.stream(key, _synthesizer([], b"ab", error=RuntimeError())))
+    assert await cache.get(key) is None
+
+
+async def test_disk_tier_evicts_least_recently_used(tmp_path):
+    """The disk tier stays within its byte budget."""
+    cache = TTSCache(memory_bytes=0, disk_bytes=10, disk_dir=str(tmp_path))
+    await cache.put("a", b"12345")
+    await cache.put("b", b"12345")
+    await cache.get("a")
+    await cache.put("c", b"12345")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"12345"
+    assert cache.get_metrics()["disk_bytes"] == 10
+
+
+async def test_workers_share_one_disk_budget(tmp_path):
+    """Workers writing the same directory keep it within one budget."""
+    workers = [
+        TTSCache(memory_bytes=0, disk_bytes=10, disk_dir=str(tmp_path))
+        for _ in range(2)]
+    await workers[0].put("a", b"12345")
+    await workers[1].put("b", b"12345")
+    assert await workers[0].get("b") == b"12345"
+
+    await workers[1].put("c", b"12345")
+    await workers[0].put("d", b"12345")
+
+    stored = sorted(path.name for path in tmp_path.glob("*.audio"))
+    assert stored == ["c.audio", "d.audio"]
+    assert workers[0].get_metrics()["disk_bytes"] == 10
+
+
+async def test_store_does_not_scan_directory(tmp_path, monkeypatch):
+    """Stores update the index instead of walking the disk tier."""
+    cache = TTSCache(memory_bytes=0, disk_bytes=10, disk_dir=str(tmp_path))
+    await cache.put("a", b"12345")
+
+    def scandir(path):
+        raise AssertionError("directory scanned")
+
+    monkeypatch.setattr(tts_cache.os, "scandir", scandir)
+    await cache.put("b", b"12345")
+    await cache.put("c", b"12345")
+
+    assert await cache.get("a") is None
+    assert cache.get_metrics()["disk_entries"] == 2
+
+
+async def test_missing_index_is_rebuilt(tmp_path):
+    """Files stored before the index existed count towards the budget."""
+    (tmp_path / "old.audio").write_bytes(b"12345")
+    cache = TTSCache(memory_bytes=0, disk_bytes=10, disk_dir=str(tmp_path))
+    await cache.put("new", b"12345")
+    assert cache.get_metrics()["disk_bytes"] == 10
+
+    await cache.put("newer", b"12345")
+    assert not (tmp_path / "old.audio").exists()
+
+
+def test_default_dir_is_per_user(monkeypatch, tmp_path):
+    """Without TTS_CACHE_DIR the disk tier lives in the user's cache directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache_dir() == str(tmp_path / "totoyai" / "tts")
+    assert TTSCache().disk_dir == default_cache_dir()
@@ -0,0 +1,41 @@
+"""Voice activity detection tests."""
+
+import numpy as np
+
+from totoyai.services.vad import detect_speech
+
+SAMPLE_RATE = 16000
+
+
+def _noise(seconds: float, level: float = 0.002) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(SAMPLE_RATE * seconds)) * level).astype(np.float32)
+
+
+def _tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def test_room_noise_is_rejected():
+    """Clips with only background noise contain no speech."""
+    result = detect_speech(_noise(2.0), SAMPLE_RATE)
+    assert not result.speech_detected
+    assert result.trimmed_seconds == 2.0
+
+
+def test_silence_around_speech_is_trimmed():
+    """Leading and trailing silence is cut, keeping a little padding."""
+    clip = np.concatenate([_noise(1.0), _tone(1.0), _noise(1.0)])
+    result = detect_speech(clip, SAMPLE_RATE, padding_ms=100)
+    assert result.speech_detected
+    assert 0.8 * SAMPLE_RATE <= result.start <= 1.0 * SAMPLE_RATE
+    assert 2.0 * SAMPLE_RATE <= result.end <= 2.2 * SAMPLE_RATE
+    assert result.trimmed_seconds > 1.5
+
+
+def test_continuous_speech_is_kept():
+    """A clip that is speech from start to end is not trimmed."""
+    result = detect_speech(_tone(2.0), SAMPLE_RATE)
+    assert result.speech_detected
+    assert (result.start, result.end) == (0, 2 * SAMPLE_RATE)